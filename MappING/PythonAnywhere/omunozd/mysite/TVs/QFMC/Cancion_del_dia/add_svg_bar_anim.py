@@ -1,73 +1,229 @@
 from xml.etree import ElementTree as ET
+from functools import lru_cache
 from typing import Optional
 import shutil, os, re
 from mysite.utils import printt
 
+SVG_NS = "http://www.w3.org/2000/svg"
+
+CSS_BASE = (
+    ".bar { transform-box: fill-box; transform-origin: center center; will-change: transform; }\n"
+    "@keyframes wiggle { 0% { transform: scaleY(1); } 25% { transform: scaleY(1.04); } 50% { transform: scaleY(0.98); } 75% { transform: scaleY(1.02); } 100% { transform: scaleY(1); } }\n"
+)
+
+# Modo compacto: las propiedades comunes de la animación van en la regla `.bar`
+CSS_BASE_COMPACTO = (
+    ".bar {{ transform-box: fill-box; transform-origin: center center; will-change: transform; "
+    "animation-duration: {dur}s; animation-timing-function: ease-in-out; animation-iteration-count: infinite; "
+    "animation-direction: alternate; animation-fill-mode: both; }}\n"
+)
+
+# Motor por plantilla: un <rect> autocerrado con valores de atributos simples (nada que escapar)
+_RECT_RE = re.compile(rb'<rect((?:\s+[\w-]+="[^"&<>\t\n\r]*")*)\s*/>')
+_ATRIBUTO_RE = re.compile(rb'([\w-]+)="([^"]*)"')
+# Texto entre dos barras que ElementTree escribe tal cual (sin marcas ni entidades)
+_TEXTO_ENTRE_BARRAS_RE = re.compile(rb'[^<>&\r]*')
+_MARCA_BARRAS = b"<__bars__/>"
+_MARCA_CSS = "__bar_css__"
+
+
 def add_bar_animations(
         svg_path: str,
         dur: float = 2.5,
-        delay_step: float = 0.06) -> Optional[str]:
-    """Add height + y SMIL animations to bars in the SVG.
+        delay_step: float = 0.06,
+        motor: str = "auto",
+        compacto: bool = False,
+        paso: float = 1.0) -> Optional[str]:
+    """Anima las barras del SVG con CSS (reescribe el archivo).
 
     Args:
-        svg_path: Path to the SVG file to modify.
-        dur: Animation duration in seconds.
-        delay_step: Stagger delay step between bars in seconds.
+        svg_path: SVG a modificar.
+        dur: Duración de la animación en segundos.
+        delay_step: Desfase entre barras consecutivas en segundos.
+        motor: "auto" o "etree", ver `animar_svg`.
+        compacto: CSS compacto, ver `animar_svg`.
+        paso: Redondeo de las alturas (px) para agrupar barras en modo compacto.
 
     Returns:
-        Backup file path on success.
+        Ruta del respaldo (.bak) con el SVG original.
     """
 
     if not os.path.exists(svg_path):
         raise FileNotFoundError(f"No se pudo encontrar el SVG: {svg_path}")
 
-    ET.register_namespace('', "http://www.w3.org/2000/svg")
+    with open(svg_path, 'rb') as f:
+        animado = animar_svg(f.read(), dur, delay_step, motor, compacto, paso)
+
+    bak_path = svg_path + '.bak'
+    shutil.copy(svg_path, bak_path)
+    with open(svg_path, 'wb') as f:
+        f.write(animado)
+
+    return bak_path
+
+
+def animar_svg(
+        svg: bytes,
+        dur: float = 2.5,
+        delay_step: float = 0.06,
+        motor: str = "auto",
+        compacto: bool = False,
+        paso: float = 1.0) -> bytes:
+    """Igual que `add_bar_animations`, pero en memoria: recibe y retorna los bytes del SVG.
+
+    Args:
+        svg: Documento SVG.
+        dur: Duración de la animación en segundos.
+        delay_step: Desfase entre barras consecutivas en segundos.
+        motor: "auto" arma los SVG con la forma de scannables (barras <rect> simples
+            seguidas) desde una plantilla y usa ElementTree para cualquier otro; "etree"
+            usa siempre ElementTree. Ambos producen los mismos bytes.
+        compacto: En vez de un `@keyframes` y una animación inline completa por barra,
+            redondea las alturas a `paso` px y escribe un `@keyframes` y una clase por
+            altura distinta. Las propiedades comunes van en una sola regla `.bar`, así
+            cada barra sólo conserva su `animation-delay` inline.
+        paso: Redondeo de las alturas (px) para agrupar barras en modo compacto.
+
+    Returns:
+        El SVG animado, con declaración XML, tal como lo escribe `add_bar_animations`.
+    """
+    if motor == "auto":
+        animado = _animar_plantilla(svg, dur, delay_step, compacto, paso)
+        if animado is not None:
+            return animado
+    elif motor != "etree":
+        raise ValueError(f"Motor desconocido: {motor}")
+
+    ET.register_namespace('', SVG_NS)
+    root = ET.fromstring(svg)
+    _animar_barras(root, dur, delay_step, compacto, paso)
+    return ET.tostring(root, encoding='utf-8', xml_declaration=True)
+
+
+def _animar_plantilla(svg: bytes, dur: float, delay_step: float,
+                      compacto: bool = False, paso: float = 1.0) -> Optional[bytes]:
+    """Motor por plantilla. Retorna None si `svg` no tiene la estructura esperada."""
+    # lo que las expresiones regulares no modelan (normalización de CRLF, comentarios,
+    # instrucciones de proceso, clases o estilos existentes) pasa por ElementTree
+    if b"\r" in svg or b"<!" in svg or b"<?" in svg or b"class=" in svg or b"<style" in svg:
+        return None
+
+    rects = list(_RECT_RE.finditer(svg))
+    if not rects or len(rects) != svg.count(b"<rect"):
+        return None
+
+    # la misma detección que ElementTree: los rect angostos son barras
+    barras = []
+    for match in rects:
+        lista_atributos = _ATRIBUTO_RE.findall(match.group(1))
+        atributos = dict(lista_atributos)
+        if len(atributos) != len(lista_atributos):
+            return None
+        try:
+            w = float(atributos[b"width"])
+            h = float(atributos[b"height"])
+        except (KeyError, ValueError):
+            return None
+        if w > 50 or h > 200:
+            continue
+        if b"y" not in atributos or b"style" in atributos:
+            return None
+        barras.append((match, lista_atributos, h))
+
+    if not barras:
+        return None
+    for (anterior, _, _), (siguiente, _, _) in zip(barras, barras[1:]):
+        if not _TEXTO_ENTRE_BARRAS_RE.fullmatch(svg[anterior.end():siguiente.start()]):
+            return None
+
+    primera, ultima = barras[0][0], barras[-1][0]
+    esqueleto = _renderizar_esqueleto(svg[:primera.start()] + _MARCA_BARRAS + svg[ultima.end():])
+    if esqueleto is None:
+        return None
+    inicio, css_a_barras, fin = esqueleto
+
+    partes, reglas_css = [], {}
+    for i, (match, lista_atributos, h) in enumerate(barras):
+        clase, inline, keyframes = _estilo_barra(i, h, dur, round(i * delay_step, 2), compacto, paso)
+        reglas_css.setdefault(clase, keyframes)
+        # ElementTree escribe los atributos en el orden del documento, separados por un espacio
+        atributos = b"".join(b' %s="%s"' % atributo for atributo in lista_atributos)
+        partes.append(b"<rect" + atributos + f' class="bar {clase}" style="{inline}" />'.encode())
+        if i + 1 < len(barras):
+            partes.append(svg[match.end():barras[i + 1][0].start()])
 
-    # Parse
-    tree = ET.parse(svg_path)
+    css = _texto_estilo(reglas_css, dur, compacto)
+    css = css.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+    return inicio + css.encode() + css_a_barras + b"".join(partes) + fin
 
-    ET.register_namespace('', "http://www.w3.org/2000/svg")
-    tree = ET.parse(svg_path)
-    root = tree.getroot()
-    ns = '{' + 'http://www.w3.org/2000/svg' + '}'
 
-    # find rects with class containing 'bar' (handles 'bar bar-0' etc.)
+@lru_cache(maxsize=32)
+def _renderizar_esqueleto(esqueleto: bytes) -> Optional[tuple[bytes, bytes, bytes]]:
+    """Todo menos las barras y el CSS, serializado una sola vez por ElementTree.
+
+    Retorna la salida dividida en torno al texto del CSS y a las barras.
+    """
+    ET.register_namespace('', SVG_NS)
+    try:
+        root = ET.fromstring(esqueleto)
+    except ET.ParseError:
+        return None
+    style_el = ET.Element('{' + SVG_NS + '}style')
+    style_el.text = _MARCA_CSS
+    root.insert(0, style_el)
+    salida = ET.tostring(root, encoding='utf-8', xml_declaration=True)
+
+    inicio, marca_css, resto = salida.partition(_MARCA_CSS.encode())
+    css_a_barras, marca_barras, fin = resto.partition(b"<__bars__ />")
+    if not marca_css or not marca_barras or _MARCA_CSS.encode() in resto or b"<__bars__ />" in fin:
+        return None
+    return inicio, css_a_barras, fin
+
+
+def _animar_barras(root: ET.Element, dur: float, delay_step: float,
+                   compacto: bool = False, paso: float = 1.0):
+    """Agrega la animación CSS de cada barra al SVG ya parseado `root` (en el lugar)."""
+    ns = '{' + SVG_NS + '}'
+
+    # rect con la clase 'bar' (también 'bar bar-0', etc.)
     rects = [r for r in root.findall(
         './/' + ns + 'rect') if r.get('class') and 'bar' in r.get('class').split()]
 
-    # fallback: auto-detect likely bar rects (e.g. narrow bars in the visualizer)
+    # si no hay, se detectan las barras: rect angostos (como las del visualizador)
     if not rects:
-        candidates = [r for r in root.findall('.//' + ns + 'rect') if r.get('width') and r.get('height')]
+        candidatos = [r for r in root.findall('.//' + ns + 'rect') if r.get('width') and r.get('height')]
         rects = []
-        for r in candidates:
+        for r in candidatos:
             try:
                 w = float(r.get('width'))
                 h = float(r.get('height'))
             except Exception:
                 continue
-            # skip large background rects or decorative full-width rects
+            # se omiten fondos y rect decorativos de todo el ancho
             if w > 50 or h > 200:
                 continue
             rects.append(r)
 
-    # ensure a <style> element exists to hold per-bar keyframes
+    # un <style> para los keyframes de las barras
     style_el = root.find(ns + 'style')
     if style_el is None:
         style_el = ET.Element(ns + 'style')
         root.insert(0, style_el)
 
-    # collect generated CSS rules
-    css_rules = []
+    # reglas CSS generadas, por clase (así el modo compacto escribe cada una una vez)
+    reglas_css = {}
 
     for i, r in enumerate(rects):
         try:
             h = float(r.get('height'))
-            y = float(r.get('y'))
         except Exception:
             continue
+        if not _numero(r.get('y')):
+            # como siempre: una barra sin 'y' numérico se deja sin animar
+            continue
 
         style = r.get('style') or ''
-        # parse animation-delay if present
+        # se respeta un animation-delay existente
         if 'animation-delay' in style:
             try:
                 delay = float(style.split('animation-delay:')[1].split('s')[0])
@@ -76,102 +232,108 @@ def add_bar_animations(
         else:
             delay = round(i * delay_step, 2)
 
-        # compute values (centered y adjustments so scaling appears vertically centered)
-        # use the same amplitudes as the general wiggle but per-rect in px for translate
-        scale25 = 1.04
-        scale50 = 0.98
-        scale75 = 1.02
-        h25 = round(h * scale25, 3)
-        h50 = round(h * scale50, 3)
-        h75 = round(h * scale75, 3)
-        # compute absolute translate offsets and signs so we don't emit double minus signs
-        t25 = round(abs(h25 - h) / 2, 3)
-        t50 = round(abs(h50 - h) / 2, 3)
-        t75 = round(abs(h75 - h) / 2, 3)
-        s25 = '-' if h25 > h else ''
-        s50 = '-' if h50 > h else ''
-        s75 = '-' if h75 > h else ''
-
-        # remove existing SMIL height/y animate children if present (we'll use CSS animations)
-        for child in list(r):
-            if child.tag == ns + 'animate' and child.get('attributeName') in ('height', 'y'):
-                r.remove(child)
-
-        # add classes for scoping: generic `bar` plus per-rect `bar-{i}`
-        existing_class = r.get('class') or ''
-        classes = existing_class.split() if existing_class else []
-        if 'bar' not in classes:
-            classes.append('bar')
-        bar_class = f'bar-{i}'
-        if bar_class not in classes:
-            classes.append(bar_class)
-        r.set('class', ' '.join(classes))
-
-        # set inline animation properties (use CSS keyframes we'll create)
-        r_style = (r.get('style') or '').strip().rstrip(';')
-        # remove any existing animation-* declarations
-        # (quick approach: append our settings; inline styles override class)
-        inline = (
-            f"animation-name:wiggle-{i};animation-duration:{dur}s;"
-            f"animation-timing-function:ease-in-out;animation-iteration-count:infinite;"
-            f"animation-delay:{delay}s;animation-direction:alternate;animation-fill-mode:both;"
-        )
-        r.set('style', (r_style + ';' if r_style else '') + inline)
-
-        # create CSS keyframes for this bar (translate Y in opposite direction)
-        keyframes = (
-            f"@keyframes wiggle-{i} {{\n"
-            f"  0% {{ transform: translateY(0px) scaleY(1); }}\n"
-            f" 25% {{ transform: translateY({s25}{t25}px) scaleY({scale25}); }}\n"
-            f" 50% {{ transform: translateY({s50}{t50}px) scaleY({scale50}); }}\n"
-            f" 75% {{ transform: translateY({s75}{t75}px) scaleY({scale75}); }}\n"
-            f" 100% {{ transform: translateY(0px) scaleY(1); }}\n"
-            f"}}"
-        )
-        css_rules.append(keyframes)
-
-    # append generated rules to style element text
-    existing_css = style_el.text or ''
-    # remove previously generated per-bar keyframes to avoid duplication and stale values
-    # keep base CSS (anything up through the generic @keyframes wiggle block)
-    m = re.search(r'@keyframes\s+wiggle\s*\{', existing_css, flags=re.S)
-    if m:
-        # find matching closing brace by counting braces
-        start = m.start()
-        i = m.end() - 1
-        depth = 1
-        while i < len(existing_css) - 1 and depth > 0:
-            i += 1
-            if existing_css[i] == '{':
-                depth += 1
-            elif existing_css[i] == '}':
-                depth -= 1
-        end = i + 1 if depth == 0 else m.end()
-        base_css = existing_css[:end]
-    else:
-        base_css = existing_css
-
-    # write clean base CSS and append per-bar keyframes
-    base_css = (
-        ".bar { transform-box: fill-box; transform-origin: center center; will-change: transform; }\n"
-        "@keyframes wiggle { 0% { transform: scaleY(1); } 25% { transform: scaleY(1.04); } 50% { transform: scaleY(0.98); } 75% { transform: scaleY(1.02); } 100% { transform: scaleY(1); } }\n"
+        # se quitan las animaciones SMIL de height/y que hubiera (se usan animaciones CSS)
+        for hijo in list(r):
+            if hijo.tag == ns + 'animate' and hijo.get('attributeName') in ('height', 'y'):
+                r.remove(hijo)
+
+        clase, inline, keyframes = _estilo_barra(i, h, dur, delay, compacto, paso)
+
+        # clases: `bar` para todas más `bar-{i}` (o una por altura en modo compacto)
+        clase_existente = r.get('class') or ''
+        clases = clase_existente.split() if clase_existente else []
+        if 'bar' not in clases:
+            clases.append('bar')
+        if clase not in clases:
+            clases.append(clase)
+        r.set('class', ' '.join(clases))
+
+        # la animación inline se agrega al final: el estilo inline tiene prioridad sobre la clase
+        estilo_previo = (r.get('style') or '').strip().rstrip(';')
+        r.set('style', (estilo_previo + ';' if estilo_previo else '') + inline)
+        reglas_css.setdefault(clase, keyframes)
+
+    # el CSS base más los keyframes de cada barra (reemplaza lo generado antes)
+    style_el.text = _texto_estilo(reglas_css, dur, compacto)
+
+
+def _numero(valor: Optional[str]) -> bool:
+    try:
+        float(valor)
+    except (TypeError, ValueError):
+        return False
+    return True
+
+
+def _texto_estilo(reglas_css: dict[str, str], dur: float, compacto: bool) -> str:
+    css_base = CSS_BASE_COMPACTO.format(dur=dur) if compacto else CSS_BASE
+    return css_base + ('\n'.join(reglas_css.values()) + '\n' if reglas_css else '')
+
+
+def _estilo_barra(i: int, h: float, dur: float, delay: float,
+                  compacto: bool, paso: float) -> tuple[str, str, str]:
+    """Clase, estilo inline y CSS de la barra `i`."""
+    if not compacto:
+        inline, keyframes = _animacion_barra(i, h, dur, delay)
+        return f'bar-{i}', inline, keyframes
+
+    clase, css = _animacion_altura(round(h / paso) * paso)
+    return clase, f"animation-delay:{delay}s;", css
+
+
+@lru_cache(maxsize=256)
+def _animacion_altura(h: float) -> tuple[str, str]:
+    """Clase y CSS (regla de la clase y keyframes) de todas las barras de altura `h` en modo compacto."""
+    etiqueta = f"{round(h, 3):g}".replace('.', '_')
+    nombre = f"wiggle-h{etiqueta}"
+    return f"bar-h{etiqueta}", f".bar-h{etiqueta} {{ animation-name: {nombre}; }}\n" + _fotogramas(nombre, h)
+
+
+@lru_cache(maxsize=4096)
+def _animacion_barra(i: int, h: float, dur: float, delay: float) -> tuple[str, str]:
+    """Estilo inline y bloque `@keyframes wiggle-{i}` de una barra de altura `h`."""
+    inline = (
+        f"animation-name:wiggle-{i};animation-duration:{dur}s;"
+        f"animation-timing-function:ease-in-out;animation-iteration-count:infinite;"
+        f"animation-delay:{delay}s;animation-direction:alternate;animation-fill-mode:both;"
     )
-    style_el.text = base_css + ('\n'.join(css_rules) + '\n' if css_rules else '')
+    return inline, _fotogramas(f"wiggle-{i}", h)
 
-    # write backup and write file
-    bak_path = svg_path + '.bak'
-    shutil.copy(svg_path, bak_path)
 
-    tree.write(svg_path, encoding='utf-8', xml_declaration=True)
+def _fotogramas(nombre: str, h: float) -> str:
+    """Bloque `@keyframes` que hace oscilar una barra de altura `h` en torno a su centro."""
+    # escalas de la oscilación, y el desplazamiento en px que la mantiene centrada
+    escala25 = 1.04
+    escala50 = 0.98
+    escala75 = 1.02
+    h25 = round(h * escala25, 3)
+    h50 = round(h * escala50, 3)
+    h75 = round(h * escala75, 3)
+    # desplazamiento absoluto y signo por separado, para no escribir dos signos menos
+    t25 = round(abs(h25 - h) / 2, 3)
+    t50 = round(abs(h50 - h) / 2, 3)
+    t75 = round(abs(h75 - h) / 2, 3)
+    s25 = '-' if h25 > h else ''
+    s50 = '-' if h50 > h else ''
+    s75 = '-' if h75 > h else ''
 
-    return bak_path
+    # la barra se desplaza en Y en sentido contrario a lo que crece
+    return (
+        f"@keyframes {nombre} {{\n"
+        f"  0% {{ transform: translateY(0px) scaleY(1); }}\n"
+        f" 25% {{ transform: translateY({s25}{t25}px) scaleY({escala25}); }}\n"
+        f" 50% {{ transform: translateY({s50}{t50}px) scaleY({escala50}); }}\n"
+        f" 75% {{ transform: translateY({s75}{t75}px) scaleY({escala75}); }}\n"
+        f" 100% {{ transform: translateY(0px) scaleY(1); }}\n"
+        f"}}"
+    )
 
 
 if __name__ == '__main__':
-    # default behavior for backwards compatibility
+    # comportamiento por defecto, por compatibilidad
     default_svg = os.path.join(
         'Cancion_del_dia','spotify_codes', 'QFMC_cancionDelDia_15_12_25.svg')
-    
+
     import sys
 
     path = os.path.join(sys.argv[1]) if len(sys.argv) > 1 else default_svg
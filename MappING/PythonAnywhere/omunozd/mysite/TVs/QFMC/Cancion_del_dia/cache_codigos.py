@@ -0,0 +1,144 @@
+import hashlib
+import json
+import os
+import shutil
+from threading import Lock
+from typing import Callable
+
+from mysite.config import SPOTIFY_CACHE_DIR, SPOTIFY_CACHE_MAX_MB
+from mysite.utils import printt
+
+# Subir si cambia la forma de generar o animar los códigos, para no reutilizar entradas viejas
+VERSION_CODIGOS = 2
+
+# Locks por clave, repartidos en un número fijo (dos claves pueden compartir uno)
+LOCKS_CLAVES = 64
+
+
+def es_temporal(nombre: str) -> bool:
+    """Archivo a medio escribir: `<clave>-tmp<extension>` o `<archivo>.tmp`."""
+    return os.path.splitext(nombre)[0].endswith("-tmp") or nombre.endswith(".tmp")
+
+
+class CacheCodigos:
+    """
+    Caché en disco de Spotify Codes ya generados, direccionado por contenido: cada entrada
+    se guarda con el hash de todos los parámetros que la definen (URI, colores, ancho,
+    tipo de archivo, logo y parámetros de la animación).
+
+    Los archivos fechados de spotify_codes son hard links a estas entradas (o copias, si
+    el sistema de archivos no los permite), así que reimportar una programación sólo
+    descarga las canciones nuevas o modificadas. Cuando el caché supera `max_bytes` se
+    eliminan las entradas usadas hace más tiempo; los archivos fechados no se ven
+    afectados porque el hard link mantiene el contenido.
+    """
+
+    def __init__(self, carpeta: str = SPOTIFY_CACHE_DIR, max_bytes: int = int(SPOTIFY_CACHE_MAX_MB * 2 ** 20)):
+        self.carpeta = carpeta
+        self.max_bytes = max_bytes
+        self._locks = [Lock() for _ in range(LOCKS_CLAVES)]
+        self._lock = Lock()
+        self.aciertos = 0
+        self.generados = 0
+
+    @staticmethod
+    def clave(**parametros) -> str:
+        parametros["version"] = VERSION_CODIGOS
+        return hashlib.sha256(
+            json.dumps(parametros, sort_keys=True, separators=(",", ":")).encode("utf-8")).hexdigest()[:40]
+
+    def ruta(self, clave: str, extension: str) -> str:
+        return os.path.join(self.carpeta, clave + extension)
+
+    def obtener(self, clave: str, extension: str, generar: Callable[[str, str], str]) -> str:
+        """
+        Retorna la ruta de la entrada `clave`. Si no existe, llama a `generar(carpeta, nombre)`,
+        que debe escribir el archivo y retornar su ruta; la entrada aparece recién cuando
+        el archivo está completo. Un mismo código no se genera dos veces a la vez.
+        """
+        ruta = self.ruta(clave, extension)
+
+        with self._locks[hash(clave) % LOCKS_CLAVES]:
+            if os.path.isfile(ruta):
+                os.utime(ruta)  # marca de uso para el desalojo
+                with self._lock:
+                    self.aciertos += 1
+                return ruta
+
+            os.makedirs(self.carpeta, exist_ok=True)
+            os.replace(generar(self.carpeta, f"{clave}-tmp"), ruta)
+            with self._lock:
+                self.generados += 1
+
+        self._desalojar(conservar=ruta)
+        return ruta
+
+    def enlazar(self, ruta_cache: str, destino: str):
+        """Deja `destino` apuntando a la entrada del caché."""
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+        if os.path.exists(destino) and os.path.samefile(ruta_cache, destino):
+            # Ya es un enlace a la entrada (y rename no hace nada entre dos enlaces del mismo archivo)
+            return
+        temporal = destino + ".tmp"
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        try:
+            os.link(ruta_cache, temporal)
+        except OSError:
+            shutil.copyfile(ruta_cache, temporal)
+        os.replace(temporal, destino)
+
+    def _desalojar(self, conservar: str = None):
+        with self._lock:
+            try:
+                # Los temporales son códigos que otro Thread está generando (ver `obtener`)
+                entradas = [e for e in os.scandir(self.carpeta)
+                            if e.is_file() and not es_temporal(e.name)]
+            except OSError:
+                return
+
+            total = sum(e.stat().st_size for e in entradas)
+            if total <= self.max_bytes:
+                return
+
+            eliminadas = 0
+            for entrada in sorted(entradas, key=lambda e: e.stat().st_mtime):
+                if total <= self.max_bytes:
+                    break
+                if entrada.path == conservar:
+                    continue
+                total -= entrada.stat().st_size
+                try:
+                    os.remove(entrada.path)
+                except FileNotFoundError:
+                    continue
+                eliminadas += 1
+
+        printt(f"Caché de Spotify Codes: {eliminadas} entradas eliminadas")
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            return {"aciertos": self.aciertos, "generados": self.generados}
+
+
+CACHE_CODIGOS = CacheCodigos()
+
+
+ARCHIVO_MANIFIESTO = ".manifiesto.json"
+
+
+def leer_manifiesto(carpeta: str) -> dict[str, str]:
+    """Archivo fechado -> llave en el caché, de lo último que se sincronizó en `carpeta`."""
+    try:
+        with open(os.path.join(carpeta, ARCHIVO_MANIFIESTO), "r", encoding="utf-8") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def guardar_manifiesto(carpeta: str, manifiesto: dict[str, str]):
+    os.makedirs(carpeta, exist_ok=True)
+    path = os.path.join(carpeta, ARCHIVO_MANIFIESTO)
+    with open(path + ".tmp", "w", encoding="utf-8") as file:
+        json.dump(manifiesto, file, ensure_ascii=False, indent=1, sort_keys=True)
+    os.replace(path + ".tmp", path)
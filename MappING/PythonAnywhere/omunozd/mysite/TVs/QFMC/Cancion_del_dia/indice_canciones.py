@@ -0,0 +1,146 @@
+import hashlib
+import os
+import re
+import time
+from datetime import datetime, timedelta
+from threading import Lock, Timer
+from typing import NamedTuple
+
+from mysite.utils import printt
+
+CARPETA_CODIGOS = os.path.join("mysite", "TVs", "QFMC", "Cancion_del_dia", "spotify_codes")
+
+# Fecha en el nombre de los códigos generados: QFMC_CDD_dd_mm_yy[_nombre].svg
+PATRON_FECHA = re.compile(r"(\d{2}_\d{2}_\d{2})")
+
+
+class CodigoCancion(NamedTuple):
+    nombre: str
+    contenido: bytes
+    mimetype: str
+    version: str    # hash del contenido, para saber si cambió
+
+
+def _mimetype(nombre: str) -> str:
+    return "image/png" if nombre.endswith(".png") else "image/svg+xml"
+
+
+class IndiceCanciones:
+    """
+    Índice en memoria fecha (dd_mm_yy) -> Spotify Code ya leído de disco.
+
+    Servir la canción del día es una búsqueda en un diccionario. El índice se reconstruye
+    cuando se llama a `invalidar()` (al importar la programación) o cuando cambia la
+    carpeta (revisando los mtime a lo más cada `intervalo_revision` segundos), y la
+    canción de hoy se recalcula sola a la medianoche local.
+    """
+
+    def __init__(self, carpeta: str = CARPETA_CODIGOS, intervalo_revision: float = 10):
+        self.carpeta = carpeta
+        self.intervalo_revision = intervalo_revision
+
+        self._por_fecha: dict[str, CodigoCancion] = {}
+        self._default: CodigoCancion | None = None
+        self._hoy: CodigoCancion | None = None
+        self._firma = None
+        self._ultima_revision = 0.0
+        self._lock = Lock()
+        self._timer: Timer | None = None
+
+    def _firma_carpeta(self):
+        # mtime de la carpeta (archivos nuevos o borrados) y el mayor mtime de sus archivos
+        # (códigos reescritos en el mismo lugar, p. ej. al animarlos)
+        try:
+            with os.scandir(self.carpeta) as archivos:
+                return os.stat(self.carpeta).st_mtime_ns, max(
+                    (a.stat().st_mtime_ns for a in archivos if a.is_file()), default=0)
+        except OSError:
+            return None
+
+    def _leer(self, nombre: str) -> CodigoCancion:
+        with open(os.path.join(self.carpeta, nombre), "rb") as f:
+            contenido = f.read()
+        return CodigoCancion(nombre, contenido, _mimetype(nombre), hashlib.md5(contenido).hexdigest()[:12])
+
+    def recargar(self):
+        """Lee de nuevo todos los códigos de la carpeta."""
+        with self._lock:
+            firma = self._firma_carpeta()
+            por_fecha, default = {}, None
+
+            archivos = sorted(os.listdir(self.carpeta)) if firma is not None else []
+            for nombre in archivos:
+                if not nombre.endswith((".svg", ".png")):
+                    continue
+                if nombre.startswith("default."):
+                    default = self._leer(nombre)
+                    continue
+                coincidencia = PATRON_FECHA.search(nombre)
+                if coincidencia and coincidencia.group(1) not in por_fecha:
+                    por_fecha[coincidencia.group(1)] = self._leer(nombre)
+
+            self._por_fecha, self._default = por_fecha, default
+            self._firma = firma
+            self._ultima_revision = time.monotonic()
+            self._actualizar_hoy()
+
+        printt(f"Índice de canciones recargado ({len(por_fecha)} fechas)")
+
+    def invalidar(self):
+        """Fuerza la recarga en la próxima consulta."""
+        self._ultima_revision = 0.0
+        self._firma = object()
+
+    def _actualizar_hoy(self):
+        self._hoy = self._por_fecha.get(datetime.now().strftime("%d_%m_%y"), self._default)
+
+    def _programar_medianoche(self):
+        # Llamar con self._lock tomado, así hay a lo más un Timer pendiente
+        ahora = datetime.now()
+        medianoche = datetime.combine(ahora.date() + timedelta(days=1), datetime.min.time())
+        # Un segundo de margen para no quedar justo antes del cambio de día
+        self._timer = Timer((medianoche - ahora).total_seconds() + 1, self._medianoche)
+        self._timer.name = "Medianoche canción del día"
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _medianoche(self):
+        with self._lock:
+            self._actualizar_hoy()
+            self._programar_medianoche()
+        printt(f"Canción del día: {self._hoy.nombre if self._hoy else 'sin código'}")
+
+    def _revisar(self):
+        if time.monotonic() - self._ultima_revision < self.intervalo_revision:
+            return
+        if self._firma_carpeta() != self._firma:
+            self.recargar()
+        else:
+            self._ultima_revision = time.monotonic()
+
+    def hoy(self) -> CodigoCancion | None:
+        """Código de la canción de hoy (o default.svg si no hay uno programado)."""
+        if self._timer is None:
+            with self._lock:
+                if self._timer is None:
+                    self._programar_medianoche()
+        self._revisar()
+        return self._hoy
+
+    def para_fecha(self, fecha: datetime) -> CodigoCancion | None:
+        self._revisar()
+        return self._por_fecha.get(fecha.strftime("%d_%m_%y"))
+
+    def detener(self):
+        with self._lock:
+            if self._timer:
+                self._timer.cancel()
+
+
+INDICE_CANCIONES = IndiceCanciones()
+
+
+def codigo_default_vigente(max_dias: float, carpeta: str = CARPETA_CODIGOS) -> bool:
+    """True si default.svg existe y tiene menos de `max_dias` días."""
+    path = os.path.join(carpeta, "default.svg")
+    return os.path.isfile(path) and time.time() - os.path.getmtime(path) < max_dias * 86400
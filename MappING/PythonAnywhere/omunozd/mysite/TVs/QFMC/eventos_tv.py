@@ -0,0 +1,94 @@
+import json
+from datetime import date, datetime
+from zoneinfo import ZoneInfo
+
+from mysite.calendario import eventos_de_la_semana
+from mysite.config import TV_ZONA_HORARIA
+
+
+def hoy_tv() -> date:
+    """Fecha de hoy donde están las TVs (TV_ZONA_HORARIA), no la del servidor."""
+    return datetime.now(ZoneInfo(TV_ZONA_HORARIA)).date()
+
+
+def _parse_fecha(raw: str) -> dict:
+    if not raw:
+        return {"fecha": "", "hora": ""}
+    if "T" not in raw:
+        return {"fecha": raw, "hora": ""}
+    fecha, tiempo = raw.split("T", 1)
+    return {"fecha": fecha, "hora": tiempo[:5]}
+
+
+def _primero(lista: list, *llaves: str) -> str:
+    """Equivalente a `lista?.[0]?.llave1?.llave2 || ''` de JavaScript."""
+    valor = lista[0] if lista else None
+    for llave in llaves:
+        valor = valor.get(llave) if isinstance(valor, dict) else None
+    return valor or ""
+
+
+def normalizar_evento(n: dict) -> dict:
+    """
+    Misma estructura que `normalizeEvent` en web/backend/script.js, calculada en el
+    servidor para que las TVs no tengan que procesar la respuesta cruda de Notion.
+    """
+    props = n.get("properties", {})
+    fecha = (props.get("Fecha") or {}).get("date") or {}
+    inicio_raw, fin_raw = fecha.get("start") or "", fecha.get("end") or ""
+    tipo = (props.get("Tipo") or {}).get("select") or {}
+
+    return {
+        "id": n.get("id", ""),
+        "nombre": _primero((props.get("Nombre") or {}).get("title"), "text", "content"),
+        "emoji": (n.get("icon") or {}).get("emoji") or "",
+        "tipo": {"nombre": tipo.get("name") or "", "color": tipo.get("color") or ""},
+        "lugar": _primero((props.get("Lugar") or {}).get("rich_text"), "text", "content"),
+        "etiquetas": [
+            {"nombre": t["name"], "color": t["color"]}
+            for t in (props.get("Etiquetas") or {}).get("multi_select") or []
+        ],
+        "comentario": _primero((props.get("Comentario") or {}).get("rich_text"), "text", "content"),
+        "imagen": ((n.get("cover") or {}).get("external") or {}).get("url") or "",
+        "fecha": {
+            "inicio": _parse_fecha(inicio_raw),
+            "fin": _parse_fecha(fin_raw),
+            "todo_el_dia": "T" not in inicio_raw,
+        },
+    }
+
+
+def diferencias_eventos(anteriores: list[dict], nuevos: list[dict]) -> dict | None:
+    """
+    Cambios entre dos listas de eventos normalizados: agregados, modificados, ids
+    eliminados y el nuevo orden. Retorna None si no hay cambios.
+    """
+    previos = {e["id"]: e for e in anteriores}
+    actuales = {e["id"]: e for e in nuevos}
+
+    agregados = [e for id_, e in actuales.items() if id_ not in previos]
+    modificados = [e for id_, e in actuales.items() if id_ in previos and previos[id_] != e]
+    eliminados = [id_ for id_ in previos if id_ not in actuales]
+    orden = [e["id"] for e in nuevos]
+
+    if not (agregados or modificados or eliminados) and orden == [e["id"] for e in anteriores]:
+        return None
+    return {"agregados": agregados, "modificados": modificados, "eliminados": eliminados, "orden": orden}
+
+
+def construir_feed_tv(paginas: list[dict], hoy: date = None) -> bytes:
+    """
+    JSON compacto con los eventos de esta semana que aún no pasan, ya normalizados y
+    ordenados por inicio.
+    """
+    hoy = hoy or hoy_tv()
+    eventos = [
+        normalizar_evento(n) for n in eventos_de_la_semana(paginas, hoy)
+        if n["properties"]["Fecha"]["date"]["start"][:10] >= hoy.isoformat()
+    ]
+
+    return json.dumps(
+        {"generado": datetime.now(ZoneInfo(TV_ZONA_HORARIA)).isoformat(timespec="seconds"), "eventos": eventos},
+        ensure_ascii=False,
+        separators=(",", ":")
+    ).encode("utf-8")
@@ -1,13 +1,106 @@
-import requests
+import time
 import traceback
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from functools import lru_cache
 from typing import NamedTuple
-from threading import Thread, Lock, current_thread
+from threading import Lock, current_thread
 import os
 
-from mysite.TVs.QFMC.Cancion_del_dia.add_svg_bar_anim import add_bar_animations
+from mysite.TVs.QFMC.Cancion_del_dia.add_svg_bar_anim import animar_svg
+from mysite.TVs.QFMC.Cancion_del_dia.indice_canciones import INDICE_CANCIONES, CARPETA_CODIGOS, codigo_default_vigente
+from mysite.TVs.QFMC.Cancion_del_dia.cache_codigos import CACHE_CODIGOS, leer_manifiesto, guardar_manifiesto
 from mysite.notion_creds import HEADERS_OSCAR_CAI, DATABASES_IDS
 from mysite.utils import printt
+from mysite import notion
+from mysite.http_client import CLIENTE
+from mysite.sync_notion import obtener_sincronizador
+from mysite.config import (SCANNABLES_URL, SCANNABLES_RPS, SPOTIFY_CONCURRENCIA, SPOTIFY_DEFAULT_MAX_DIAS,
+                           SPOTIFY_ANIMACION_COMPACTA)
+
+CLIENTE.limitar(SCANNABLES_URL, SCANNABLES_RPS)
+
+
+# Código que se muestra los días sin canción programada
+URL_DEFAULT = "https://open.spotify.com/intl-es/track/4Qs3OEgzBPGPmRR5QJ0UIs"  # Mi Equilibrio Espiritual
+
+# Parámetros por defecto de animar_svg. Sin SPOTIFY_ANIMACION_COMPACTA los códigos salen
+# idénticos a los de siempre; con él las barras de igual altura comparten keyframes.
+ANIMACION = {"dur": 2.5, "delay_step": 0.06, "compacto": SPOTIFY_ANIMACION_COMPACTA}
+
+
+def uri_spotify(URI_or_URL: str) -> str:
+    """Normaliza una URL de Spotify -https://open.spotify.com/track/...- a su URI."""
+    if "http" in URI_or_URL:
+        URL_data = URI_or_URL.split("/")
+        return f"spotify:{URL_data[-2]}:{URL_data[-1].split('?')[0]}"
+    elif "spotify:" in URI_or_URL:
+        return URI_or_URL
+    else:
+        raise ValueError(f"URI o URL no reconocida: {URI_or_URL}")
+
+
+CONTENT_TYPES = {
+    "image/svg+xml": ".svg",
+    "image/png": ".png"
+}
+
+
+@lru_cache(maxsize=1)
+def logo_qfmc() -> bytes:
+    """Logo de QFMC que reemplaza al de Spotify (se lee una sola vez)."""
+    with open(os.path.join(os.path.dirname(__file__), "sources", "logo_spotify_code.txt"), "rb") as file:
+        return file.read()
+
+
+def reemplazar_logo(svg: bytes) -> bytes:
+    """Cambia el logo de Spotify (el primer <g> del SVG) por el de QFMC."""
+    return svg[:svg.index(b"<g")] + logo_qfmc() + b"\n</svg>"
+
+
+def codigo_spotify(
+        URI_or_URL: str,
+        color_fondo: str = "fff8e8",
+        color_barras: bool = False,
+        ancho: int = 1000,
+        tipo_archivo: str = ".svg",
+        logo_QFMC: bool = True) -> tuple[bytes, str]:
+    """
+    Descarga el Spotify Code y, si corresponde, le cambia el logo, sin pasar por disco.
+    Retorna el contenido y su extensión ('.svg' o '.png'). Los parámetros son los mismos
+    de `guardar_codigo_spotify`.
+    """
+    URI = uri_spotify(URI_or_URL)
+
+    if tipo_archivo not in CONTENT_TYPES.values():
+        raise ValueError(
+            f"Tipo de archivo {tipo_archivo} no válido. Se aceptan: {' , '.join(CONTENT_TYPES.values())}")
+
+    url_base = SCANNABLES_URL
+    parametros_url = [tipo_archivo[1:],
+                      color_fondo,
+                      "white" if color_barras else "black",
+                      str(ancho),
+                      URI]
+    url = url_base + "/".join(parametros_url)
+
+    try:
+        response = CLIENTE.get(url)
+    except:
+        traceback.print_exc()
+        printt("\nError al solicitar generación de código.")
+        raise ConnectionError("Error HTTP: No se pudo realizar la solicitud.")
+
+    if response.status_code != 200:
+        raise Exception(
+            f"Error ({response.status_code}) en la solicitud.\nGET: {url}")
+
+    extension = CONTENT_TYPES[response.headers.get("content-type").split(";")[0].strip()]
+    contenido = response.content
+    if logo_QFMC and extension == ".svg":
+        contenido = reemplazar_logo(contenido)
+
+    return contenido, extension
 
 
 def guardar_codigo_spotify(
@@ -20,7 +113,9 @@ def guardar_codigo_spotify(
         logo_QFMC: bool = True,
         folderpath: str = None,
         filename: str = None,
-        nombre_cancion: str = ""):
+        nombre_cancion: str = "",
+        animacion: dict = None,
+        bak: bool = False):
     """
     Esta función genera y guarda el Spotify Code de la canción que se ingrese. Utiliza la API nativa
     de Spotify para obtener el código original, luego le cambia el logo. También funciona para playlists, 
@@ -59,88 +154,277 @@ def guardar_codigo_spotify(
 
     :param nombre_cancion: Si se incluye un nombre de canción, se agrega al final del nombre de archivo.
     :type nombre_cancion: str
+
+    :param animacion: Parámetros de `animar_svg` (p. ej. ANIMACION) si se quiere animar las barras
+    antes de guardar. Todo se hace en memoria y el archivo se escribe una sola vez.
+    :type animacion: dict
+
+    :param bak: Guardar también el código sin animar en `<archivo>.bak`.
+    :type bak: bool
     """
 
     folderpath = os.path.join("mysite", "TVs", "QFMC",
                               "Cancion_del_dia", "spotify_codes") if not folderpath else folderpath
-    lock_escritura = Lock()
 
-    if "http" in URI_or_URL:
-        URL_data = URI_or_URL.split("/")
-        URI = f"spotify:{URL_data[-2]}:{URL_data[-1].split("?")[0]}"
-    elif "spotify:" in URI_or_URL:
-        URI = URI_or_URL
+    contenido, extension = codigo_spotify(URI_or_URL, color_fondo, color_barras, ancho, tipo_archivo, logo_QFMC)
+
+    if isinstance(fecha, datetime):
+        str_fecha = fecha.strftime("%d_%m_%y")
+    elif type(fecha) == str:
+        str_fecha = fecha
     else:
-        raise ValueError(f"URI o URL no reconocida: {URI_or_URL}")
+        str_fecha = datetime.today().strftime("%d_%m_%y")
 
-    save_content_types = {
-        "image/svg+xml": ".svg",
-        "image/png": ".png"
-    }
+    if not filename:
+        filename = f"QFMC_CDD_{str_fecha}{'_' + nombre_cancion if nombre_cancion else ''}{extension}"
+    elif filename and "." in filename:
+        idx = filename.index(".")
+        filename = filename[:idx] + extension
+    else:
+        filename += extension
 
-    if tipo_archivo not in save_content_types.values():
-        raise ValueError(
-            f"Tipo de archivo {tipo_archivo} no válido. Se aceptan: {" , ".join(save_content_types.values())}")
+    filepath = os.path.join(folderpath, filename)
 
-    url_base = "https://scannables.scdn.co/uri/plain/"
-    parametros_url = [tipo_archivo[1:],
-                      color_fondo,
-                      "white" if color_barras else "black",
-                      str(ancho),
-                      URI]
-    url = url_base + "/".join(parametros_url)
+    respaldo = contenido if bak else None
+    if animacion is not None and extension == ".svg":
+        contenido = animar_svg(contenido, **animacion)
 
-    try:
-        response = requests.get(url)
-    except:
-        traceback.print_exc()
-        printt("\nError al solicitar generación de código.")
-        raise ConnectionError("Error HTTP: No se pudo realizar la solicitud.")
+    escribir_archivo(filepath, contenido, respaldo)
+    return filepath
 
-    else:
-        if response.status_code != 200:
-            raise Exception(
-                f"Error ({response.status_code}) en la solicitud.\nGET: {url}")
-
-        if isinstance(fecha, datetime):
-            str_fecha = fecha.strftime("%d_%m_%y")
-        elif type(fecha) == str:
-            str_fecha = fecha
-        else:
-            str_fecha = datetime.today().strftime("%d_%m_%y")
 
-        content_type = response.headers.get("content-type")
+def escribir_archivo(filepath: str, contenido: bytes, respaldo: bytes = None):
+    """
+    Escribe `contenido` de forma atómica (archivo temporal + rename), y opcionalmente
+    `respaldo` en `filepath`.bak.
+    """
+    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+    for path, datos in ((filepath + ".bak", respaldo), (filepath, contenido)):
+        if datos is None:
+            continue
+        temporal = f"{path}.{current_thread().ident}.tmp"
+        with open(temporal, "wb") as file:
+            file.write(datos)
+        os.replace(temporal, path)
+
 
-        if not filename:
-            filename = f"QFMC_CDD_{str_fecha}{"_" + nombre_cancion if nombre_cancion else ""}{save_content_types[content_type]}"
-        elif filename and "." in filename:
-            idx = filename.index(".")
-            filename = filename[:idx] + save_content_types[content_type]
+def archivo_programado(fecha: datetime | str, nombre_cancion: str = "", tipo_archivo: str = ".svg") -> str:
+    """Nombre del archivo fechado de una canción programada."""
+    str_fecha = fecha.strftime("%d_%m_%y") if isinstance(fecha, datetime) else fecha
+    return f"QFMC_CDD_{str_fecha}{'_' + nombre_cancion if nombre_cancion else ''}{tipo_archivo}"
+
+
+def clave_codigo(
+        URI_or_URL: str,
+        color_fondo: str = "fff8e8",
+        color_barras: bool = False,
+        ancho: int = 1000,
+        tipo_archivo: str = ".svg",
+        logo_QFMC: bool = True,
+        animacion: dict = None) -> str:
+    """Llave en CACHE_CODIGOS del código definido por estos parámetros."""
+    return CACHE_CODIGOS.clave(
+        URI=uri_spotify(URI_or_URL),
+        color_fondo=color_fondo,
+        color_barras=bool(color_barras),
+        ancho=int(ancho),
+        tipo_archivo=tipo_archivo,
+        logo_QFMC=bool(logo_QFMC),
+        animacion=(animacion if animacion else ANIMACION) if tipo_archivo == ".svg" else None
+    )
+
+
+def generar_codigo_programado(
+        URI_or_URL: str,
+        fecha: datetime | str,
+        nombre_cancion: str = "",
+        color_fondo: str = "fff8e8",
+        color_barras: bool = False,
+        ancho: int = 1000,
+        tipo_archivo: str = ".svg",
+        logo_QFMC: bool = True,
+        folderpath: str = None,
+        animacion: dict = None) -> str:
+    """
+    Deja en `folderpath` el código animado de la canción programada para `fecha`. Si ya se
+    generó un código con los mismos parámetros se reutiliza desde CACHE_CODIGOS, sin
+    consultar a Spotify. Retorna el filepath del archivo fechado.
+    """
+    folderpath = folderpath if folderpath else CARPETA_CODIGOS
+    animacion = animacion if animacion else ANIMACION
+    clave = clave_codigo(URI_or_URL, color_fondo, color_barras, ancho, tipo_archivo, logo_QFMC, animacion)
+
+    def generar(carpeta: str, nombre: str) -> str:
+        return guardar_codigo_spotify(
+            URI_or_URL,
+            color_fondo=color_fondo,
+            color_barras=color_barras,
+            ancho=ancho,
+            tipo_archivo=tipo_archivo,
+            logo_QFMC=logo_QFMC,
+            folderpath=carpeta,
+            filename=nombre,
+            animacion=animacion)
+
+    ruta_cache = CACHE_CODIGOS.obtener(clave, tipo_archivo, generar)
+
+    filepath = os.path.join(folderpath, archivo_programado(fecha, nombre_cancion, tipo_archivo))
+    CACHE_CODIGOS.enlazar(ruta_cache, filepath)
+    return filepath
+
+
+class InformeImportacion:
+    """
+    Resultado (y progreso, mientras corre) de una importación de la programación: qué
+    códigos se generaron, cuáles fallaron y por qué, cuáles se omitieron, cuáles no
+    cambiaron, cuáles se eliminaron y cuánto tardó cada uno.
+    """
+
+    def __init__(self, origen: str):
+        self.origen = origen
+        self.inicio = time.time()
+        self.fin = None
+        self.total = 0
+        self.exitosas = []
+        self.fallidas = []
+        self.omitidas = []
+        self.sin_cambios = 0
+        self.eliminadas = []
+        self._lock = Lock()
+
+    def _agregar(self, lista: list, resultado: dict):
+        with self._lock:
+            lista.append(resultado)
+
+    def exitosa(self, nombre: str, fecha: str, segundos: float, filepath: str):
+        self._agregar(self.exitosas, {"cancion": nombre, "fecha": fecha, "segundos": round(segundos, 3),
+                                      "archivo": os.path.basename(filepath)})
+
+    def fallida(self, nombre: str, fecha: str, segundos: float, motivo: str):
+        self._agregar(self.fallidas, {"cancion": nombre, "fecha": fecha, "segundos": round(segundos, 3),
+                                      "motivo": motivo})
+
+    def omitida(self, nombre: str, motivo: str):
+        self._agregar(self.omitidas, {"cancion": nombre, "motivo": motivo})
+
+    def a_dict(self) -> dict:
+        with self._lock:
+            completadas = len(self.exitosas) + len(self.fallidas) + self.sin_cambios
+            return {
+                "origen": self.origen,
+                "en_curso": self.fin is None,
+                "progreso": f"{completadas}/{self.total}",
+                "segundos": round((self.fin or time.time()) - self.inicio, 3),
+                "exitosas": list(self.exitosas),
+                "fallidas": list(self.fallidas),
+                "omitidas": list(self.omitidas),
+                "sin_cambios": self.sin_cambios,
+                "eliminadas": list(self.eliminadas),
+                "cache": CACHE_CODIGOS.estadisticas(),
+            }
+
+
+# Última importación (o la que está en curso), para consultar su progreso
+ULTIMA_IMPORTACION: InformeImportacion | None = None
+_lock_importacion = Lock()
+
+
+def generar_lote(canciones: list[dict], informe: InformeImportacion,
+                 concurrencia: int = SPOTIFY_CONCURRENCIA, folderpath: str = None,
+                 limpiar_carpeta: bool = False) -> InformeImportacion:
+    """
+    Sincroniza la carpeta de códigos con la programación `canciones` (kwargs de
+    `generar_codigo_programado`), registrando el resultado de cada una en `informe`.
+
+    Se compara con el manifiesto de lo que ya se generó: sólo se crean o actualizan los
+    archivos que cambiaron (con a lo más `concurrencia` a la vez) y se eliminan los que
+    ya no están programados. Cada archivo se reemplaza de forma atómica, así que las TVs
+    nunca ven la carpeta vacía ni un código a medio escribir.
+
+    :param limpiar_carpeta: Eliminar también los códigos que no están en el manifiesto
+    (generados antes de que existiera, o a mano). default.svg nunca se elimina.
+    :type limpiar_carpeta: bool
+    """
+    folderpath = folderpath if folderpath else CARPETA_CODIGOS
+    anterior = leer_manifiesto(folderpath)
+    manifiesto, pendientes, fallidos = {}, [], []
+
+    for data_cancion in canciones:
+        nombre, fecha = data_cancion.get("nombre_cancion", ""), str(data_cancion["fecha"])
+        try:
+            archivo = archivo_programado(
+                data_cancion["fecha"], nombre, data_cancion.get("tipo_archivo", ".svg"))
+            clave = clave_codigo(**{k: v for k, v in data_cancion.items() if k not in ("fecha", "nombre_cancion")})
+        except Exception as e:
+            informe.fallida(nombre, fecha, 0.0, f"{e.__class__.__name__}: {e}")
+            continue
+
+        manifiesto[archivo] = clave
+        if anterior.get(archivo) == clave and os.path.isfile(os.path.join(folderpath, archivo)):
+            informe.sin_cambios += 1
+        else:
+            pendientes.append((archivo, data_cancion))
+
+    def generar_y_animar(_pendiente: tuple[str, dict]):
+        _archivo, _data_cancion = _pendiente
+        nombre, fecha = _data_cancion.get("nombre_cancion", ""), str(_data_cancion["fecha"])
+        inicio = time.perf_counter()
+        try:
+            _svg_path = generar_codigo_programado(folderpath=folderpath, **_data_cancion)
+        except Exception as e:
+            traceback.print_exc()
+            fallidos.append(_archivo)
+            informe.fallida(nombre, fecha, time.perf_counter() - inicio, f"{e.__class__.__name__}: {e}")
         else:
-            filename += save_content_types[content_type]
+            informe.exitosa(nombre, fecha, time.perf_counter() - inicio, _svg_path)
+            printt(f"Spotify Code ANIMADO y GUARDADO ({_svg_path})")
 
-        filepath = os.path.join(folderpath, filename)
-        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+    informe.total += len(canciones)
+    with ThreadPoolExecutor(max_workers=max(1, concurrencia), thread_name_prefix="Código Spotify") as pool:
+        list(pool.map(generar_y_animar, pendientes))
 
-        svg = str(response.content)[2:-1]
-        if logo_QFMC:
-            idx_start = svg.index("<g")
+    # Un código que no se pudo regenerar se queda como estaba
+    for archivo in fallidos:
+        if archivo in anterior and os.path.isfile(os.path.join(folderpath, archivo)):
+            manifiesto[archivo] = anterior[archivo]
+        else:
+            manifiesto.pop(archivo, None)
+
+    sobrantes = set(anterior) - set(manifiesto)
+    if limpiar_carpeta and os.path.isdir(folderpath):
+        sobrantes |= {
+            archivo for archivo in os.listdir(folderpath)
+            if archivo.endswith((".svg", ".png", ".bak"))
+            and not archivo.startswith("default.")
+            and archivo not in manifiesto
+        }
+    for archivo in sobrantes:
+        try:
+            os.remove(os.path.join(folderpath, archivo))
+        except FileNotFoundError:
+            pass
+        informe.eliminadas.append(archivo)
 
-            with open(os.path.join("mysite", "TVs", "QFMC", "sources", "logo_spotify_code.txt"), "r") as file:
-                QFMC_logo = file.read()
+    guardar_manifiesto(folderpath, manifiesto)
 
-            svg = svg[:idx_start] + QFMC_logo + "\n</svg>"
+    INDICE_CANCIONES.recargar()
+    informe.fin = time.time()
+    printt(f"Importación ({informe.origen}): {len(informe.exitosas)} códigos generados, "
+           f"{informe.sin_cambios} sin cambios, {len(informe.eliminadas)} eliminados, "
+           f"{len(informe.fallidas)} fallidos, {len(informe.omitidas)} omitidos")
+    return informe
 
-        with open(filepath, "w") as file:
-            with lock_escritura:
-                file.write(svg)
 
-        return filepath
+def _iniciar_importacion(origen: str) -> InformeImportacion:
+    global ULTIMA_IMPORTACION
+    ULTIMA_IMPORTACION = InformeImportacion(origen)
+    return ULTIMA_IMPORTACION
 
 
 def actualizar_codigos_programados(
         filepath_programacion: str = None,
-        limpiar_carpeta: bool = False):
+        limpiar_carpeta: bool = False,
+        concurrencia: int = SPOTIFY_CONCURRENCIA) -> InformeImportacion:
 
     class CancionDelDia(NamedTuple):
         URI_or_URL: str
@@ -151,7 +435,7 @@ def actualizar_codigos_programados(
         tipo_archivo: str
         logo_QFMC: bool
 
-    path = filepath_programacion if filepath_programacion else os.path.join("mysite", "TVs", "QFMC"
+    path = filepath_programacion if filepath_programacion else os.path.join("mysite", "TVs", "QFMC",
                                                                             "Cancion_del_dia", "programacion.csv")
     canciones: list[CancionDelDia] = []
 
@@ -159,99 +443,91 @@ def actualizar_codigos_programados(
         for line in map(lambda x: x.strip(), file.readlines()[1:]):
             canciones.append(CancionDelDia._make(line.split(",")))
 
-    if limpiar_carpeta:
-        folderpath = os.path.join(os.path.dirname(path), "spotify_codes")
-        if os.path.exists(folderpath):
-            for file in os.listdir(folderpath):
-                if file.endswith((".svg", ".png", ".bak")) and not file.endswith("default.svg"):
-                    os.remove(os.path.join(folderpath, file))
-
-    for cancion in canciones:
-        svg_path = guardar_codigo_spotify(
-            URI_or_URL=cancion.URI_or_URL,
-            fecha=cancion.fecha,
-            color_fondo=cancion.color_fondo,
-            color_barras=cancion.color_barras == "True",
-            ancho=int(cancion.ancho),
-            tipo_archivo=cancion.tipo_archivo,
-            logo_QFMC=cancion.logo_QFMC == "True"
-        )
-        add_bar_animations(svg_path)
+    with _lock_importacion:
+        informe = _iniciar_importacion(path)
+        return generar_lote([
+            dict(
+                URI_or_URL=cancion.URI_or_URL,
+                fecha=cancion.fecha,
+                color_fondo=cancion.color_fondo,
+                color_barras=cancion.color_barras == "True",
+                ancho=int(cancion.ancho),
+                tipo_archivo=cancion.tipo_archivo,
+                logo_QFMC=cancion.logo_QFMC == "True"
+            )
+            for cancion in canciones
+        ], informe, concurrencia, os.path.join(os.path.dirname(path), "spotify_codes"), limpiar_carpeta)
 
 
 def actualizar_codigo_del_dia():
     raise NotImplementedError()
 
 
-def importar_programacion_notion(limpiar_carpeta: bool = True):
+def importar_programacion_notion(limpiar_carpeta: bool = True,
+                                 concurrencia: int = SPOTIFY_CONCURRENCIA) -> InformeImportacion:
+    """
+    Genera los códigos de todas las canciones programadas en Notion. Retorna el informe
+    con el resultado de cada una (también disponible en ULTIMA_IMPORTACION mientras corre).
+    """
 
     # Solicitar database de Notion
-    url = f"https://api.notion.com/v1/databases/{DATABASES_IDS['cancion_del_dia']}/query"
-    payload = {'page_size': 100}
-
-    data = []
-    run = True
-    while run:
-        response = requests.post(url, headers=HEADERS_OSCAR_CAI, json=payload)
-        data.extend(response.json().get("results", []))
-        run = response.json().get("has_more", False)
-        if response.json().get("next_cursor", None):
-            payload["start_cursor"] = response.json()["next_cursor"]
-
-    if limpiar_carpeta:
-        folderpath = os.path.join("mysite", "TVs", "QFMC",
-                                  "Cancion_del_dia", "spotify_codes")
-
-        if os.path.exists(folderpath):
-            for file in os.listdir(folderpath):
-                if file.endswith((".svg", ".png", ".bak")) and not file.endswith("default.svg"):
-                    os.remove(os.path.join(folderpath, file))
-            printt(f"Carpeta '{folderpath}' limpiada.")
-        else:
-            printt(f"No se encontró el path {folderpath}")
+    sincronizador = obtener_sincronizador(DATABASES_IDS['cancion_del_dia'], HEADERS_OSCAR_CAI)
+    sincronizador.sincronizar(prioridad=notion.PRIORIDAD_FONDO)
+    data = sincronizador.paginas()
 
-    # Función para generar y guardar el código en carpeta
-    def generar_y_animar(_data_cancion: dict):
-        _svg_path = guardar_codigo_spotify(**_data_cancion)
-        add_bar_animations(_svg_path)
-        printt(f"Spotify Code ANIMADO y GUARDADO ({_svg_path})")
+    with _lock_importacion:
+        informe = _iniciar_importacion("Notion")
+        canciones = []
 
-    threads = []
-    for entrada in data:
-        if not entrada["properties"]["Fecha"]["date"]["start"] or not entrada["properties"]["URL"]["url"]:
-            continue
+        for entrada in data:
+            propiedades = entrada["properties"]
+            try:
+                nombre_cancion = propiedades["Nombre"]["title"][0]['plain_text']
+            except (KeyError, IndexError):
+                nombre_cancion = entrada["id"]
 
-        fecha_standard = entrada["properties"]["Fecha"]["date"]["start"]
-        data_cancion = {
-            "fecha": f"{fecha_standard[8:10]}_{fecha_standard[5:7]}_{fecha_standard[2:4]}",
-            "URI_or_URL": entrada["properties"]["URL"]["url"],
-            "nombre_cancion": entrada["properties"]["Nombre"]["title"][0]['plain_text']
-        }
+            fecha_standard = (propiedades["Fecha"]["date"] or {}).get("start")
+            if not fecha_standard or not propiedades["URL"]["url"]:
+                informe.omitida(nombre_cancion, "Sin fecha o sin URL")
+                continue
 
-        # Parámetros opcionales
-        if entrada["properties"]["Color Fondo"]["rich_text"]:
-            data_cancion["color_fondo"] = entrada["properties"]["Color Fondo"]["rich_text"][0]["plain_text"]
+            data_cancion = {
+                "fecha": f"{fecha_standard[8:10]}_{fecha_standard[5:7]}_{fecha_standard[2:4]}",
+                "URI_or_URL": propiedades["URL"]["url"],
+                "nombre_cancion": nombre_cancion
+            }
 
-        if entrada["properties"]["Ancho"]["number"]:
-            data_cancion['ancho'] = entrada["properties"]["Ancho"]["number"]
+            # Parámetros opcionales
+            if propiedades["Color Fondo"]["rich_text"]:
+                data_cancion["color_fondo"] = propiedades["Color Fondo"]["rich_text"][0]["plain_text"]
 
-        if entrada["properties"]["Tipo de Archivo"]["select"]:
-            data_cancion['tipo_archivo'] = entrada["properties"]["Tipo de Archivo"]["select"]["name"]
+            if propiedades["Ancho"]["number"]:
+                data_cancion['ancho'] = propiedades["Ancho"]["number"]
 
-        data_cancion["color_barras"] = entrada["properties"]["Barras Blancas"]["checkbox"]
-        data_cancion["logo_QFMC"] = entrada["properties"]["Logo QFMC"]["checkbox"]
+            if propiedades["Tipo de Archivo"]["select"]:
+                data_cancion['tipo_archivo'] = propiedades["Tipo de Archivo"]["select"]["name"]
 
-        printt("Generando Código, Canción:", data_cancion["nombre_cancion"])
-        thread = Thread(
-            name=f"Thread Canción: {data_cancion['nombre_cancion']}",
-            target=generar_y_animar,
-            args=(data_cancion,)
-        )
-        threads.append(thread)
-        thread.start()
+            data_cancion["color_barras"] = propiedades["Barras Blancas"]["checkbox"]
+            data_cancion["logo_QFMC"] = propiedades["Logo QFMC"]["checkbox"]
+            canciones.append(data_cancion)
+
+        printt(f"Generando {len(canciones)} códigos ({concurrencia} a la vez)")
+        return generar_lote(canciones, informe, concurrencia, limpiar_carpeta=limpiar_carpeta)
+
+
+def asegurar_codigo_default(max_dias: float = SPOTIFY_DEFAULT_MAX_DIAS) -> bool:
+    """
+    Genera default.svg sólo si no existe o tiene más de `max_dias` días. Retorna True si
+    se regeneró.
+    """
+    if codigo_default_vigente(max_dias):
+        return False
+
+    guardar_codigo_spotify(URL_DEFAULT, tipo_archivo=".svg", filename="default", folderpath=CARPETA_CODIGOS)
+    INDICE_CANCIONES.invalidar()
+    printt("default.svg regenerado")
+    return True
 
-    for thread in threads:
-        thread.join()
 
 if __name__ == "__main__":
 
@@ -3,7 +3,18 @@
 
 const TIEMPO_IMAGEN = 10000; //ms
 const MAX_LEN_BEFORE_SHRINK = 26; //chars
-const DATA_FILEPATH = "QFMC/web/backend/data/QFMC_data.json";
+// Eventos ya normalizados, filtrados y ordenados por el servidor (ver TVs/QFMC/eventos_tv.py)
+const DATA_FILEPATH = "QFMC/eventos.json";
+// Server-Sent Events con los cambios de eventos y de la canción del día
+const STREAM_FILEPATH = "QFMC/stream";
+// Si el servidor rechaza el stream (503 cuando hay demasiadas TVs conectadas), se consulta
+// DATA_FILEPATH cada INTERVALO_POLLING y se reintenta el stream cada REINTENTO_STREAM.
+const INTERVALO_POLLING = 60000; //ms
+const REINTENTO_STREAM = 300000; //ms
+
+// Lista de eventos en rotación. Se actualiza en el lugar con los cambios del servidor.
+let eventos = [];
+let polling = null;
 
 // Función para obtener el día de la semana en español
 function getDiaSemana(fecha) {
@@ -14,37 +25,6 @@ function getDiaSemana(fecha) {
     return dias[date.getDay()];
 }
 
-// Formatea y normaliza la estructura de cada evento desde la respuesta de Notion
-function normalizeEvent(n) {
-    const startRaw = n.properties?.Fecha?.date?.start || '';
-    const endRaw = n.properties?.Fecha?.date?.end || '';
-    function parseDate(raw) {
-        if (!raw) return { fecha: '', hora: '' };
-        if (!raw.includes('T')) return { fecha: raw, hora: '' };
-        const [fecha, tiempo] = raw.split('T');
-        const hora = tiempo.substring(0, 5); // HH:MM
-        return { fecha, hora };
-    }
-
-    return {
-        nombre: n.properties?.Nombre?.title?.[0]?.text?.content || '',
-        emoji: n.icon?.emoji || '',
-        tipo: {
-            nombre: n.properties?.Tipo?.select?.name || '',
-            color: n.properties?.Tipo?.select?.color || ''
-        },
-        lugar: n.properties?.Lugar?.rich_text?.[0]?.text?.content || '',
-        etiquetas: (n.properties?.Etiquetas?.multi_select || []).map(t => ({ nombre: t.name, color: t.color })),
-        comentario: n.properties?.Comentario?.rich_text?.[0]?.text?.content || '',
-        imagen: n.cover?.external?.url || '',
-        fecha: {
-            inicio: parseDate(startRaw),
-            fin: parseDate(endRaw),
-            todo_el_dia: !startRaw.includes('T')
-        }
-    };
-}
-
 function setupEditableElements() {
     const editableElements = document.querySelectorAll('[contenteditable="true"]');
     editableElements.forEach(element => {
@@ -95,6 +75,64 @@ function createTagElement(tag, index) {
     return span;
 }
 
+// Aplica los cambios enviados por el servidor (evento 'eventos' del stream)
+function aplicarCambios(cambios) {
+    const porId = new Map(eventos.map(e => [e.id, e]));
+    (cambios.eliminados || []).forEach(id => porId.delete(id));
+    (cambios.agregados || []).concat(cambios.modificados || []).forEach(e => porId.set(e.id, e));
+    eventos = (cambios.orden || [...porId.keys()]).map(id => porId.get(id)).filter(Boolean);
+}
+
+function recargarCancion(version) {
+    // index.html no muestra el Spotify Code de la canción del día: el evento 'cancion' se
+    // ignora salvo que la página tenga un #cancion-del-dia, y entonces sólo se recarga esa imagen
+    const elemCancion = document.getElementById('cancion-del-dia');
+    if (!elemCancion) return;
+    elemCancion.src = 'cancion?v=' + encodeURIComponent(version || Date.now());
+}
+
+async function consultarEventos() {
+    try {
+        const res = await fetch(DATA_FILEPATH, { cache: 'no-cache' });
+        if (!res.ok) throw new Error('HTTP ' + res.status);
+        eventos = (await res.json()).eventos || [];
+        recargarCancion();
+    } catch (err) {
+        console.warn('No se pudo actualizar los eventos:', err);
+    }
+}
+
+function iniciarPolling() {
+    if (polling === null) polling = setInterval(consultarEventos, INTERVALO_POLLING);
+}
+
+function suscribirCambios() {
+    if (!window.EventSource) {
+        iniciarPolling();
+        return;
+    }
+    const fuente = new EventSource(STREAM_FILEPATH);
+    fuente.addEventListener('inicial', (e) => {
+        clearInterval(polling);
+        polling = null;
+        eventos = JSON.parse(e.data).eventos || [];
+    });
+    fuente.addEventListener('eventos', (e) => {
+        aplicarCambios(JSON.parse(e.data));
+        console.log("Eventos actualizados.");
+    });
+    fuente.addEventListener('cancion', (e) => {
+        recargarCancion(JSON.parse(e.data).version);
+    });
+    fuente.addEventListener('error', () => {
+        // EventSource se reconecta solo si se corta la conexión, pero no si el servidor
+        // responde con error (p. ej. 503): en ese caso se pasa a polling
+        if (fuente.readyState !== EventSource.CLOSED) return;
+        iniciarPolling();
+        setTimeout(suscribirCambios, REINTENTO_STREAM);
+    });
+}
+
 async function loadAndPopulate() {
     // Try fetching the DATA_FILEPATH file relative to this HTML page.
     let data;
@@ -109,31 +147,8 @@ async function loadAndPopulate() {
         return;
     }
 
-    const results = data.results || [];
-    if (results.length === 0) { 
-        // setupEditableElements(); 
-        return; 
-    }
-
-    // Normalizar eventos y filtrar por fecha futura
-    let eventos = results.map(normalizeEvent);
-    
-    const ahora = new Date();
-    ahora.setHours(0, 0, 0, 0); // Comparar por día completo
-    
-    // Filtrar solo eventos que son después de hoy
-    eventos = eventos.filter(evento => {
-        if (!evento.fecha.inicio.fecha) return false;
-        const fechaEvento = new Date(evento.fecha.inicio.fecha);
-        return fechaEvento >= ahora;
-    });
-    
-    // Ordenar eventos por fecha (más próximos primero)
-    eventos.sort((a, b) => {
-        const fechaA = new Date(a.fecha.inicio.fecha);
-        const fechaB = new Date(b.fecha.inicio.fecha);
-        return fechaA - fechaB;
-    });
+    eventos = data.eventos || [];
+    suscribirCambios();
     
     // Cache elementos DOM
     const elemDia = document.getElementById('event-day');
@@ -216,16 +231,15 @@ async function loadAndPopulate() {
         }
     }
 
-    // Iniciar rotación de eventos
-    if (eventos.length > 0) {
-        let indiceActual = 0;
+    // Iniciar rotación de eventos. La lista puede cambiar entre vueltas (ver aplicarCambios).
+    let indiceActual = 0;
+    if (eventos.length > 0) mostrarEvento(eventos[indiceActual]);
+
+    setInterval(() => {
+        if (eventos.length === 0) return;
+        indiceActual = (indiceActual + 1) % eventos.length;
         mostrarEvento(eventos[indiceActual]);
-        
-        setInterval(() => {
-            indiceActual = (indiceActual + 1) % eventos.length;
-            mostrarEvento(eventos[indiceActual]);
-        }, TIEMPO_IMAGEN);
-    }
+    }, TIEMPO_IMAGEN);
 
     // Hook editable behaviour after populating
     // setupEditableElements();
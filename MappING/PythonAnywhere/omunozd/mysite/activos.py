@@ -0,0 +1,182 @@
+import gzip
+import hashlib
+import os
+import re
+import time
+from mimetypes import guess_type
+from threading import Lock
+from typing import NamedTuple
+
+try:
+    import brotli
+except ImportError:  # dependencia opcional: sin ella sólo se ofrece gzip
+    brotli = None
+
+# Tipos que vale la pena comprimir (las imágenes jpg/png ya vienen comprimidas)
+COMPRIMIBLES = ("text/", "application/javascript", "application/json", "image/svg+xml")
+
+# Archivos más grandes que esto se sirven desde disco, sin guardarlos en memoria
+MAX_BYTES_EN_MEMORIA = 5 * 2 ** 20
+
+CACHE_INMUTABLE = "public, max-age=31536000, immutable"
+CACHE_REVALIDAR = "no-cache"
+
+# Referencias a otros activos dentro del HTML (src="QFMC/..." o href="QFMC/...")
+_REFERENCIA_RE = re.compile(r'((?:src|href)=")([^":?#]+\.[A-Za-z0-9]+)(")')
+
+
+class Activo(NamedTuple):
+    ruta: str
+    mimetype: str
+    etag: str                       # hash del contenido, sin comillas
+    variantes: dict[str, bytes]     # codificación ("identity", "gzip", "br") -> cuerpo
+    mtime: float
+    dependencias: tuple             # (ruta, etag) de los activos referenciados desde un HTML
+
+
+def elegir_codificacion(accept_encoding: str, disponibles) -> str:
+    """
+    Mejor codificación de `disponibles` que acepte el cliente según `Accept-Encoding`
+    (br, luego gzip, luego identity).
+    """
+    aceptadas = set()
+    for parte in (accept_encoding or "").split(","):
+        nombre, _, parametros = parte.strip().partition(";")
+        q = parametros.strip().removeprefix("q=")
+        try:
+            if q and float(q) == 0:
+                continue
+        except ValueError:
+            pass
+        aceptadas.add(nombre.strip().lower())
+
+    for codificacion in ("br", "gzip"):
+        if codificacion in disponibles and (codificacion in aceptadas or "*" in aceptadas):
+            return codificacion
+    return "identity"
+
+
+def etag_variante(etag: str, codificacion: str) -> str:
+    """ETag fuerte (con comillas) de una de las codificaciones de un mismo contenido."""
+    return f'"{etag}"' if codificacion == "identity" else f'"{etag}-{codificacion}"'
+
+
+def coincide_etag(if_none_match: str, etag: str) -> bool:
+    """True si algún ETag de `If-None-Match` corresponde a `etag` (en cualquier codificación)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for candidato in if_none_match.split(","):
+        candidato = candidato.strip().removeprefix("W/").strip('"')
+        if candidato == etag or candidato.startswith(etag + "-"):
+            return True
+    return False
+
+
+def comprimir(contenido: bytes, mimetype: str) -> dict[str, bytes]:
+    """Cuerpo original más las versiones gzip y brotli (si está instalado) que sean más chicas."""
+    variantes = {"identity": contenido}
+    if not mimetype.startswith(COMPRIMIBLES) or len(contenido) < 256:
+        return variantes
+
+    comprimido = gzip.compress(contenido, compresslevel=9, mtime=0)
+    if len(comprimido) < len(contenido):
+        variantes["gzip"] = comprimido
+    if brotli is not None:
+        comprimido = brotli.compress(contenido)
+        if len(comprimido) < len(contenido):
+            variantes["br"] = comprimido
+    return variantes
+
+
+class AlmacenActivos:
+    """
+    Archivos estáticos de una carpeta (las TVs) cargados en memoria la primera vez que
+    se piden, con sus versiones comprimidas y ETag ya calculados.
+
+    Cada entrada se revisa contra el mtime del archivo a lo más cada `intervalo_revision`
+    segundos. En los HTML se agrega `?v=<hash>` a las referencias a otros activos, así
+    esos se pueden cachear indefinidamente y el HTML cambia cuando cambian ellos.
+    """
+
+    def __init__(self, raiz: str, intervalo_revision: float = 2):
+        self.raiz = os.path.abspath(raiz)
+        self.intervalo_revision = intervalo_revision
+        self._activos: dict[str, Activo] = {}
+        self._revisado: dict[str, float] = {}
+        self._lock = Lock()
+
+    def path(self, ruta: str) -> str | None:
+        """Path absoluto de `ruta`, o None si se sale de la carpeta."""
+        path = os.path.abspath(os.path.join(self.raiz, ruta))
+        return path if path.startswith(self.raiz + os.sep) else None
+
+    def obtener(self, ruta: str) -> Activo | None:
+        """El activo en `ruta` (relativa a la raíz), o None si no existe o es muy grande."""
+        ruta = ruta.replace("\\", "/")
+        activo = self._activos.get(ruta)
+        ahora = time.monotonic()
+
+        if activo is not None and ahora - self._revisado.get(ruta, 0) < self.intervalo_revision:
+            return activo
+
+        path = self.path(ruta)
+        try:
+            mtime = os.stat(path).st_mtime if path and os.path.isfile(path) else None
+        except OSError:
+            mtime = None
+
+        if mtime is None or os.path.getsize(path) > MAX_BYTES_EN_MEMORIA:
+            with self._lock:
+                self._activos.pop(ruta, None)
+            return None
+
+        if activo is None or activo.mtime != mtime or not self._dependencias_vigentes(activo):
+            activo = self._cargar(ruta, path, mtime)
+            with self._lock:
+                self._activos[ruta] = activo
+        self._revisado[ruta] = ahora
+        return activo
+
+    def _dependencias_vigentes(self, activo: Activo) -> bool:
+        for ruta, etag in activo.dependencias:
+            dependencia = self.obtener(ruta)
+            if dependencia is None or dependencia.etag != etag:
+                return False
+        return True
+
+    def _cargar(self, ruta: str, path: str, mtime: float) -> Activo:
+        with open(path, "rb") as f:
+            contenido = f.read()
+
+        mimetype, _ = guess_type(path)
+        mimetype = mimetype or "application/octet-stream"
+        if mimetype.startswith("text/") or mimetype in ("application/javascript", "application/json"):
+            mimetype += "; charset=utf-8"
+
+        dependencias = ()
+        if mimetype.startswith("text/html"):
+            contenido, dependencias = self._versionar_referencias(contenido)
+
+        return Activo(
+            ruta,
+            mimetype,
+            hashlib.sha256(contenido).hexdigest()[:20],
+            comprimir(contenido, mimetype),
+            mtime,
+            dependencias
+        )
+
+    def _versionar_referencias(self, html: bytes) -> tuple[bytes, tuple]:
+        dependencias = []
+
+        def versionar(m: re.Match) -> str:
+            referencia = self.obtener(m.group(2))
+            if referencia is None:
+                return m.group(0)
+            dependencias.append((referencia.ruta, referencia.etag))
+            return f"{m.group(1)}{m.group(2)}?v={referencia.etag}{m.group(3)}"
+
+        texto = _REFERENCIA_RE.sub(versionar, html.decode("utf-8"))
+        return texto.encode("utf-8"), tuple(dependencias)
@@ -0,0 +1,101 @@
+import hashlib
+import os
+import time
+import traceback
+from threading import Thread, Lock
+from typing import NamedTuple
+
+from mysite.activos import comprimir
+from mysite.utils import printt
+
+
+class Artefacto(NamedTuple):
+    """Respuesta ya serializada y lista para servir desde memoria."""
+    nombre: str
+    contenido: bytes
+    mimetype: str
+    creado: float
+    etag: str = ""                  # hash del contenido, sin comillas
+    modificado: float | None = None  # para Last-Modified (timestamp)
+    comprimidos: dict[str, bytes] | None = None  # codificación ("gzip", "br") -> cuerpo
+
+    def variante(self, codificacion: str) -> bytes:
+        if codificacion == "identity" or not self.comprimidos:
+            return self.contenido
+        return self.comprimidos[codificacion]
+
+    def codificaciones(self) -> tuple[str, ...]:
+        return ("identity", *(self.comprimidos or ()))
+
+
+def crear_artefacto(nombre: str, contenido: bytes, mimetype: str, modificado: float = None) -> Artefacto:
+    """
+    Artefacto con su ETag y sus versiones comprimidas ya calculadas, para que servirlo
+    (o responder 304) no cueste CPU en cada solicitud.
+    """
+    comprimidos = comprimir(contenido, mimetype)
+    comprimidos.pop("identity")
+    return Artefacto(
+        nombre,
+        contenido,
+        mimetype,
+        time.time(),
+        hashlib.sha256(contenido).hexdigest()[:20],
+        modificado,
+        comprimidos
+    )
+
+
+class AlmacenArtefactos:
+    """
+    Guarda en memoria la última versión de cada artefacto (calendarios .ics, JSON, etc.).
+
+    Publicar reemplaza la referencia completa, así que quien está sirviendo una versión
+    anterior la termina de enviar sin ver un archivo a medio escribir. Opcionalmente se
+    puede dejar una copia en disco (`carpeta_snapshot`), que se escribe en otro Thread y
+    nunca forma parte del request.
+    """
+
+    def __init__(self, carpeta_snapshot: str = ""):
+        self.carpeta_snapshot = carpeta_snapshot
+        self._artefactos: dict[str, Artefacto] = {}
+        self._lock = Lock()
+
+    def publicar(self, nombre: str, contenido: bytes, mimetype: str = "application/octet-stream",
+                 modificado: float = None) -> Artefacto:
+        with self._lock:
+            anterior = self._artefactos.get(nombre)
+            if anterior is not None and anterior.contenido == contenido:
+                # Mismo contenido: se mantienen ETag, Last-Modified y versiones comprimidas
+                return anterior
+
+            # Eliminar un evento no cambia ninguna fecha de edición: si el contenido cambió
+            # sin que avance `modificado`, Last-Modified pasa a ser el momento de publicar.
+            if anterior is not None and (modificado is None or modificado <= (anterior.modificado or 0)):
+                modificado = time.time()
+            artefacto = self._artefactos[nombre] = crear_artefacto(nombre, contenido, mimetype, modificado)
+
+        if self.carpeta_snapshot:
+            Thread(
+                name=f"Snapshot {nombre}",
+                target=self._guardar_snapshot,
+                args=(artefacto,),
+                daemon=True
+            ).start()
+
+        return artefacto
+
+    def obtener(self, nombre: str) -> Artefacto | None:
+        return self._artefactos.get(nombre)
+
+    def _guardar_snapshot(self, artefacto: Artefacto):
+        filepath = os.path.join(self.carpeta_snapshot, artefacto.nombre)
+        try:
+            os.makedirs(self.carpeta_snapshot, exist_ok=True)
+            tmp_path = f"{filepath}.tmp{os.getpid()}"
+            with open(tmp_path, "wb") as f:
+                f.write(artefacto.contenido)
+            os.replace(tmp_path, filepath)
+        except OSError:
+            traceback.print_exc()
+            printt(f"No se pudo guardar el snapshot de {artefacto.nombre}")
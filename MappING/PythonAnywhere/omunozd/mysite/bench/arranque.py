@@ -0,0 +1,106 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# Mide cuánto tarda en importarse la aplicación WSGI (lo que paga cada reinicio de un
+# worker) y falla si supera el presupuesto. Se corre en procesos nuevos para medir en
+# frío, con los servicios externos apuntando a un puerto cerrado: importar la app no
+# debe hacer I/O de red.
+#
+# Uso (desde la carpeta que contiene a mysite/):
+#     python -m mysite.bench.arranque --presupuesto 400
+
+MODULO_APP = "mysite.flask_app"
+
+# Módulos que no deberían cargarse al importar la app (se importan al primer uso)
+PEREZOSOS = ["ics", "requests", "mysite.TVs.QFMC.spotify"]
+
+# Puerto local sin servidor: cualquier conexión falla de inmediato
+SIN_RED = "http://127.0.0.1:9/"
+
+
+def entorno() -> dict:
+    env = dict(os.environ)
+    env.update({
+        "NOTION_API_URL": SIN_RED,
+        "SCANNABLES_URL": SIN_RED,
+        # Que default.svg se considere vigente, para no lanzar su regeneración
+        "SPOTIFY_DEFAULT_MAX_DIAS": "100000",
+    })
+    return env
+
+
+def importar(flags: list[str] = ()) -> tuple[float, str, str]:
+    """
+    Importa la app en un proceso nuevo. Retorna (segundos, módulos perezosos que se
+    cargaron igual, stderr).
+    """
+    codigo = (
+        "import sys, time; t = time.perf_counter(); "
+        f"import {MODULO_APP}; "
+        "print(time.perf_counter() - t); "
+        f"print(','.join(m for m in {PEREZOSOS!r} if m in sys.modules))"
+    )
+    salida = subprocess.run([sys.executable, *flags, "-c", codigo], env=entorno(),
+                            capture_output=True, text=True)
+    if salida.returncode != 0:
+        raise SystemExit(f"No se pudo importar {MODULO_APP}:\n{salida.stderr}")
+    segundos, cargados = salida.stdout.splitlines()[-2:]
+    return float(segundos), cargados, salida.stderr
+
+
+def modulos_mas_lentos(importtime: str, cantidad: int = 10) -> list[tuple[int, str]]:
+    """
+    Módulos con mayor tiempo acumulado según `-X importtime`, considerando los de primer
+    nivel y los que importa directamente la app.
+    """
+    tiempos = []
+    for linea in importtime.splitlines():
+        if not linea.startswith("import time:") or "cumulative" in linea:
+            continue
+        _, acumulado, nombre = linea[len("import time:"):].split("|")
+        profundidad = (len(nombre) - len(nombre.lstrip()) - 1) // 2
+        if profundidad <= 1 and nombre.strip() != MODULO_APP:
+            tiempos.append((int(acumulado), nombre.strip()))
+    return sorted(tiempos, reverse=True)[:cantidad]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tiempo de importación de la aplicación WSGI.")
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--presupuesto", type=float, default=400, help="Máximo aceptado para la mediana (ms).")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    tiempos, cargados = [], ""
+    for _ in range(args.repeticiones):
+        segundos, cargados, _ = importar()
+        tiempos.append(segundos)
+    mediana = statistics.median(tiempos) * 1000
+
+    _, _, importtime = importar(["-X", "importtime"])
+    print(f"Módulos más lentos al importar {MODULO_APP}:")
+    for microsegundos, nombre in modulos_mas_lentos(importtime):
+        print(f"  {nombre:<40}{microsegundos / 1000:8.1f} ms")
+
+    print(f"\nImportación: mediana {mediana:.1f} ms (min {min(tiempos) * 1000:.1f} ms, "
+          f"{args.repeticiones} procesos en {time.perf_counter() - inicio:.1f} s), "
+          f"presupuesto {args.presupuesto:.0f} ms")
+
+    problemas = []
+    if mediana > args.presupuesto:
+        problemas.append(f"la importación supera el presupuesto ({mediana:.1f} > {args.presupuesto:.0f} ms)")
+    if cargados:
+        problemas.append(f"se importan al arrancar módulos que deberían ser perezosos: {cargados}")
+
+    for problema in problemas:
+        print(f"ERROR: {problema}")
+    if problemas:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from socketserver import ThreadingMixIn
+from threading import Thread, Event, Lock
+from wsgiref.simple_server import make_server, WSGIServer, WSGIRequestHandler
+
+import requests
+
+from mysite.bench.stubs import StubNotion, StubScannables, iniciar
+
+# Prueba de carga de punta a punta: levanta stubs locales de Notion y scannables, apunta
+# flask_app a ellos por configuración y simula suscriptores de calendario y TVs al mismo
+# tiempo. Cada TV recarga la página y sus datos y además mantiene abierto /TV/QFMC/stream.
+# Reporta throughput y latencias p50/p95/p99 por ruta.
+#
+# Uso (desde la carpeta que contiene a mysite/):
+#     python -m mysite.bench.carga --calendarios 500 --tvs 20 --duracion 60
+
+
+class _ServidorHilos(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+class _HandlerSilencioso(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class Registro:
+    """Latencias por ruta y contadores de los streams, compartidos por todos los clientes."""
+
+    def __init__(self):
+        self.latencias: dict[str, list[float]] = {}
+        self.errores: dict[str, int] = {}
+        self.streams = {"abiertos": 0, "max_abiertos": 0, "conexiones": 0, "cortes": 0, "eventos": 0}
+        self._lock = Lock()
+
+    def contar_stream(self, campo: str, cantidad: int = 1):
+        with self._lock:
+            self.streams[campo] += cantidad
+            self.streams["max_abiertos"] = max(self.streams["max_abiertos"], self.streams["abiertos"])
+
+    def agregar(self, ruta: str, latencia: float, ok: bool):
+        with self._lock:
+            self.latencias.setdefault(ruta, []).append(latencia)
+            if not ok:
+                self.errores[ruta] = self.errores.get(ruta, 0) + 1
+
+    def reporte(self, duracion: float) -> dict:
+        def percentil(valores: list[float], p: float) -> float:
+            return valores[min(len(valores) - 1, int(p * len(valores)))]
+
+        reporte = {}
+        for ruta, valores in sorted(self.latencias.items()):
+            valores = sorted(valores)
+            reporte[ruta] = {
+                "solicitudes": len(valores),
+                "errores": self.errores.get(ruta, 0),
+                "rps": len(valores) / duracion,
+                "p50_ms": percentil(valores, 0.50) * 1000,
+                "p95_ms": percentil(valores, 0.95) * 1000,
+                "p99_ms": percentil(valores, 0.99) * 1000,
+                "max_ms": valores[-1] * 1000,
+            }
+        return reporte
+
+
+def cliente(base: str, rutas: list[tuple[str, str]], pausa: float, registro: Registro, fin: Event, semilla: int):
+    """Un suscriptor o TV: recorre sus rutas en ciclo hasta que se acabe la prueba."""
+    rng = random.Random(semilla)
+    sesion = requests.Session()
+    # Se reparten los primeros requests para no partir todos en el mismo instante
+    fin.wait(rng.uniform(0, pausa))
+
+    while not fin.is_set():
+        for etiqueta, ruta in rutas:
+            inicio = time.perf_counter()
+            try:
+                ok = sesion.get(base + ruta, timeout=120).status_code < 400
+            except requests.RequestException:
+                ok = False
+            registro.agregar(etiqueta, time.perf_counter() - inicio, ok)
+            if fin.wait(rng.uniform(0.5 * pausa, 1.5 * pausa)):
+                return
+
+
+def cliente_stream(base: str, registro: Registro, fin: Event, semilla: int):
+    """
+    Una TV conectada a /TV/QFMC/stream: mide cuánto tarda el evento 'inicial', cuenta los
+    eventos que llegan y se reconecta si se corta, como EventSource en el navegador.
+    """
+    rng = random.Random(semilla)
+    sesion = requests.Session()
+    fin.wait(rng.uniform(0, 1))
+
+    while not fin.is_set():
+        inicio = time.perf_counter()
+        inicial = False
+        try:
+            with sesion.get(base + "/TV/QFMC/stream", stream=True, timeout=(10, 60)) as respuesta:
+                if respuesta.status_code >= 400:
+                    raise requests.RequestException(f"HTTP {respuesta.status_code}")
+                registro.contar_stream("conexiones")
+                registro.contar_stream("abiertos")
+                try:
+                    for linea in respuesta.iter_lines(chunk_size=1, decode_unicode=True):
+                        if not linea or not linea.startswith("event: "):
+                            continue
+                        if not inicial:
+                            inicial = True
+                            registro.agregar("/TV/QFMC/stream (inicial)", time.perf_counter() - inicio, True)
+                        else:
+                            registro.contar_stream("eventos")
+                finally:
+                    registro.contar_stream("abiertos", -1)
+        except (requests.RequestException, OSError):
+            if not inicial:
+                registro.agregar("/TV/QFMC/stream (inicial)", time.perf_counter() - inicio, False)
+        if not fin.is_set():
+            registro.contar_stream("cortes")
+            # Igual que el 'retry' que envía el servidor, más un poco de azar
+            fin.wait(rng.uniform(1, 5))
+
+
+def preparar_carpeta_trabajo() -> str:
+    """
+    Copia mysite/TVs a una carpeta temporal y se cambia a ella, para que los archivos que
+    escribe la app durante la prueba (datos de la TV, códigos) no toquen el repositorio.
+    """
+    if not os.path.isdir("mysite"):
+        sys.exit("Ejecutar desde la carpeta que contiene a mysite/ (python -m mysite.bench.carga)")
+
+    raiz = os.path.abspath(".")
+    if raiz not in sys.path:
+        sys.path.insert(0, raiz)
+
+    carpeta = tempfile.mkdtemp(prefix="cai_carga_")
+    shutil.copytree(os.path.join("mysite", "TVs"), os.path.join(carpeta, "mysite", "TVs"))
+    os.chdir(carpeta)
+    return carpeta
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga de flask_app con stubs locales.")
+    parser.add_argument("--calendarios", type=int, default=500, help="Suscriptores de calendario simulados.")
+    parser.add_argument("--tvs", type=int, default=20, help="TVs simuladas.")
+    parser.add_argument("--duracion", type=float, default=60, help="Segundos de medición.")
+    parser.add_argument("--pausa", type=float, default=2.0, help="Pausa promedio entre requests de un cliente.")
+    parser.add_argument("--eventos", type=int, default=1000, help="Eventos en la base de Notion simulada.")
+    parser.add_argument("--latencia-notion", type=float, default=0.3)
+    parser.add_argument("--prob-429", type=float, default=0.02)
+    parser.add_argument("--latencia-scannables", type=float, default=0.2)
+    parser.add_argument("--intervalo-tv", type=float, default=5,
+                        help="Segundos entre revisiones de cambios para los streams de las TVs.")
+    parser.add_argument("--fraccion-filtrados", type=float, default=0.3,
+                        help="Fracción de suscriptores con una URL filtrada.")
+    parser.add_argument("--salida", help="Archivo JSON donde guardar el reporte.")
+    args = parser.parse_args()
+
+    salida = os.path.abspath(args.salida) if args.salida else None
+    carpeta = preparar_carpeta_trabajo()
+
+    notion = iniciar(StubNotion(eventos=args.eventos, latencia=args.latencia_notion, prob_429=args.prob_429))
+    scannables = iniciar(StubScannables(latencia=args.latencia_scannables))
+    os.environ["NOTION_API_URL"] = notion.url
+    os.environ["SCANNABLES_URL"] = scannables.url
+    os.environ["NOTION_STORE_PATH"] = os.path.join(carpeta, "notion.sqlite3")
+    os.environ["TV_INTERVALO_REVISION"] = str(args.intervalo_tv)
+
+    # La configuración se lee al importar, así que flask_app se importa recién ahora
+    from mysite.flask_app import app, DIFUSOR_TV
+    from mysite.calendario import FILTROS_URL
+
+    servidor = make_server("127.0.0.1", 0, app, server_class=_ServidorHilos, handler_class=_HandlerSilencioso)
+    Thread(name="Servidor carga", target=servidor.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{servidor.server_port}"
+
+    print("Calentando cachés...")
+    requests.get(base + "/calendar/ing", timeout=300)
+
+    rng = random.Random(0)
+    registro, fin = Registro(), Event()
+    clientes = []
+    for i in range(args.calendarios):
+        if rng.random() < args.fraccion_filtrados:
+            filtros = "&".join(rng.sample(list(FILTROS_URL), rng.randint(1, 4)))
+            rutas = [("/calendar/ing/<filtros>", f"/calendar/ing/{filtros}")]
+        else:
+            rutas = [("/calendar/ing", "/calendar/ing")]
+        clientes.append(Thread(target=cliente, args=(base, rutas, args.pausa, registro, fin, i), daemon=True))
+    for i in range(args.tvs):
+        rutas = [("/TV/QFMC", "/TV/QFMC"), ("/TV/QFMC/eventos.json", "/TV/QFMC/eventos.json"),
+                 ("/TV/cancion", "/TV/cancion")]
+        clientes.append(Thread(target=cliente, args=(base, rutas, args.pausa, registro, fin, -i - 1), daemon=True))
+        clientes.append(Thread(target=cliente_stream, args=(base, registro, fin, -i - 1), daemon=True))
+
+    print(f"Simulando {args.calendarios} calendarios y {args.tvs} TVs durante {args.duracion}s...")
+    inicio = time.perf_counter()
+    for t in clientes:
+        t.start()
+    time.sleep(args.duracion)
+    fin.set()
+    # Cierra los streams abiertos desde el servidor en vez de esperar al próximo heartbeat
+    DIFUSOR_TV.detener()
+    for t in clientes:
+        t.join(timeout=130)
+    duracion = time.perf_counter() - inicio
+
+    reporte = {
+        "parametros": vars(args),
+        "rutas": registro.reporte(duracion),
+        "streams": registro.streams,
+        "notion": {"solicitudes": notion.solicitudes, "respuestas_429": notion.respuestas_429},
+        "scannables": {"solicitudes": scannables.solicitudes},
+    }
+
+    print(f"\n{'ruta':<30}{'req':>8}{'err':>6}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for ruta, r in reporte["rutas"].items():
+        print(f"{ruta:<30}{r['solicitudes']:>8}{r['errores']:>6}{r['rps']:>9.1f}"
+              f"{r['p50_ms']:>10.1f}{r['p95_ms']:>10.1f}{r['p99_ms']:>10.1f}")
+    print(f"\nSolicitudes a Notion: {notion.solicitudes} ({notion.respuestas_429} con 429). "
+          f"Solicitudes a scannables: {scannables.solicitudes}.")
+    streams = registro.streams
+    print(f"Streams de TVs: {streams['conexiones']} conexiones (máximo {streams['max_abiertos']} abiertas a la vez), "
+          f"{streams['cortes']} cortes, {streams['eventos']} eventos recibidos.")
+
+    servidor.shutdown()
+    shutil.rmtree(carpeta, ignore_errors=True)
+
+    if salida:
+        with open(salida, "w", encoding="utf-8") as f:
+            json.dump(reporte, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+import random
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from mysite.calendario import ID_AREAS, ID_PUBLICOS, ID_ORGANIZADORES
+
+# Generadores de datos sintéticos con la misma forma que las respuestas reales de Notion
+# (database query de actividades_ing) y de scannables.scdn.co, para benchmarks y pruebas
+# de carga sin depender de los servicios externos.
+
+TIPOS = [("Charla", "blue"), ("Taller", "green"), ("Feria", "orange"), ("Deporte", "red"), ("Convocatoria", "purple")]
+LUGARES = ["Patio de Ing.", "Auditorio Ruiz-Tagle", "Sala B12", "Hall Raúl Devés", "Cancha central", ""]
+PALABRAS = ("charla taller feria encuentro conversatorio innovación deporte comunidad ingeniería "
+            "estudiantes semana bienvenida concurso proyecto salud campus música cine").split()
+EMOJIS = ["🎉", "📣", "🏃", "🎤", "💡", "🌱", "🎬", "🏆"]
+
+
+def _texto(rng: random.Random, palabras: int) -> str:
+    return " ".join(rng.choice(PALABRAS) for _ in range(palabras)).capitalize()
+
+
+def _rich_text(texto: str) -> list[dict]:
+    if not texto:
+        return []
+    return [{
+        "type": "text",
+        "text": {"content": texto, "link": None},
+        "annotations": {"bold": False, "italic": False, "strikethrough": False,
+                        "underline": False, "code": False, "color": "default"},
+        "plain_text": texto,
+        "href": None
+    }]
+
+
+def _multi_select(rng: random.Random, opciones: list[str], maximo: int) -> list[dict]:
+    return [{"id": str(uuid.UUID(int=rng.getrandbits(128)))[:4], "name": nombre, "color": "default"}
+            for nombre in rng.sample(opciones, rng.randint(0, maximo))]
+
+
+def pagina_actividad(rng: random.Random, inicio: datetime) -> dict:
+    """Una página de la base de datos de actividades con todas las propiedades que se usan."""
+    todo_el_dia = rng.random() < 0.25
+    if todo_el_dia:
+        fecha = {"start": inicio.date().isoformat(),
+                 "end": (inicio.date() + timedelta(days=rng.randint(1, 3))).isoformat() if rng.random() < 0.3 else None,
+                 "time_zone": None}
+    else:
+        fin = inicio + timedelta(minutes=rng.choice([60, 90, 120])) if rng.random() < 0.7 else None
+        fecha = {"start": inicio.isoformat(timespec="milliseconds"),
+                 "end": fin.isoformat(timespec="milliseconds") if fin else None,
+                 "time_zone": None}
+
+    tipo_nombre, tipo_color = rng.choice(TIPOS)
+    editado = inicio - timedelta(days=rng.randint(1, 30), minutes=rng.randint(0, 1440))
+
+    return {
+        "object": "page",
+        "id": str(uuid.UUID(int=rng.getrandbits(128))),
+        "created_time": (editado - timedelta(days=1)).astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:00.000Z"),
+        "last_edited_time": editado.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:00.000Z"),
+        "archived": False,
+        "in_trash": False,
+        "icon": {"type": "emoji", "emoji": rng.choice(EMOJIS)} if rng.random() < 0.8 else None,
+        "cover": {"type": "external", "external": {"url": f"https://picsum.photos/seed/{rng.randint(0, 9999)}/800/600"}}
+        if rng.random() < 0.5 else None,
+        "properties": {
+            "Nombre": {"id": "title", "type": "title", "title": _rich_text(_texto(rng, rng.randint(2, 7)))},
+            "Fecha": {"id": "fch", "type": "date", "date": fecha if rng.random() < 0.97 else None},
+            "Público": {"id": "pub", "type": "checkbox", "checkbox": rng.random() < 0.85},
+            "Tipo": {"id": "tip", "type": "select",
+                     "select": {"id": "s", "name": tipo_nombre, "color": tipo_color} if rng.random() < 0.9 else None},
+            "Áreas": {"id": "are", "type": "multi_select",
+                      "multi_select": _multi_select(rng, list(ID_AREAS.values()), 3)},
+            "Público Objetivo": {"id": "pob", "type": "multi_select",
+                                 "multi_select": _multi_select(rng, list(ID_PUBLICOS.values()), 3)},
+            "Organiza": {"id": "org", "type": "multi_select",
+                         "multi_select": _multi_select(rng, list(ID_ORGANIZADORES.values()), 2)},
+            "Etiquetas": {"id": "eti", "type": "multi_select",
+                          "multi_select": _multi_select(rng, PALABRAS, 2)},
+            "Inscripciones": {"id": "ins", "type": "url",
+                              "url": f"https://forms.gle/{rng.getrandbits(40):x}" if rng.random() < 0.4 else None},
+            "Info": {"id": "inf", "type": "url",
+                     "url": f"https://www.instagram.com/p/{rng.getrandbits(40):x}" if rng.random() < 0.5 else None},
+            "Comentario": {"id": "com", "type": "rich_text",
+                           "rich_text": _rich_text(_texto(rng, rng.randint(5, 40)) if rng.random() < 0.6 else "")},
+            "Lugar": {"id": "lug", "type": "rich_text", "rich_text": _rich_text(rng.choice(LUGARES))},
+        }
+    }
+
+
+def paginas_actividades(n: int, semilla: int = 0, desde: datetime = None) -> list[dict]:
+    """`n` páginas repartidas en un año a partir de `desde`. Deterministas dada la semilla."""
+    rng = random.Random(semilla)
+    tz = timezone(timedelta(hours=-3))
+    desde = desde or datetime(2025, 3, 1, tzinfo=tz)
+    return [
+        pagina_actividad(rng, desde + timedelta(minutes=30 * rng.randint(16, 44) + 1440 * rng.randint(0, 365)))
+        for _ in range(n)
+    ]
+
+
+def respuestas_query(paginas: list[dict], page_size: int = 100) -> list[dict]:
+    """Divide las páginas en respuestas de `databases/{id}/query` con has_more/next_cursor."""
+    respuestas = []
+    for i in range(0, max(len(paginas), 1), page_size):
+        has_more = i + page_size < len(paginas)
+        respuestas.append({
+            "object": "list",
+            "results": paginas[i:i + page_size],
+            "next_cursor": paginas[i + page_size]["id"] if has_more else None,
+            "has_more": has_more,
+            "type": "page_or_database",
+            "page_or_database": {},
+        })
+    return respuestas
+
+
+def svg_scannables(semilla: int = 0, barras: int = 23, color_fondo: str = "fff8e8",
+                   color_barras: str = "000000") -> bytes:
+    """SVG con la estructura de scannables.scdn.co: fondo, logo de Spotify y barras."""
+    rng = random.Random(semilla)
+    alturas = [11.00, 18.00, 25.00, 32.00, 39.00, 46.00, 53.00, 60.00]
+    lineas = [
+        '<svg width="1000" height="250" viewBox="0 0 400 100" xmlns="http://www.w3.org/2000/svg" '
+        'xmlns:xlink="http://www.w3.org/1999/xlink">',
+        f'<rect x="0" y="0" width="400" height="100" fill="#{color_fondo}"/>',
+    ]
+    for i in range(barras):
+        alto = alturas[0] if i in (0, barras // 2, barras - 1) else rng.choice(alturas)
+        lineas.append(
+            f'<rect x="{100 + i * 12.42:.2f}" y="{50 - alto / 2:.2f}" width="6.71" height="{alto:.2f}" '
+            f'rx="3.36" ry="3.36" fill="#{color_barras}"/>')
+    lineas.append(
+        '<g transform="translate(20,20)"><path fill="#{0}" d="M30,0A30,30,0,1,1,0,30,30,30,0,0,1,30,0Z"/></g>'
+        .format(color_barras))
+    lineas.append("</svg>")
+    return "\n".join(lineas).encode("utf-8")
@@ -0,0 +1,170 @@
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Callable
+
+from mysite.bench.fixtures import paginas_actividades, svg_scannables
+from mysite.calendario import (
+    CacheFragmentos, IndiceEventos, FILTROS_URL, parsear_evento, es_evento_publico, serializar_calendario
+)
+from mysite.TVs.QFMC.Cancion_del_dia.add_svg_bar_anim import add_bar_animations, animar_svg
+
+# Micro-benchmarks de los caminos críticos: parseo de páginas de Notion, serialización
+# ICS, evaluación de filtros y animación de los Spotify Codes.
+#
+# Uso (desde la carpeta que contiene a mysite/):
+#     python -m mysite.bench.micro --salida bench.json
+#     python -m mysite.bench.micro --tamanos 100 1000 --comparar bench.json
+
+TAMANOS = [100, 1_000, 10_000, 100_000]
+
+def medir(funcion: Callable[[], object], repeticiones: int, preparar: Callable[[], None] = None) -> dict:
+    """Ejecuta `funcion` varias veces y retorna estadísticas en segundos."""
+    tiempos = []
+    for _ in range(repeticiones):
+        if preparar:
+            preparar()
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+
+    return {
+        "min": min(tiempos),
+        "mediana": statistics.median(tiempos),
+        "max": max(tiempos),
+        "repeticiones": repeticiones,
+    }
+
+
+def repeticiones_para(n: int) -> int:
+    return max(3, min(50, 100_000 // max(n, 1)))
+
+
+def bench_calendario(n: int) -> dict[str, dict]:
+    paginas = paginas_actividades(n, semilla=n)
+    publicas = [p for p in paginas if es_evento_publico(p)]
+    reps = repeticiones_para(n)
+    resultados = {}
+
+    resultados[f"parseo/{n}"] = medir(lambda: [parsear_evento(p) for p in publicas], reps)
+
+    # En frío: se formatea cada VEVENT. En caliente: sólo se unen fragmentos ya guardados.
+    fragmentos = CacheFragmentos()
+    resultados[f"ics_frio/{n}"] = medir(
+        lambda: serializar_calendario(paginas, fragmentos), reps,
+        preparar=lambda: fragmentos.retener([]))
+    serializar_calendario(paginas, fragmentos)
+    resultados[f"ics_caliente/{n}"] = medir(lambda: serializar_calendario(paginas, fragmentos), reps)
+
+    resultados[f"indice/{n}"] = medir(lambda: IndiceEventos(paginas), reps)
+
+    indice = IndiceEventos(paginas)
+    rng = random.Random(n)
+    combinaciones = [rng.sample(list(FILTROS_URL), rng.randint(1, 5)) for _ in range(200)]
+    resultados[f"filtros_200_combinaciones/{n}"] = medir(
+        lambda: [indice.filtrar(c) for c in combinaciones], max(3, reps // 5))
+
+    return resultados
+
+
+def bench_animacion(cantidad: int = 20) -> dict[str, dict]:
+    svgs = [svg_scannables(semilla=i) for i in range(cantidad)]
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        paths = [os.path.join(carpeta, f"codigo_{i}.svg") for i in range(cantidad)]
+
+        def escribir():
+            for path, svg in zip(paths, svgs):
+                with open(path, "wb") as f:
+                    f.write(svg)
+
+        resultados = {
+            f"animacion_barras/{cantidad}": medir(
+                lambda: [add_bar_animations(path) for path in paths], 10, preparar=escribir)
+        }
+
+    # Motores en memoria (que ambos produzcan la salida original se prueba en
+    # mysite/tests/test_add_svg_bar_anim.py)
+    for motor, nombre in (("etree", "etree"), ("auto", "plantilla")):
+        resultados[f"animacion_{nombre}/{cantidad}"] = medir(
+            lambda: [animar_svg(svg, motor=motor) for svg in svgs], 50)
+    resultados[f"animacion_compacta/{cantidad}"] = medir(
+        lambda: [animar_svg(svg, compacto=True) for svg in svgs], 50)
+
+    return resultados
+
+
+def commit_actual() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"],
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def comparar(actual: dict, anterior: dict, umbral: float) -> list[str]:
+    """Retorna los benchmarks cuya mediana empeoró más que `umbral` (0.1 = 10%)."""
+    regresiones = []
+    print(f"\n{'benchmark':<36}{'anterior':>12}{'actual':>12}{'cambio':>10}")
+    for nombre, res in actual["resultados"].items():
+        previo = anterior["resultados"].get(nombre)
+        if not previo:
+            continue
+        cambio = res["mediana"] / previo["mediana"] - 1
+        marca = " <-- regresión" if cambio > umbral else ""
+        print(f"{nombre:<36}{previo['mediana'] * 1000:>10.3f}ms{res['mediana'] * 1000:>10.3f}ms{cambio:>+10.1%}{marca}")
+        if cambio > umbral:
+            regresiones.append(nombre)
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmarks de calendario, filtros y Spotify Codes.")
+    parser.add_argument("--tamanos", type=int, nargs="+", default=TAMANOS, help="Cantidad de eventos.")
+    parser.add_argument("--salida", help="Archivo JSON donde guardar los resultados.")
+    parser.add_argument("--comparar", help="JSON de una corrida anterior para detectar regresiones.")
+    parser.add_argument("--umbral", type=float, default=0.10, help="Empeoramiento tolerado (0.10 = 10%%).")
+    args = parser.parse_args()
+
+    resultados = {}
+    for n in args.tamanos:
+        print(f"Calendario con {n} eventos...")
+        resultados.update(bench_calendario(n))
+    print("Animación de barras...")
+    resultados.update(bench_animacion())
+
+    reporte = {
+        "meta": {
+            "fecha": datetime.now().isoformat(timespec="seconds"),
+            "commit": commit_actual(),
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+        },
+        "resultados": resultados,
+    }
+
+    for nombre, res in resultados.items():
+        print(f"{nombre:<36}mediana {res['mediana'] * 1000:10.3f} ms  (min {res['min'] * 1000:.3f} ms)")
+
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump(reporte, f, ensure_ascii=False, indent=2)
+        print(f"Resultados guardados en {args.salida}")
+
+    if args.comparar:
+        with open(args.comparar, "r", encoding="utf-8") as f:
+            anterior = json.load(f)
+        if comparar(reporte, anterior, args.umbral):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
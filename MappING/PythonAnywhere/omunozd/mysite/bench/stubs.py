@@ -0,0 +1,131 @@
+import json
+import random
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread, Lock
+
+from mysite.bench.fixtures import paginas_actividades, svg_scannables
+
+# Servidores locales que imitan a la API de Notion (databases/{id}/query) y a
+# scannables.scdn.co, para pruebas de carga sin tocar los servicios reales.
+
+
+class _Manejador(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def responder(self, status: int, cuerpo: bytes, content_type: str, headers: dict = None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(cuerpo)))
+        for nombre, valor in (headers or {}).items():
+            self.send_header(nombre, valor)
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+
+class StubNotion(ThreadingHTTPServer):
+    """
+    API de Notion simulada. Responde `POST /v1/databases/<id>/query` con páginas
+    sintéticas, paginando con `has_more`/`next_cursor`, y aplica el filtro
+    `last_edited_time.on_or_after` que usa la sincronización incremental.
+
+    :param latencia: Segundos de demora por respuesta.
+    :param prob_429: Probabilidad de responder 429 con `Retry-After`.
+    """
+    daemon_threads = True
+
+    def __init__(self, eventos: int = 1000, latencia: float = 0.3, prob_429: float = 0.0,
+                 retry_after: float = 1.0, puerto: int = 0):
+        self.paginas = paginas_actividades(eventos)
+        self.latencia = latencia
+        self.prob_429 = prob_429
+        self.retry_after = retry_after
+        self.solicitudes = 0
+        self.respuestas_429 = 0
+        self._lock = Lock()
+        self._rng = random.Random(0)
+        super().__init__(("127.0.0.1", puerto), self._Manejador)
+
+    class _Manejador(_Manejador):
+        def do_POST(self):
+            servidor: StubNotion = self.server
+            largo = int(self.headers.get("Content-Length") or 0)
+            payload = json.loads(self.rfile.read(largo) or b"{}")
+
+            with servidor._lock:
+                servidor.solicitudes += 1
+                limitar = servidor._rng.random() < servidor.prob_429
+                if limitar:
+                    servidor.respuestas_429 += 1
+
+            time.sleep(servidor.latencia)
+
+            if limitar:
+                self.responder(429, b'{"object":"error","code":"rate_limited"}', "application/json",
+                               {"Retry-After": str(servidor.retry_after)})
+                return
+            if "/databases/" not in self.path or not self.path.split("?")[0].endswith("/query"):
+                self.responder(404, b'{"object":"error","code":"object_not_found"}', "application/json")
+                return
+
+            paginas = servidor.paginas
+            desde = payload.get("filter", {}).get("last_edited_time", {}).get("on_or_after")
+            if desde:
+                paginas = [p for p in paginas if p["last_edited_time"] >= desde]
+
+            page_size = min(int(payload.get("page_size", 100)), 100)
+            inicio = 0
+            if payload.get("start_cursor"):
+                inicio = next((i for i, p in enumerate(paginas) if p["id"] == payload["start_cursor"]), len(paginas))
+            has_more = inicio + page_size < len(paginas)
+
+            cuerpo = json.dumps({
+                "object": "list",
+                "results": paginas[inicio:inicio + page_size],
+                "next_cursor": paginas[inicio + page_size]["id"] if has_more else None,
+                "has_more": has_more,
+                "type": "page_or_database",
+                "page_or_database": {},
+            }, ensure_ascii=False).encode("utf-8")
+            self.responder(200, cuerpo, "application/json")
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_port}/v1"
+
+
+class StubScannables(ThreadingHTTPServer):
+    """scannables.scdn.co simulado: `GET /uri/plain/svg/<fondo>/<barras>/<ancho>/<uri>`."""
+    daemon_threads = True
+
+    def __init__(self, latencia: float = 0.2, puerto: int = 0):
+        self.latencia = latencia
+        self.solicitudes = 0
+        super().__init__(("127.0.0.1", puerto), self._Manejador)
+
+    class _Manejador(_Manejador):
+        def do_GET(self):
+            servidor: StubScannables = self.server
+            servidor.solicitudes += 1
+            time.sleep(servidor.latencia)
+
+            partes = self.path.split("/")
+            if len(partes) < 8 or partes[3] != "svg":
+                self.responder(404, b"Not found", "text/plain")
+                return
+            color_barras = "ffffff" if partes[5] == "white" else "000000"
+            svg = svg_scannables(semilla=zlib.crc32(partes[7].encode()) % 1000, color_fondo=partes[4], color_barras=color_barras)
+            self.responder(200, svg, "image/svg+xml")
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_port}/uri/plain/"
+
+
+def iniciar(servidor: ThreadingHTTPServer) -> ThreadingHTTPServer:
+    Thread(name=f"Stub {servidor.__class__.__name__}", target=servidor.serve_forever, daemon=True).start()
+    return servidor
@@ -0,0 +1,154 @@
+import json
+import time
+import traceback
+from contextlib import nullcontext
+from threading import Thread, Lock, Event
+from typing import Any, Callable, ContextManager
+
+from mysite.utils import printt
+
+
+def clave_canonica(payload: dict, ignorar: tuple = ("page_size", "start_cursor")) -> str:
+    """
+    Serializa un payload de forma determinista para usarlo como llave de caché.
+    Se ignoran los parámetros de paginación, que no cambian el resultado de la consulta.
+    """
+    limpio = {k: v for k, v in payload.items() if k not in ignorar}
+    return json.dumps(limpio, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+
+
+class _Entrada:
+    __slots__ = ("valor", "creado", "refrescando", "listo", "error")
+
+    def __init__(self):
+        self.valor = None
+        self.creado = 0.0
+        self.refrescando = False
+        self.listo = Event()
+        self.error = None
+
+
+class CacheTTL:
+    """
+    Caché en memoria con TTL y stale-while-revalidate.
+
+    Mientras una entrada está fresca se retorna directamente. Cuando vence, se retorna
+    el valor anterior y se lanza un único Thread que la refresca. Sólo la primera
+    consulta de una llave (o una que superó `max_obsoleto`) espera a la carga, y si
+    varias llegan a la vez, todas esperan la misma carga.
+
+    `contexto_fondo` permite envolver los refrescos en segundo plano (por ejemplo, para
+    bajarles la prioridad frente a Notion).
+    """
+
+    def __init__(self, ttl: float, max_obsoleto: float = 0, nombre: str = "cache",
+                 contexto_fondo: Callable[[], ContextManager] = None):
+        self.ttl = ttl
+        self.max_obsoleto = max_obsoleto
+        self.nombre = nombre
+        self.contexto_fondo = contexto_fondo or nullcontext
+        self._entradas: dict[str, _Entrada] = {}
+        self._lock = Lock()
+
+    def obtener(self, clave: str, cargar: Callable[[], Any]) -> Any:
+        """
+        Retorna el valor de `clave`, llamando a `cargar()` si no existe o está vencido.
+        """
+        ahora = time.monotonic()
+
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is None:
+                entrada = self._entradas[clave] = _Entrada()
+                entrada.refrescando = True
+                cargar_aqui = True
+            else:
+                cargar_aqui = False
+
+        if cargar_aqui:
+            self._cargar(clave, entrada, cargar)
+
+        entrada.listo.wait()
+        if entrada.creado == 0.0:
+            # La primera carga falló, no hay nada que servir
+            with self._lock:
+                if self._entradas.get(clave) is entrada:
+                    del self._entradas[clave]
+            raise entrada.error
+
+        edad = ahora - entrada.creado
+        if edad < self.ttl:
+            return entrada.valor
+
+        with self._lock:
+            lanzar = not entrada.refrescando
+            entrada.refrescando = True
+
+        if lanzar and self.max_obsoleto and edad > self.ttl + self.max_obsoleto:
+            # Demasiado viejo para servirlo: se refresca de forma bloqueante
+            self._cargar(clave, entrada, cargar)
+            if entrada.error is not None:
+                raise entrada.error
+        elif lanzar:
+            Thread(
+                name=f"Refresco {self.nombre}",
+                target=self._refrescar_en_fondo,
+                args=(clave, entrada, cargar),
+                daemon=True
+            ).start()
+
+        return entrada.valor
+
+    def _refrescar_en_fondo(self, clave: str, entrada: _Entrada, cargar: Callable[[], Any]):
+        with self.contexto_fondo():
+            self._cargar(clave, entrada, cargar)
+
+    def _producir(self, clave: str, cargar: Callable[[], Any]) -> tuple[Any, float]:
+        """Retorna (valor nuevo de `clave`, segundos de antigüedad del valor)."""
+        return cargar(), 0.0
+
+    def _cargar(self, clave: str, entrada: _Entrada, cargar: Callable[[], Any]):
+        try:
+            valor, antiguedad = self._producir(clave, cargar)
+        except Exception as e:
+            traceback.print_exc()
+            printt(f"Error refrescando '{self.nombre}' ({clave[:80]}): {e}")
+            entrada.error = e
+        else:
+            entrada.valor = valor
+            entrada.creado = time.monotonic() - antiguedad
+            entrada.error = None
+        finally:
+            with self._lock:
+                entrada.refrescando = False
+            entrada.listo.set()
+
+    def refrescar(self, clave: str, cargar: Callable[[], Any]):
+        """
+        Vuelve a cargar `clave` ahora, aunque no haya vencido (para refrescos programados).
+        Mientras tanto se sigue sirviendo el valor anterior. No hace nada si ya se está
+        recargando, y relanza el error si la carga falla.
+        """
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is not None:
+                if entrada.refrescando:
+                    return
+                entrada.refrescando = True
+
+        if entrada is None:
+            self.obtener(clave, cargar)
+            return
+
+        with self.contexto_fondo():
+            self._cargar(clave, entrada, cargar)
+        if entrada.error is not None:
+            raise entrada.error
+
+    def invalidar(self, clave: str = None):
+        """Elimina una llave, o todas si no se especifica."""
+        with self._lock:
+            if clave is None:
+                self._entradas.clear()
+            else:
+                self._entradas.pop(clave, None)
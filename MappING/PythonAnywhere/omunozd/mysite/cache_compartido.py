@@ -0,0 +1,164 @@
+import os
+import socket
+import sqlite3
+import time
+from contextlib import closing
+from typing import Any, Callable, ContextManager
+
+from mysite.cache import CacheTTL
+from mysite.utils import printt
+
+
+class AlmacenCompartido:
+    """
+    Valores serializados por llave en un archivo SQLite que comparten todos los procesos
+    de una máquina, más bloqueos con vencimiento para que sólo uno a la vez regenere cada
+    llave. Si el proceso que tiene un bloqueo muere, el bloqueo vence solo.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        with closing(self._conectar()) as con, con:
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("""
+                CREATE TABLE IF NOT EXISTS valores (
+                    clave TEXT PRIMARY KEY,
+                    version INTEGER NOT NULL,
+                    creado REAL NOT NULL,
+                    datos BLOB NOT NULL
+                )""")
+            con.execute("""
+                CREATE TABLE IF NOT EXISTS bloqueos (
+                    clave TEXT PRIMARY KEY,
+                    dueno TEXT NOT NULL,
+                    vence REAL NOT NULL
+                )""")
+
+    def _conectar(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    def version(self, clave: str) -> tuple[int, float] | None:
+        """Retorna (versión, timestamp de creación) de la llave, sin leer los datos."""
+        with closing(self._conectar()) as con:
+            return con.execute("SELECT version, creado FROM valores WHERE clave = ?", (clave,)).fetchone()
+
+    def leer(self, clave: str) -> tuple[int, float, bytes] | None:
+        with closing(self._conectar()) as con:
+            return con.execute("SELECT version, creado, datos FROM valores WHERE clave = ?", (clave,)).fetchone()
+
+    def guardar(self, clave: str, datos: bytes, creado: float) -> int:
+        """Guarda una nueva versión de la llave y retorna su número."""
+        with closing(self._conectar()) as con, con:
+            con.execute(
+                "INSERT INTO valores (clave, version, creado, datos) VALUES (?, 1, ?, ?) "
+                "ON CONFLICT(clave) DO UPDATE SET version = version + 1, creado = excluded.creado, "
+                "datos = excluded.datos",
+                (clave, creado, datos)
+            )
+            return con.execute("SELECT version FROM valores WHERE clave = ?", (clave,)).fetchone()[0]
+
+    def bloquear(self, clave: str, dueno: str, duracion: float) -> bool:
+        """Toma el bloqueo de la llave por `duracion` segundos si está libre o vencido."""
+        ahora = time.time()
+        with closing(self._conectar()) as con, con:
+            con.execute("DELETE FROM bloqueos WHERE vence < ?", (ahora,))
+            cursor = con.execute(
+                "INSERT INTO bloqueos (clave, dueno, vence) VALUES (?, ?, ?) "
+                "ON CONFLICT(clave) DO UPDATE SET dueno = excluded.dueno, vence = excluded.vence "
+                "WHERE bloqueos.vence < ? OR bloqueos.dueno = excluded.dueno",
+                (clave, dueno, ahora + duracion, ahora)
+            )
+            return cursor.rowcount == 1
+
+    def liberar(self, clave: str, dueno: str):
+        with closing(self._conectar()) as con, con:
+            con.execute("DELETE FROM bloqueos WHERE clave = ? AND dueno = ?", (clave, dueno))
+
+
+class CacheCompartido(CacheTTL):
+    """
+    CacheTTL cuyos valores se comparten entre los procesos de una máquina (ver
+    mysite/servidor.py) a través de un AlmacenCompartido.
+
+    Cada proceso mantiene su copia deserializada en memoria y sigue las mismas reglas de
+    TTL y stale-while-revalidate, pero contadas desde que el valor se generó en cualquier
+    proceso. Al vencer, sólo el proceso que toma el bloqueo llama a `cargar()` y guarda
+    el resultado con `serializar(valor)`; los demás esperan esa versión y la leen con
+    `deserializar(datos)`.
+    """
+
+    def __init__(self, path: str, ttl: float, max_obsoleto: float = 0, nombre: str = "cache",
+                 contexto_fondo: Callable[[], ContextManager] = None,
+                 serializar: Callable[[Any], bytes] = None,
+                 deserializar: Callable[[bytes], Any] = None,
+                 duracion_bloqueo: float = 120,
+                 espera_sondeo: float = 0.2):
+        super().__init__(ttl, max_obsoleto, nombre, contexto_fondo)
+        self.almacen = AlmacenCompartido(path)
+        self.serializar = serializar
+        self.deserializar = deserializar
+        self.duracion_bloqueo = duracion_bloqueo
+        self.espera_sondeo = espera_sondeo
+        self.cargas = 0
+        self.lecturas = 0
+
+    @property
+    def dueno(self) -> str:
+        # Se calcula cada vez: los procesos creados con fork heredan este objeto
+        return f"{socket.gethostname()}:{os.getpid()}"
+
+    def _producir(self, clave: str, cargar: Callable[[], Any]) -> tuple[Any, float]:
+        limite = time.monotonic() + self.duracion_bloqueo
+        while True:
+            fila = self.almacen.version(clave)
+            if fila is not None and time.time() - fila[1] < self.ttl:
+                # Otro proceso ya lo regeneró
+                return self._leer(clave)
+
+            if self.almacen.bloquear(clave, self.dueno, self.duracion_bloqueo):
+                try:
+                    return self._regenerar(clave, cargar)
+                finally:
+                    self.almacen.liberar(clave, self.dueno)
+
+            if fila is not None and self._sin_valor(clave) and self._servible(fila[1]):
+                # Proceso recién iniciado: sirve el valor anterior mientras el otro termina
+                return self._leer(clave)
+
+            if time.monotonic() > limite:
+                # El proceso que tiene el bloqueo no terminó a tiempo; se genera aquí sin guardarlo
+                printt(f"'{self.nombre}': se agotó la espera por otro proceso, se carga localmente")
+                return cargar(), 0.0
+
+            version = fila[0] if fila else None
+            time.sleep(self.espera_sondeo)
+            fila = self.almacen.version(clave)
+            if fila is not None and fila[0] != version:
+                return self._leer(clave)
+
+    def _sin_valor(self, clave: str) -> bool:
+        entrada = self._entradas.get(clave)
+        return entrada is None or entrada.creado == 0.0
+
+    def _servible(self, creado: float) -> bool:
+        return not self.max_obsoleto or time.time() - creado <= self.ttl + self.max_obsoleto
+
+    def _regenerar(self, clave: str, cargar: Callable[[], Any]) -> tuple[Any, float]:
+        # Al tomar el bloqueo puede que otro proceso haya terminado justo antes
+        fila = self.almacen.version(clave)
+        if fila is not None and time.time() - fila[1] < self.ttl:
+            return self._leer(clave)
+
+        creado = time.time()
+        valor = cargar()
+        self.almacen.guardar(clave, self.serializar(valor), creado)
+        self.cargas += 1
+        return valor, time.time() - creado
+
+    def _leer(self, clave: str) -> tuple[Any, float]:
+        version, creado, datos = self.almacen.leer(clave)
+        self.lecturas += 1
+        return self.deserializar(datos), max(0.0, time.time() - creado)
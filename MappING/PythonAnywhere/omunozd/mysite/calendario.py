@@ -0,0 +1,263 @@
+from datetime import date, datetime, timedelta
+from threading import Lock
+from typing import Callable
+
+from mysite.artefactos import Artefacto
+from mysite.ics_rapido import EventoCalendario, encabezado, serializar_vevent, PIE
+
+# Códigos que se pueden usar en /calendar/ing/<filtros_str>, separados por '&'
+
+ID_AREAS = {
+    "INN": "Innovación",
+    "VID": "Vida Universitaria",
+    "SB": "Salud y Bienestar",
+    "IIEE": "IIEE",
+    "RP": "Rol Púlbico",
+    "DOC": "Docencia",
+    "DIS": "Disidencias",
+    "COM": "Comunidad",
+    "SUS": "Sustentabilidad",
+    "FEM": "Feminismo",
+    "INV": "Investigación y Postgrado",
+    "COM": "Comunicaciones",
+    "ACA": "Académico",
+    "UP": "Utilidad Pública",
+    "DEP": "Deportes"
+}
+
+ID_PUBLICOS = {
+    "PRE": "Pregrado",
+    "POST": "Postgrado",
+
+    "GRA": "Gratuidad",
+    "TEI": "Talento e Inclusión",
+    "NACE": "NACE",
+
+    "MUJ": "Mujeres",
+    "DEPTA": "Deportista",
+    "INI": "Iniciativa",
+
+    "BIO": "Major Biológica",
+    "CIV": "Major Civil",
+    "ELE": "Major Eléctrica",
+    "MEC": "Major Mecánica",
+    "AMB": "Major Ambiental",
+    "MIN": "Major Minería",
+    "CON": "Major Construcción",
+    "ARQ": "Major Arquitectura",
+    "MED": "Major Biomed",
+    "TRA": "Major Transporte"
+}
+
+ID_ORGANIZADORES = {
+    "CAI": "CAi",
+    "ESC": "Escuela",
+    "ODOC": "ODOC",
+    "TUT": "Tutores",
+    "GOING": "GOing",
+    "PAS": "Pastoral",
+    "MJL": "Major League",
+    "CA": "CA",
+    "CAP": "CAP",
+    "UC": "UC",
+    "DII": "DII",
+    "UNT": "UNITE",
+    "DCDI": "DCDI",
+    "RAIZ": "La Raíz",
+    "REH": "Reintegrando Humedales",
+    "CERRNN": "Centro de Estudiantes de Recursos Naturales",
+    "PDI": "Plan Deportivo",
+    "CET": "Capítulo de Transporte",
+    "ITA": "Itaú",
+    "BCH": "Banco de Chile",
+    "BCI": "BCI"
+}
+
+# Código de filtro -> (propiedad multi_select de Notion, opción)
+FILTROS_URL = {
+    **{key: ("Áreas", nombre) for key, nombre in ID_AREAS.items()},
+    **{key: ("Público Objetivo", nombre) for key, nombre in ID_PUBLICOS.items()},
+    **{key: ("Organiza", nombre) for key, nombre in ID_ORGANIZADORES.items()},
+}
+
+
+def es_evento_publico(n: dict) -> bool:
+    return bool(n["properties"]["Fecha"]["date"] and n["properties"]["Público"]["checkbox"])
+
+
+def eventos_de_la_semana(paginas: list[dict], hoy: date = None) -> list[dict]:
+    """
+    Equivalente local al filtro `this_week` de Notion (semana de lunes a domingo),
+    ordenado por fecha de inicio.
+    """
+    hoy = hoy or date.today()
+    lunes = hoy - timedelta(days=hoy.weekday())
+    desde, hasta = lunes.isoformat(), (lunes + timedelta(days=7)).isoformat()
+
+    return sorted(
+        (n for n in paginas
+         if n["properties"]["Fecha"]["date"] and desde <= n["properties"]["Fecha"]["date"]["start"][:10] < hasta),
+        key=lambda n: n["properties"]["Fecha"]["date"]["start"]
+    )
+
+
+def ultima_edicion(paginas: list[dict]) -> float | None:
+    """Timestamp del `last_edited_time` más reciente entre las páginas (None si no hay)."""
+    ediciones = [n["last_edited_time"] for n in paginas if n.get("last_edited_time")]
+    if not ediciones:
+        return None
+    return datetime.fromisoformat(max(ediciones).replace("Z", "+00:00")).timestamp()
+
+
+class IndiceEventos:
+    """
+    Conjunto completo de eventos públicos más un índice invertido código de filtro -> eventos.
+
+    Cada refresco desde Notion crea un índice nuevo, así que los calendarios filtrados (y
+    demás derivados) que se guardan en él nunca quedan desactualizados: se descartan junto
+    con el índice.
+    """
+
+    def __init__(self, paginas: list[dict]):
+        self.todas = paginas
+        self.paginas = [n for n in paginas if es_evento_publico(n)]
+
+        por_opcion: dict[tuple[str, str], list[str]] = {}
+        for key, propiedad_opcion in FILTROS_URL.items():
+            por_opcion.setdefault(propiedad_opcion, []).append(key)
+
+        self.por_filtro: dict[str, set[int]] = {key: set() for key in FILTROS_URL}
+        for i, n in enumerate(self.paginas):
+            for propiedad in ("Áreas", "Público Objetivo", "Organiza"):
+                for opcion in n["properties"][propiedad]["multi_select"]:
+                    for key in por_opcion.get((propiedad, opcion["name"]), ()):
+                        self.por_filtro[key].add(i)
+
+        # Last-Modified de todo lo que se sirve desde este índice
+        self.modificado = ultima_edicion(paginas)
+
+        self._derivados: dict[str, Artefacto] = {}
+        self._lock = Lock()
+
+    @staticmethod
+    def clave_filtros(ids_filtros: list[str]) -> str:
+        """Llave canónica: 'INN&DEP' y 'DEP&INN' comparten resultado."""
+        return "&".join(sorted(set(ids_filtros)))
+
+    def filtrar(self, ids_filtros: list[str]) -> list[dict]:
+        """Eventos que cumplen con al menos uno de los filtros (equivalente al 'or' de Notion)."""
+        seleccion = set().union(*(self.por_filtro[key] for key in ids_filtros))
+        return [self.paginas[i] for i in sorted(seleccion)]
+
+    def derivado(self, clave: str, crear: Callable[[], Artefacto]) -> Artefacto:
+        """
+        Retorna el artefacto `clave` calculado a partir de este índice, generándolo con
+        `crear()` sólo la primera vez.
+        """
+        artefacto = self._derivados.get(clave)
+        if artefacto is None:
+            with self._lock:
+                artefacto = self._derivados.get(clave)
+                if artefacto is None:
+                    artefacto = self._derivados[clave] = crear()
+        return artefacto
+
+    def calendario_filtrado(self, ids_filtros: list[str], crear) -> Artefacto:
+        """
+        Retorna el calendario de la combinación de filtros, generándolo con
+        `crear(clave, paginas)` sólo la primera vez.
+        """
+        clave = self.clave_filtros(ids_filtros)
+        return self.derivado(clave, lambda: crear(clave, self.filtrar(clave.split("&"))))
+
+
+NOMBRE_CALENDARIO = "Actividades en Ingeniería UC | CAi💛"
+
+
+def parsear_evento(n: dict) -> EventoCalendario:
+    """
+    Extrae de una página de Notion los datos que se escriben en el calendario.
+    """
+    props = n["properties"]
+    fecha = props["Fecha"]["date"]
+
+    icon = n["icon"][n["icon"]["type"]] + " " if n["icon"] else ""
+    name = props["Nombre"]["title"][0]["text"]["content"] if props["Nombre"] and len(
+        props["Nombre"]["title"]) > 0 else ""
+
+    areas = [x["name"] for x in props["Áreas"]["multi_select"]]
+    inscripciones = props["Inscripciones"]["url"] if props["Inscripciones"]["url"] else ""
+    link_info = props["Info"]["url"] if props["Info"]["url"] else ""
+    organizadores = [x["name"] for x in props["Organiza"]["multi_select"]]
+    targets = [x["name"] for x in props["Público Objetivo"]["multi_select"]]
+    comentario = props["Comentario"]["rich_text"][0]["plain_text"] if props["Comentario"]["rich_text"] else ""
+    lugar = props["Lugar"]["rich_text"][0]["plain_text"] if props["Lugar"]["rich_text"] else ""
+
+    lineas_desc = [
+        f"{comentario}\n"
+        f"Inscripciones: {inscripciones}" if inscripciones else "",
+        f"Más información: {link_info}" if link_info else "",
+        "Organizan: " + ", ".join(organizadores),
+        "Público objetivo: " + ", ".join(targets),
+        "Áreas de Interés: " + ", ".join(areas)
+    ]
+
+    return EventoCalendario(
+        uid=f"{n['id']}@cai.ing.puc.cl",
+        editado=n.get("last_edited_time", ""),
+        inicio=fecha["start"],
+        fin=fecha["end"],
+        zona_horaria=fecha.get("time_zone"),
+        nombre=icon + name,
+        tipo=props["Tipo"]["select"]["name"] if props["Tipo"]["select"] else "",
+        lugar=lugar,
+        categorias=tuple(areas),
+        descripcion="\n".join(x for x in lineas_desc if x != "")
+    )
+
+
+class CacheFragmentos:
+    """
+    Bloques VEVENT ya serializados (y codificados) por (id de página, last_edited_time).
+
+    Una página se formatea una sola vez mientras no se edite, sin importar en cuántos
+    calendarios (completo y filtrados) aparezca ni cuántas veces se reconstruyan.
+    """
+
+    def __init__(self):
+        self._fragmentos: dict[tuple[str, str], tuple[tuple[str, str], bytes]] = {}
+        self.generados = 0
+
+    def obtener(self, n: dict) -> tuple[tuple[str, str], bytes]:
+        """Retorna (llave de orden, VEVENT en bytes) de la página `n`."""
+        clave = (n["id"], n.get("last_edited_time", ""))
+        fragmento = self._fragmentos.get(clave)
+        if fragmento is None:
+            evento = parsear_evento(n)
+            fragmento = ((evento.inicio, evento.uid), serializar_vevent(evento).encode("utf-8"))
+            self._fragmentos[clave] = fragmento
+            self.generados += 1
+        return fragmento
+
+    def retener(self, paginas: list[dict]):
+        """Descarta los fragmentos de páginas editadas o eliminadas."""
+        vigentes = {(n["id"], n.get("last_edited_time", "")) for n in paginas}
+        for clave in list(self._fragmentos):
+            if clave not in vigentes:
+                self._fragmentos.pop(clave, None)
+
+
+FRAGMENTOS = CacheFragmentos()
+
+_ENCABEZADO = encabezado(NOMBRE_CALENDARIO).encode("utf-8")
+_PIE = PIE.encode("utf-8")
+
+
+def serializar_calendario(data: list[dict], fragmentos: CacheFragmentos = FRAGMENTOS) -> bytes:
+    """
+    Construye el calendario a partir de las páginas de Notion y lo retorna ya codificado,
+    uniendo los VEVENT guardados en `fragmentos`. Los eventos se ordenan por inicio para
+    que la salida sea determinista.
+    """
+    partes = sorted(fragmentos.obtener(n) for n in data if es_evento_publico(n))
+    return _ENCABEZADO + b"".join(vevent for _, vevent in partes) + _PIE
@@ -0,0 +1,94 @@
+import os
+
+# Segundos que una consulta a Notion se considera fresca. Pasado ese tiempo se sigue
+# sirviendo el valor anterior mientras se refresca en segundo plano.
+NOTION_CACHE_TTL = float(os.environ.get("NOTION_CACHE_TTL", 300))
+
+# Segundos máximos que se acepta servir un valor obsoleto. Si se supera, la consulta
+# se hace de forma bloqueante. 0 significa sin límite.
+NOTION_CACHE_MAX_OBSOLETO = float(os.environ.get("NOTION_CACHE_MAX_OBSOLETO", 86400))
+
+# Archivo SQLite para compartir los eventos de Notion y calendar.ics entre los procesos
+# del servidor (ver mysite/servidor.py), así sólo uno consulta a Notion al vencer el TTL.
+# Vacío para mantener el caché en la memoria de cada proceso.
+NOTION_CACHE_COMPARTIDO = os.environ.get("NOTION_CACHE_COMPARTIDO", "")
+
+# Carpeta donde dejar una copia en disco de los calendarios generados. Vacío para no
+# escribir nada (los calendarios se sirven siempre desde memoria).
+CALENDAR_SNAPSHOT_DIR = os.environ.get("CALENDAR_SNAPSHOT_DIR", "")
+
+# Solicitudes por segundo permitidas hacia Notion (compartidas por todo el proceso) y
+# cuántas veces reintentar una solicitud que recibe 429.
+NOTION_RPS = float(os.environ.get("NOTION_RPS", 3))
+NOTION_MAX_REINTENTOS_429 = int(os.environ.get("NOTION_MAX_REINTENTOS_429", 5))
+
+# Cliente HTTP compartido: timeouts (segundos), reintentos ante errores de red o 5xx y
+# conexiones keep-alive por host.
+HTTP_TIMEOUT_CONEXION = float(os.environ.get("HTTP_TIMEOUT_CONEXION", 5))
+HTTP_TIMEOUT_LECTURA = float(os.environ.get("HTTP_TIMEOUT_LECTURA", 30))
+HTTP_REINTENTOS = int(os.environ.get("HTTP_REINTENTOS", 3))
+HTTP_POOL = int(os.environ.get("HTTP_POOL", 10))
+
+# Copia local de las bases de datos de Notion (sincronización incremental) y cada cuántos
+# segundos revisar si se borraron páginas.
+NOTION_STORE_PATH = os.environ.get("NOTION_STORE_PATH", os.path.join("mysite", "data", "notion.sqlite3"))
+NOTION_INTERVALO_RECONCILIACION = float(os.environ.get("NOTION_INTERVALO_RECONCILIACION", 3600))
+
+# URLs base de los servicios externos. Se pueden apuntar a servidores locales (ver
+# mysite/bench/carga.py) para pruebas de carga.
+NOTION_API_URL = os.environ.get("NOTION_API_URL", "https://api.notion.com/v1")
+SCANNABLES_URL = os.environ.get("SCANNABLES_URL", "https://scannables.scdn.co/uri/plain/")
+
+# Cada cuántos segundos revisar si cambiaron los datos de las TVs mientras haya alguna
+# conectada a /TV/QFMC/stream.
+TV_INTERVALO_REVISION = float(os.environ.get("TV_INTERVALO_REVISION", 30))
+
+# Máximo de TVs conectadas a la vez a /TV/QFMC/stream en cada proceso. Cada stream ocupa
+# un Thread del servidor mientras dura; las TVs que sobran reciben 503 y consultan
+# eventos.json cada cierto tiempo (ver web/backend/script.js).
+TV_MAX_STREAMS = int(os.environ.get("TV_MAX_STREAMS", 24))
+
+# Zona horaria de las TVs: define qué eventos ya pasaron y cuándo cambia la semana en
+# eventos.json, sin depender de la zona horaria del servidor.
+TV_ZONA_HORARIA = os.environ.get("TV_ZONA_HORARIA", "America/Santiago")
+
+# Caché de Spotify Codes ya generados y animados, direccionado por sus parámetros. Los
+# archivos fechados de spotify_codes son enlaces a estas entradas.
+SPOTIFY_CACHE_DIR = os.environ.get("SPOTIFY_CACHE_DIR", os.path.join("mysite", "data", "spotify_codes"))
+SPOTIFY_CACHE_MAX_MB = float(os.environ.get("SPOTIFY_CACHE_MAX_MB", 50))
+
+# Importación de la programación de la Canción del Día: cuántos códigos generar a la vez
+# y solicitudes por segundo hacia scannables.scdn.co.
+SPOTIFY_CONCURRENCIA = int(os.environ.get("SPOTIFY_CONCURRENCIA", 4))
+SCANNABLES_RPS = float(os.environ.get("SCANNABLES_RPS", 5))
+
+# Animación de los Spotify Codes en modo compacto (ver add_svg_bar_anim.animar_svg): un
+# @keyframes por altura de barra en vez de uno por barra, SVGs más livianos. Cambia los
+# bytes de los códigos generados (se ven igual, con alturas redondeadas a 1 px), así que
+# está desactivado por defecto. SPOTIFY_ANIMACION_COMPACTA=1 lo activa.
+SPOTIFY_ANIMACION_COMPACTA = os.environ.get("SPOTIFY_ANIMACION_COMPACTA", "0") == "1"
+
+# Días tras los cuales se regenera default.svg (en segundo plano, al arrancar).
+SPOTIFY_DEFAULT_MAX_DIAS = float(os.environ.get("SPOTIFY_DEFAULT_MAX_DIAS", 30))
+
+# Servidor propio (python -m mysite.servidor): dirección, Threads por proceso (por
+# defecto, los streams de las TVs más 16 para el resto de las solicitudes), procesos,
+# conexiones en espera por proceso antes de responder 503, segundos para terminar las
+# solicitudes en curso al apagarse y segundos de inactividad antes de cortar una conexión.
+SERVIDOR_HOST = os.environ.get("SERVIDOR_HOST", "localhost")
+SERVIDOR_PUERTO = int(os.environ.get("SERVIDOR_PUERTO", 4160))
+SERVIDOR_HILOS = int(os.environ.get("SERVIDOR_HILOS", TV_MAX_STREAMS + 16))
+SERVIDOR_PROCESOS = int(os.environ.get("SERVIDOR_PROCESOS", 1))
+SERVIDOR_COLA = int(os.environ.get("SERVIDOR_COLA", 64))
+SERVIDOR_TIEMPO_APAGADO = float(os.environ.get("SERVIDOR_TIEMPO_APAGADO", 30))
+SERVIDOR_TIMEOUT_SOCKET = float(os.environ.get("SERVIDOR_TIMEOUT_SOCKET", 60))
+
+# Tareas programadas (mysite/planificador.py): refresco de los eventos de Notion y de los
+# datos de las TVs (segundos) y hora diaria de importación de los Spotify Codes, antes del
+# cambio de día. PLANIFICADOR_BLOQUEOS es el SQLite donde los procesos se reparten las
+# tareas que deben correr una sola vez. PLANIFICADOR_ACTIVO=0 lo desactiva.
+PLANIFICADOR_ACTIVO = os.environ.get("PLANIFICADOR_ACTIVO", "1") == "1"
+PLANIFICADOR_CALENDARIO_CADA = float(os.environ.get("PLANIFICADOR_CALENDARIO_CADA", 300))
+PLANIFICADOR_TV_CADA = float(os.environ.get("PLANIFICADOR_TV_CADA", 60))
+PLANIFICADOR_CODIGOS_A_LAS = os.environ.get("PLANIFICADOR_CODIGOS_A_LAS", "23:40")
+PLANIFICADOR_BLOQUEOS = os.environ.get("PLANIFICADOR_BLOQUEOS", os.path.join("mysite", "data", "planificador.sqlite3"))
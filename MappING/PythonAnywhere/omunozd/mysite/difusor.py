@@ -0,0 +1,177 @@
+import json
+import queue
+import traceback
+from threading import Thread, Lock, Event
+from typing import Callable, Iterator
+
+from mysite.utils import printt
+
+
+def formato_sse(evento: str, datos: dict) -> str:
+    """Mensaje con el formato de Server-Sent Events."""
+    return f"event: {evento}\ndata: {json.dumps(datos, ensure_ascii=False, separators=(',', ':'))}\n\n"
+
+
+class Difusor:
+    """
+    Envía a los clientes suscritos (TVs) sólo lo que cambió en el estado del servidor.
+
+    Mientras haya al menos un suscriptor, un Thread llama a `obtener_estado()` cada
+    `intervalo` segundos y compara con el estado anterior usando `diferencias(anterior,
+    nuevo)`, que retorna una lista de (evento, datos) a enviar. Sin suscriptores no se
+    hace ningún trabajo.
+
+    Con `max_suscriptores`, `intentar_suscribir()` rechaza clientes pasado ese número
+    (cada stream ocupa un Thread del servidor mientras está abierto).
+    """
+
+    def __init__(self,
+                 obtener_estado: Callable[[], dict],
+                 diferencias: Callable[[dict, dict], list[tuple[str, dict]]],
+                 intervalo: float = 30,
+                 heartbeat: float = 15,
+                 nombre: str = "difusor",
+                 max_suscriptores: int = None):
+        self.obtener_estado = obtener_estado
+        self.diferencias = diferencias
+        self.intervalo = intervalo
+        self.heartbeat = heartbeat
+        self.nombre = nombre
+        self.max_suscriptores = max_suscriptores
+
+        self._estado: dict | None = None
+        self._suscriptores: set[queue.Queue] = set()
+        self._lock = Lock()
+        self._detener = Event()
+        self._thread: Thread | None = None
+
+    def suscriptores(self) -> int:
+        return len(self._suscriptores)
+
+    def _lleno(self) -> bool:
+        return self.max_suscriptores is not None and len(self._suscriptores) >= self.max_suscriptores
+
+    def intentar_suscribir(self) -> "Suscripcion | None":
+        """
+        Reserva un lugar para un cliente y retorna su Suscripcion, o None si ya hay
+        `max_suscriptores`. Se llama antes de armar la respuesta: si `obtener_estado()`
+        falla, el error sale de aquí y no a mitad de un stream ya iniciado.
+        """
+        with self._lock:
+            if self._lleno():
+                return None
+            # Sin suscriptores no se revisa nada, así que el último estado puede estar atrasado
+            actualizar = not self._suscriptores or self._estado is None
+
+        # Fuera del lock: puede consultar Notion y no debe bloquear a los demás clientes
+        estado = self.obtener_estado() if actualizar else None
+
+        cola = queue.Queue(maxsize=100)
+        with self._lock:
+            if self._lleno():
+                return None
+            if estado is not None and (not self._suscriptores or self._estado is None):
+                self._estado = estado
+            self._suscriptores.add(cola)
+            self._detener.clear()
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = Thread(name=f"Revisión {self.nombre}", target=self._revisar, daemon=True)
+                self._thread.start()
+            return Suscripcion(self, cola, self._estado)
+
+    def _desuscribir(self, cola: queue.Queue):
+        with self._lock:
+            self._suscriptores.discard(cola)
+            if not self._suscriptores:
+                self._detener.set()
+
+    def _activa(self, cola: queue.Queue) -> bool:
+        with self._lock:
+            return cola in self._suscriptores
+
+    def publicar(self, mensaje: str):
+        with self._lock:
+            suscriptores = list(self._suscriptores)
+        for cola in suscriptores:
+            try:
+                cola.put_nowait(mensaje)
+            except queue.Full:
+                # Cliente que no está leyendo: se desconecta para que se reconecte limpio
+                self._desuscribir(cola)
+
+    def detener(self):
+        """Termina la revisión periódica y cierra todos los streams abiertos."""
+        self._detener.set()
+        with self._lock:
+            suscriptores = list(self._suscriptores)
+            self._suscriptores.clear()
+        for cola in suscriptores:
+            while True:
+                try:
+                    cola.put_nowait(None)
+                    break
+                except queue.Full:
+                    try:
+                        cola.get_nowait()
+                    except queue.Empty:
+                        pass
+
+    def revisar_ahora(self):
+        """Compara el estado actual con el último enviado y publica las diferencias."""
+        nuevo = self.obtener_estado()
+        anterior, self._estado = self._estado, nuevo
+        if anterior is None:
+            return
+        for evento, datos in self.diferencias(anterior, nuevo):
+            self.publicar(formato_sse(evento, datos))
+
+    def _revisar(self):
+        while True:
+            if self._detener.wait(self.intervalo):
+                with self._lock:
+                    if not self._suscriptores:
+                        self._thread = None
+                        return
+                    # Se suscribió alguien justo después de que se fuera el último
+                    self._detener.clear()
+                continue
+            try:
+                self.revisar_ahora()
+            except Exception:
+                traceback.print_exc()
+                printt(f"Error revisando cambios en '{self.nombre}'")
+
+
+class Suscripcion:
+    """
+    Respuesta `text/event-stream` de un cliente ya suscrito. Parte con el estado completo
+    (evento 'inicial') y después sólo envía diferencias y heartbeats.
+
+    El servidor WSGI llama a `close()` al terminar la respuesta, también si el cliente se
+    fue antes de leer nada, así el lugar reservado siempre se libera.
+    """
+
+    def __init__(self, difusor: Difusor, cola: queue.Queue, estado: dict):
+        self.difusor = difusor
+        self.cola = cola
+        self.estado = estado
+
+    def __iter__(self) -> Iterator[str]:
+        try:
+            yield "retry: 5000\n"
+            yield formato_sse("inicial", self.estado)
+            while self.difusor._activa(self.cola):
+                try:
+                    mensaje = self.cola.get(timeout=self.difusor.heartbeat)
+                except queue.Empty:
+                    yield ": ping\n\n"
+                    continue
+                if mensaje is None:
+                    # El servidor se está apagando: el cliente se reconecta solo (ver 'retry')
+                    return
+                yield mensaje
+        finally:
+            self.close()
+
+    def close(self):
+        self.difusor._desuscribir(self.cola)
@@ -1,19 +1,31 @@
-from flask import Flask, make_response, send_file
-from ics import Calendar, Event
-from threading import Thread, Timer
-import requests
+from flask import Flask, Response, make_response, send_file, jsonify, request
+from threading import Thread
+from functools import lru_cache
 import os
-import datetime
-from datetime import datetime, datetime, timezone, timedelta
+import json
 from mimetypes import guess_type
-fromisoformat = datetime.fromisoformat
-def now_time(): return datetime.now(timezone.utc)
-from wsgiref.simple_server import make_server
+from werkzeug.http import http_date
 import traceback
+from datetime import datetime, timezone
 
-from mysite.TVs.QFMC import spotify
 from mysite.notion_creds import HEADERS_TRINIP, DATABASES_IDS
 from mysite.utils import printt
+from mysite import notion
+from mysite.cache import CacheTTL, clave_canonica
+from mysite.cache_compartido import CacheCompartido, AlmacenCompartido
+from mysite.planificador import Planificador
+from mysite.artefactos import AlmacenArtefactos, Artefacto, crear_artefacto
+from mysite.calendario import IndiceEventos, FILTROS_URL, FRAGMENTOS, serializar_calendario
+from mysite.TVs.QFMC.Cancion_del_dia.indice_canciones import INDICE_CANCIONES, codigo_default_vigente
+from mysite.TVs.QFMC.eventos_tv import construir_feed_tv, diferencias_eventos, hoy_tv
+from mysite.difusor import Difusor
+from mysite.activos import (AlmacenActivos, Activo, elegir_codificacion, etag_variante, coincide_etag,
+                             CACHE_INMUTABLE, CACHE_REVALIDAR)
+from mysite.sync_notion import obtener_sincronizador
+from mysite.config import (NOTION_CACHE_TTL, NOTION_CACHE_MAX_OBSOLETO, NOTION_CACHE_COMPARTIDO, CALENDAR_SNAPSHOT_DIR,
+                           TV_INTERVALO_REVISION, TV_MAX_STREAMS, SPOTIFY_DEFAULT_MAX_DIAS, PLANIFICADOR_ACTIVO,
+                           PLANIFICADOR_CALENDARIO_CADA, PLANIFICADOR_TV_CADA, PLANIFICADOR_CODIGOS_A_LAS,
+                           PLANIFICADOR_BLOQUEOS)
 
 def get_content_type(file_path: str) -> str:
     """Determina el Content-Type basado en la extensión del archivo"""
@@ -42,140 +54,188 @@ def get_content_type(file_path: str) -> str:
 # Go to https://omunozd.pythonanywhere.com/calendar/
 
 
-TURNOS = Calendar()
-
-
 FOLDER = ''
 
 app = Flask(__name__)
 
 
-def get_notion_data(payload: dict = {}, filename: str = "calendar.ics"):
-    url = f"https://api.notion.com/v1/databases/{DATABASES_IDS['actividades_ing']}/query"
-    data = []
-    run = True
-    payload["page_size"] = 100
-
-    while run:
-        response = requests.post(url, headers=HEADERS_TRINIP, json=payload)
-
-        data.extend(response.json().get("results", []))
-
-        run = response.json().get("has_more", False)
-
-        if response.json().get("next_cursor", None):
-            payload["start_cursor"] = response.json()["next_cursor"]
-
-    cal = Calendar()
-    cal.events = set()
+ARTEFACTOS = AlmacenArtefactos(carpeta_snapshot=CALENDAR_SNAPSHOT_DIR)
 
-    cal_name = "Actividades en Ingeniería UC | CAi💛"
+ACTIVOS = AlmacenActivos(os.path.join("mysite", "TVs"))
 
-    for n in data:
 
-        if n["properties"]["Fecha"]["date"] and n["properties"]["Público"]["checkbox"]:
-            event = Event()
-
-            event.begin = n["properties"]["Fecha"]["date"]["start"]
-            event.end = n["properties"]["Fecha"]["date"]["end"]
-
-            if "T" not in n["properties"]["Fecha"]["date"]["start"]:
-                event.make_all_day()
-
-            else:
-                if not n["properties"]["Fecha"]["date"]["end"]:
-                    event.duration = {"hours": 1, "minutes": 10}
-
-            icon = n["icon"][n["icon"]["type"]] + " " if n["icon"] else ""
-
-            name = n["properties"]["Nombre"]["title"][0]["text"]["content"] if n["properties"]["Nombre"] and len(
-                n["properties"]["Nombre"]["title"]) > 0 else ""
+def serializar_indice(indice: IndiceEventos) -> bytes:
+    """
+    Eventos y calendar.ics ya generado, para los demás procesos (ver CacheCompartido).
+    Se guarda como JSON: las páginas tal como vienen de Notion, el ICS como texto y
+    Last-Modified como fecha ISO.
+    """
+    modificado = indice.modificado
+    return json.dumps({
+        "paginas": indice.todas,
+        "calendario": ARTEFACTOS.obtener("calendar.ics").contenido.decode("utf-8"),
+        "modificado": datetime.fromtimestamp(modificado, timezone.utc).isoformat() if modificado else None,
+    }, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def deserializar_indice(datos: bytes) -> IndiceEventos:
+    valor = json.loads(datos)
+    modificado = datetime.fromisoformat(valor["modificado"]).timestamp() if valor["modificado"] else None
+    calendario = valor["calendario"].encode("utf-8")
+    indice = IndiceEventos(valor["paginas"])
+    FRAGMENTOS.retener(indice.paginas)
+    indice.modificado = ARTEFACTOS.publicar(
+        "calendar.ics",
+        calendario,
+        mimetype="text/calendar; charset=utf-8",
+        modificado=modificado
+    ).modificado
+    return indice
+
+
+if NOTION_CACHE_COMPARTIDO:
+    CACHE_NOTION = CacheCompartido(
+        NOTION_CACHE_COMPARTIDO,
+        ttl=NOTION_CACHE_TTL,
+        max_obsoleto=NOTION_CACHE_MAX_OBSOLETO,
+        nombre="Notion actividades_ing",
+        contexto_fondo=lambda: notion.GOBERNADOR.prioridad(notion.PRIORIDAD_FONDO),
+        serializar=serializar_indice,
+        deserializar=deserializar_indice
+    )
+else:
+    CACHE_NOTION = CacheTTL(
+        ttl=NOTION_CACHE_TTL,
+        max_obsoleto=NOTION_CACHE_MAX_OBSOLETO,
+        nombre="Notion actividades_ing",
+        # Los refrescos en segundo plano ceden el paso a las solicitudes de los usuarios
+        contexto_fondo=lambda: notion.GOBERNADOR.prioridad(notion.PRIORIDAD_FONDO)
+    )
 
-            # type_ = n["properties"]["Tipo"]["select"]["name"] if n["properties"]["Tipo"]["select"] else ""
 
-            even_name = icon + name  # + (" - " + type_ if type_ else "")
-            event.name = even_name
+# "formato" separa las filas JSON de las que guardaban versiones anteriores con pickle
+CLAVE_NOTION = clave_canonica({"database": "actividades_ing", "formato": "json"})
 
-            event.classification = n["properties"]["Tipo"]["select"]["name"] if n["properties"]["Tipo"]["select"] else ""
 
-            areas = list(
-                map(lambda x: x["name"], n["properties"]["Áreas"]["multi_select"]))
-            inscripciones = n["properties"]["Inscripciones"]["url"] if n["properties"]["Inscripciones"]["url"] else ""
-            link_info = n["properties"]["Info"]["url"] if n["properties"]["Info"]["url"] else ""
-            organizadores = list(
-                map(lambda x: x["name"], n["properties"]["Organiza"]["multi_select"]))
-            targets = list(
-                map(lambda x: x["name"], n["properties"]["Público Objetivo"]["multi_select"]))
-            comentario = n["properties"]["Comentario"]["rich_text"][0]["plain_text"] if n["properties"]["Comentario"]["rich_text"] else ""
-            lugar = n["properties"]["Lugar"]["rich_text"][0]["plain_text"] if n["properties"]["Lugar"]["rich_text"] else ""
+def consultar_notion() -> list[dict]:
+    """
+    Sincroniza los cambios de la base de datos de actividades y retorna todas sus páginas
+    desde el almacén local.
+    """
+    sincronizador = obtener_sincronizador(DATABASES_IDS['actividades_ing'], HEADERS_TRINIP)
+    sincronizador.sincronizar()
+    return sincronizador.paginas()
 
-            event.location = lugar
-            event.categories = areas
 
-            lineas_desc = [
-                f"{comentario}\n"
-                f"Inscripciones: {inscripciones}" if inscripciones else "",
-                f"Más información: {link_info}" if link_info else "",
-                f"Organizan: {", ".join(organizadores)}",
-                f"Público objetivo: {", ".join(targets)}",
-                f"Áreas de Interés: {", ".join(areas)}"                
-            ]
-            event.description = "\n".join(
-                filter(lambda x: x != "", lineas_desc))
+def get_notion_data() -> IndiceEventos:
+    """
+    Retorna el índice con todos los eventos, que además publica el calendario completo
+    (calendar.ics) en memoria.
+    """
+    # Los clientes que hacen polling reciben el último índice y sólo un Thread
+    # sincroniza con Notion al vencer el TTL.
+    return CACHE_NOTION.obtener(CLAVE_NOTION, construir_indice)
+
+
+def construir_indice() -> IndiceEventos:
+    indice = IndiceEventos(consultar_notion())
+    FRAGMENTOS.retener(indice.paginas)
+    calendario = ARTEFACTOS.publicar(
+        "calendar.ics",
+        serializar_calendario(indice.paginas),
+        mimetype="text/calendar; charset=utf-8",
+        modificado=indice.modificado
+    )
+    # Los calendarios filtrados usan la misma fecha, que avanza también cuando se elimina un evento
+    indice.modificado = calendario.modificado
+    return indice
 
-            cal.events.add(event)
 
-    ics_ser = cal.serialize().replace(
-        "BEGIN:VCALENDAR",
-        f"BEGIN:VCALENDAR\nX-WR-CALNAME:{cal_name}\nX-WR-TIMEZONE:America/Santiago"
+def crear_calendario_filtrado(clave: str, paginas: list[dict], modificado: float = None) -> Artefacto:
+    return crear_artefacto(
+        "cal-filtr_" + clave.replace("&", "_") + ".ics",
+        serializar_calendario(paginas),
+        "text/calendar; charset=utf-8",
+        modificado
     )
 
-    with open(f"mysite/{filename}", "w", encoding="utf-8") as f:
-        f.write(ics_ser.replace("\r\n", "\n"))
-
-    with open(filename, "w", encoding="utf-8") as f:
-        f.write(ics_ser.replace("\r\n", "\n"))
 
+def responder_condicional(variantes: dict[str, bytes], etag: str, mimetype: str,
+                          modificado: float = None, cache_control: str = CACHE_REVALIDAR):
+    """
+    Responde 304 si el cliente ya tiene la versión `etag` (If-None-Match) o no hay cambios
+    desde If-Modified-Since; si no, el cuerpo en la mejor codificación que acepte.
+    """
+    codificacion = elegir_codificacion(request.headers.get("Accept-Encoding", ""), variantes)
+
+    if "If-None-Match" in request.headers:
+        # If-None-Match tiene prioridad: If-Modified-Since sólo se usa si no viene
+        no_modificado = coincide_etag(request.headers["If-None-Match"], etag)
+    else:
+        desde = request.if_modified_since
+        no_modificado = bool(modificado and desde and int(modificado) <= desde.timestamp())
+
+    if no_modificado:
+        response = make_response("", 304)
+    else:
+        response = make_response(variantes[codificacion])
+        response.headers["Content-Type"] = mimetype
+        if codificacion != "identity":
+            response.headers["Content-Encoding"] = codificacion
+
+    response.headers["ETag"] = etag_variante(etag, codificacion)
+    if modificado:
+        response.headers["Last-Modified"] = http_date(modificado)
+    response.headers["Vary"] = "Accept-Encoding"
+    response.headers["Cache-Control"] = cache_control
+    return response
+
+
+def responder_artefacto(artefacto: Artefacto, as_attachment: bool = True):
+    """Arma la respuesta HTTP directamente desde los bytes (ya comprimidos) en memoria."""
+    response = responder_condicional(
+        {codificacion: artefacto.variante(codificacion) for codificacion in artefacto.codificaciones()},
+        artefacto.etag,
+        artefacto.mimetype,
+        artefacto.modificado
+    )
+    if as_attachment and response.status_code == 200:
+        response.headers["Content-Disposition"] = f'attachment; filename="{artefacto.nombre}"'
+    return response
 
-def calendar_error(error):
-    cal = Calendar()
 
-    event = Event(
-        name="❌ Error actualizando calendario",
-        begin=now_time(),
-        end=now_time() + timedelta(minutes=5),
-        description=str(error)
-    )
+@app.route('/')
+def hello_world():
+    return 'Si buscas más información, visita nuestro <a href="instagram.com/caipuc">instagram</a>'
 
-    cal.events.add(event)
 
-    return cal, "error_file"
+@app.route("/estado/notion", methods=['GET'])
+def estado_notion():
+    """Colas y tiempos de espera del gobernador de solicitudes a Notion."""
+    return jsonify(notion.GOBERNADOR.estadisticas())
 
 
-def save_file(cal, name):
-    with open(f"mysite/{name}.ics", "w", encoding="utf-8") as f:
-        f.write(cal.serialize().replace("\r\n", "\n"))
+@app.route("/estado/tareas", methods=['GET'])
+def estado_tareas():
+    """Última ejecución, duración, próxima ejecución y último error de cada tarea programada."""
+    return jsonify(PLANIFICADOR.estado())
 
-    with open(f"{name}.ics", "w", encoding="utf-8") as f:
-        f.write(cal.serialize().replace("\r\n", "\n"))
 
+@app.route("/estado/codigos_spotify", methods=['GET'])
+def estado_codigos_spotify():
+    """Progreso (o resultado) de la última importación de la programación de canciones."""
+    from mysite.TVs.QFMC import spotify
 
-@app.route('/')
-def hello_world():
-    return 'Si buscas más información, visita nuestro <a href="instagram.com/caipuc">instagram</a>'
+    informe = spotify.ULTIMA_IMPORTACION
+    return jsonify(informe.a_dict() if informe else None)
 
 
 @app.route("/calendar/ing", methods=['GET'])
 def return_calendar():
 
-    get_notion_data()
-
     try:
-        file_path = os.path.join(FOLDER, "calendar.ics")
-        if os.path.isfile(file_path):
-            return send_file(file_path, as_attachment=True)
-        else:
-            return make_response(f"File calendar.ics not found. With {file_path} {os.listdir('./mysite')}", 404)
+        get_notion_data()
+        return responder_artefacto(ARTEFACTOS.obtener("calendar.ics"))
     except Exception as e:
         return make_response(f"Error: {str(e)}", 500)
 
@@ -183,241 +243,234 @@ def return_calendar():
 @app.route("/calendar/ing/<string:filtros_str>", methods=['GET'])
 def return_calendar_filtrado(filtros_str: str):
 
-    ID_AREAS = {
-        "INN": "Innovación",
-        "VID": "Vida Universitaria",
-        "SB": "Salud y Bienestar",
-        "IIEE": "IIEE",
-        "RP": "Rol Púlbico",
-        "DOC": "Docencia",
-        "DIS": "Disidencias",
-        "COM": "Comunidad",
-        "SUS": "Sustentabilidad",
-        "FEM": "Feminismo",
-        "INV": "Investigación y Postgrado",
-        "COM": "Comunicaciones",
-        "ACA": "Académico",
-        "UP": "Utilidad Pública",
-        "DEP": "Deportes"
-    }
+    ids_filtros = filtros_str.split("&")
+    ids_invalidos = [id_filtro for id_filtro in ids_filtros if id_filtro not in FILTROS_URL]
 
-    FILTROS_URL = {
-        area_key: {
-            "property": "Áreas",
-            "multi_select": {"contains": area_name}
-        }
-        for area_key, area_name in ID_AREAS.items()
-    }
+    if ids_invalidos:
+        print(f"Filtros no reconocidos: {" ,".join(ids_invalidos)}")
+        return make_response(f"Filtro no reconocidos: {" ,".join(ids_invalidos)}", 400)
 
-    ID_PUBLICOS = {
-        "PRE": "Pregrado",
-        "POST": "Postgrado",
-
-        "GRA": "Gratuidad",
-        "TEI": "Talento e Inclusión",
-        "NACE": "NACE",
-
-        "MUJ": "Mujeres",
-        "DEPTA": "Deportista",
-        "INI": "Iniciativa",
-
-        "BIO": "Major Biológica",
-        "CIV": "Major Civil",
-        "ELE": "Major Eléctrica",
-        "MEC": "Major Mecánica",
-        "AMB": "Major Ambiental",
-        "MIN": "Major Minería",
-        "CON": "Major Construcción",
-        "ARQ": "Major Arquitectura",
-        "MED": "Major Biomed",
-        "TRA": "Major Transporte"
-    }
+    # Se responde desde el conjunto completo de eventos, sin consultar a Notion por cada
+    # combinación de filtros. El resultado queda guardado en el índice vigente.
+    try:
+        indice = get_notion_data()
+        return responder_artefacto(indice.calendario_filtrado(
+            ids_filtros,
+            lambda clave, paginas: crear_calendario_filtrado(clave, paginas, indice.modificado)
+        ))
+    except Exception as e:
+        return make_response(f"Error: {str(e)}", 500)
+
+def feed_tv() -> Artefacto:
+    """
+    Eventos de la semana para las TVs (ver TVs/QFMC/eventos_tv.py). Se genera una vez por
+    índice y por día, así que cargar la TV no consulta a Notion.
+    """
+    indice = get_notion_data()
+    hoy = hoy_tv()
+    return indice.derivado(
+        f"tv:{hoy.isoformat()}",
+        # Sin Last-Modified: el feed cambia también con el día, sólo se revalida con el ETag
+        lambda: crear_artefacto("eventos.json", construir_feed_tv(indice.todas, hoy),
+                                "application/json; charset=utf-8")
+    )
 
-    FILTROS_URL.update({
-        publico_key: {
-            "property": "Público Objetivo",
-            "multi_select": {"contains": publico_name}
-        }
-        for publico_key, publico_name in ID_PUBLICOS.items()
-    })
-
-    ID_ORGANIZADORES = {
-        "CAI": "CAi",
-        "ESC": "Escuela",
-        "ODOC": "ODOC",
-        "TUT": "Tutores",
-        "GOING": "GOing",
-        "PAS": "Pastoral",
-        "MJL": "Major League",
-        "CA": "CA",
-        "CAP": "CAP",
-        "UC": "UC",
-        "DII": "DII",
-        "UNT": "UNITE",
-        "DCDI": "DCDI",
-        "RAIZ": "La Raíz",
-        "REH": "Reintegrando Humedales",
-        "CERRNN": "Centro de Estudiantes de Recursos Naturales",
-        "PDI": "Plan Deportivo",
-        "CET": "Capítulo de Transporte",
-        "ITA": "Itaú",
-        "BCH": "Banco de Chile",
-        "BCI": "BCI"
+
+@app.route("/TV/QFMC/eventos.json", methods=['GET'])
+def eventos_tv():
+    try:
+        return responder_artefacto(feed_tv(), as_attachment=False)
+    except Exception as e:
+        traceback.print_exc()
+        return make_response(f"Error al obtener eventos: {str(e)}", 500)
+
+
+def estado_tv() -> dict:
+    """Lo que las TVs necesitan saber: los eventos y qué versión del código de hoy mostrar."""
+    cancion = INDICE_CANCIONES.hoy()
+    return {
+        "eventos": json.loads(feed_tv().contenido)["eventos"],
+        "cancion": f"{cancion.nombre}:{cancion.version}" if cancion else None
     }
 
-    FILTROS_URL.update({
-        org_key: {
-            "property": "Organiza",
-            "multi_select": {"contains": org_name}
-        }
-        for org_key, org_name in ID_ORGANIZADORES.items()
-    })
 
-    ids_filtros = filtros_str.split("&")
-    filtros, ids_invalidos = [], []
+def diferencias_tv(anterior: dict, nuevo: dict) -> list[tuple[str, dict]]:
+    mensajes = []
+    cambios = diferencias_eventos(anterior["eventos"], nuevo["eventos"])
+    if cambios:
+        mensajes.append(("eventos", cambios))
+    if anterior["cancion"] != nuevo["cancion"]:
+        mensajes.append(("cancion", {"version": nuevo["cancion"]}))
+    return mensajes
 
-    for id_filtro in ids_filtros:
-        try:
-            filtros.append(FILTROS_URL[id_filtro])
-        except KeyError:
-            ids_invalidos.append(id_filtro)
 
-    if ids_invalidos:
-        print(f"Filtros no reconocidos: {" ,".join(ids_invalidos)}")
-        return make_response(f"Filtro no reconocidos: {" ,".join(ids_invalidos)}", 400)
+DIFUSOR_TV = Difusor(estado_tv, diferencias_tv, intervalo=TV_INTERVALO_REVISION, nombre="TVs",
+                     max_suscriptores=TV_MAX_STREAMS)
 
-    filename = "cal-filtr_" + str(now_time())[:-6].replace(" ", "_") + ".ics"
-    get_notion_data(payload={"filter": {"or": filtros}}, filename=filename)
 
+@app.route("/TV/QFMC/stream", methods=['GET'])
+def stream_tv():
+    """
+    Server-Sent Events para las TVs: una conexión por TV que recibe sólo los cambios en
+    los eventos y en la canción del día, en vez de recargar la página completa.
+
+    Pasado TV_MAX_STREAMS se responde 503 para no dejar sin Threads al resto de las rutas;
+    la TV consulta entonces eventos.json y reintenta el stream más tarde.
+    """
     try:
-        file_path = os.path.join(FOLDER, filename)
-        if os.path.isfile(file_path):
-            return send_file(file_path, as_attachment=True)
-        else:
-            return make_response(f"File {filename} not found. With {file_path} {os.listdir('./mysite')}", 404)
+        suscripcion = DIFUSOR_TV.intentar_suscribir()
     except Exception as e:
-        return make_response(f"Error: {str(e)}", 500)
+        # Antes de partir el stream: la TV lo reintenta sola (o pasa a eventos.json)
+        traceback.print_exc()
+        return make_response(f"Error al obtener eventos: {str(e)}", 503)
+
+    if suscripcion is None:
+        response = make_response("Demasiadas TVs conectadas, usar /TV/QFMC/eventos.json", 503)
+        response.headers["Retry-After"] = "300"
+        return response
+
+    response = Response(suscripcion, mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
 
 @app.route("/TV/<path:filepath>", methods=['GET'])
 def TVs(filepath: str):
     """
-    Sirve archivos desde TVs/ y maneja el caso especial de QFMC_hor.html
+    Sirve archivos desde TVs/ y maneja los casos especiales de QFMC_hor.html y cancion
     """
-    # Actualizar desde Notion si se pregunta por QFMC
+    # Los eventos se cargan aparte desde /TV/QFMC/eventos.json, servido desde memoria
     if filepath in ["QFMC_hor.html","QFMC"]:
-        try:
-            # Body para llamar a API de Notion - eventos de esta semana
-            payload = {
-                "page_size": 100,
-                "filter": {
-                    "and": [
-                        {
-                            "property": "Fecha",
-                            "date": {
-                                "this_week": {}
-                            }
-                        }
-                    ]
-                }
-            }
-            
-            # Llamar a Notion API
-            url = f"https://api.notion.com/v1/databases/{DATABASES_IDS['actividades_ing']}/query"
-            response = requests.post(url, headers=HEADERS_TRINIP, json=payload)
-            
-            if response.status_code != 200:
-                return make_response(f"Error llamando a Notion API: {response.status_code} - {response.text}", 500)
-            
-            # Guardar los datos en web/backend/data
-            data = response.json()
-            data_file_path = os.path.join("mysite","TVs","QFMC","web","backend","data","QFMC_data.json")
-            os.makedirs(os.path.dirname(data_file_path), exist_ok=True)
-
-            import json
-            with open(data_file_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-                print(f"Datos de Notion actualizados en {data_file_path}")
-            
-            filepath = os.path.join("QFMC","web","frontend","index.html")
-                
-        except Exception as e:
-            traceback.print_exc()
-            print("")
-            return make_response(f"Error al actualizar datos de Notion: {str(e)}\n{str(e.__traceback__)}", 500)
+        filepath = os.path.join("QFMC","web","frontend","index.html")
     
     elif filepath == "cancion":
-        folderpath = os.path.join("QFMC","Cancion_del_dia","spotify_codes")
-
-        filepath = os.path.join(
-            "QFMC","Cancion_del_dia","spotify_codes","default.svg")
-
-        files = os.listdir(os.path.join("mysite","TVs",folderpath))
-        today_str = datetime.today().strftime("%d_%m_%y")
-
-        for file in files:
-            if today_str in file and not file.endswith(".bak"):
-                filepath = os.path.join(folderpath,file)
-                break
+        cancion = INDICE_CANCIONES.hoy()
+        if cancion is None:
+            return make_response("Archivo no encontrado: cancion", 404)
+        # ETag por contenido: las TVs que recargan reciben 304 mientras no cambie el código
+        return responder_condicional({"identity": cancion.contenido}, cancion.version, cancion.mimetype)
 
     elif filepath == "actualizar_codigos_spotify":
         try:
-            spotify.importar_programacion_notion()
+            from mysite.TVs.QFMC import spotify
+
+            informe = spotify.importar_programacion_notion()
         except Exception as e:
             Warning("ERROR al actualizar códigos spotify")
             traceback.print_exc()
             return make_response(f"Error al actualizar los códigos de spotify. Error interno: <br><p>{e}</p>", 500)
         else:
             printt("Códigos actualizados desde Notion.")
-            return make_response("Códigos Actualizados. Revise el código de hoy <a href='https://omunozd.pythonanywhere.com/TV/cancion'>aquí</a>.",200)
+            # Si algún código falló la importación no se reporta como exitosa
+            return make_response(jsonify(informe.a_dict()), 500 if informe.fallidas else 200)
 
-    # Path del archivo solicitado
-    abs_file_path = os.path.abspath(os.path.join("mysite","TVs", filepath))
-    abs_tvs_path = os.path.abspath(os.path.join("mysite","TVs"))
-    
     # Validar que no haya path traversal
-    if not abs_file_path.startswith(abs_tvs_path):
+    abs_file_path = ACTIVOS.path(filepath)
+    if abs_file_path is None:
         return make_response("Acceso denegado", 403)
-    
-    # Verificar que el archivo existe
+
+    activo = ACTIVOS.obtener(filepath)
+    if activo is not None:
+        return responder_activo(activo)
+
+    # Archivos que no se guardan en memoria (no existen o son muy grandes)
     if not os.path.isfile(abs_file_path):
         return make_response(f"Archivo no encontrado: {filepath}", 404)
-    
-    # Servir el archivo con content-type correcto
+
     try:
         return send_file(abs_file_path, mimetype=get_content_type(abs_file_path))
     except Exception as e:
         return make_response(f"Error sirviendo archivo: {str(e)}", 500)  
 
-spotify.guardar_codigo_spotify(
-        "https://open.spotify.com/intl-es/track/4Qs3OEgzBPGPmRR5QJ0UIs", # Mi Equilibrio Espiritual
-        tipo_archivo=".svg",
-        filename="default",
-        folderpath= os.path.join(
-            "mysite",
-            "TVs",
-            "QFMC",
-            "Cancion_del_dia",
-            "spotify_codes"
-        )
-    )
+
+def responder_activo(activo: Activo):
+    """
+    Responde un archivo de las TVs desde memoria, en la codificación que acepte el cliente.
+    Las URLs con `?v=<hash>` (las que arma index.html) se cachean indefinidamente; el resto
+    se revalida con el ETag y recibe 304 si no cambió.
+    """
+    versionado = request.args.get("v") == activo.etag and not activo.mimetype.startswith("text/html")
+    return responder_condicional(activo.variantes, activo.etag, activo.mimetype,
+                                 cache_control=CACHE_INMUTABLE if versionado else CACHE_REVALIDAR)
+
+
+def asegurar_codigo_default():
+    """
+    Regenera default.svg si falta o está viejo. Corre en un Thread aparte para que el
+    arranque no dependa de la red (ni de que scannables esté disponible), y el stack de
+    Spotify se importa recién aquí.
+    """
+    try:
+        from mysite.TVs.QFMC import spotify
+        spotify.asegurar_codigo_default()
+    except Exception:
+        traceback.print_exc()
+        printt("No se pudo regenerar default.svg, se mantiene el actual")
+
+
+if not codigo_default_vigente(SPOTIFY_DEFAULT_MAX_DIAS):
+    Thread(name="default.svg", target=asegurar_codigo_default, daemon=True).start()
+
+@lru_cache(maxsize=1)
+def almacen_bloqueos() -> AlmacenCompartido:
+    return AlmacenCompartido(PLANIFICADOR_BLOQUEOS)
+
+
+def refrescar_calendario():
+    """Sincroniza con Notion antes de que venza el caché, para que ningún cliente espere."""
+    CACHE_NOTION.refrescar(CLAVE_NOTION, construir_indice)
+
+
+def refrescar_tv():
+    """Regenera el feed de las TVs (p. ej. al cambiar el día) y revisa la canción del día."""
+    feed_tv()
+    INDICE_CANCIONES.hoy()
+
+
+def importar_codigos_spotify():
+    """Importa la programación de canciones desde Notion antes del cambio de día."""
+    from mysite.TVs.QFMC import spotify
+
+    informe = spotify.importar_programacion_notion()
+    if informe.fallidas:
+        raise RuntimeError(f"{len(informe.fallidas)} de {informe.total} códigos fallaron (ver /estado/codigos_spotify)")
+
+
+PLANIFICADOR = Planificador(bloqueos=almacen_bloqueos)
+PLANIFICADOR.registrar("calendario", refrescar_calendario, cada=PLANIFICADOR_CALENDARIO_CADA, jitter=30)
+PLANIFICADOR.registrar("tv", refrescar_tv, cada=PLANIFICADOR_TV_CADA, jitter=10)
+PLANIFICADOR.registrar("codigos_spotify", importar_codigos_spotify, a_las=(PLANIFICADOR_CODIGOS_A_LAS,),
+                       jitter=120, exclusiva=True)
+
+
+@app.before_request
+def iniciar_planificador():
+    # En la primera solicitud de cada proceso (los workers pueden ser creados con fork)
+    if PLANIFICADOR_ACTIVO:
+        PLANIFICADOR.iniciar()
+
+
+def calentar():
+    """
+    Deja en memoria lo primero que piden los clientes: el índice de eventos (y con él
+    calendar.ics), el feed de las TVs, sus archivos estáticos y la canción del día. El
+    servidor (mysite/servidor.py) reporta listo recién cuando esto termina.
+    """
+    get_notion_data()
+    feed_tv()
+    ACTIVOS.obtener(os.path.join("QFMC", "web", "frontend", "index.html"))
+    INDICE_CANCIONES.hoy()
+
+
+def detener():
+    """Cierra los streams de las TVs y detiene el planificador y los Timers en segundo plano."""
+    PLANIFICADOR.detener()
+    DIFUSOR_TV.detener()
+    INDICE_CANCIONES.detener()
+
 
 if __name__ == '__main__':
-    HOST = 'localhost'
-    PORT = 4160
-
-    class ServerThread(Thread):
-        def __init__(self):
-            super().__init__(name="Local Server Thread")
-
-        def run(self):
-            with make_server(HOST, PORT, app) as httpd:
-                try:
-                    print(f'Iniciando servidor: http://{HOST}:{PORT}')
-                    print('''Utiliza 'Ctrl + C' o 'Cmd + C' para apagar el servidor''')
-                    httpd.serve_forever()
-                except KeyboardInterrupt:
-                    print('\nApagando servidor')
-                    httpd.shutdown()
-
-    localserver_t = ServerThread()
-    localserver_t.start()
\ No newline at end of file
+    from mysite.servidor import servir
+
+    servir(app, calentar=calentar, detener=detener)
@@ -0,0 +1,141 @@
+import random
+import time
+from threading import Lock
+from typing import Callable, Iterator, TYPE_CHECKING
+from urllib.parse import urlsplit
+
+if TYPE_CHECKING:
+    import requests
+
+from mysite.config import HTTP_TIMEOUT_CONEXION, HTTP_TIMEOUT_LECTURA, HTTP_REINTENTOS, HTTP_POOL
+from mysite.utils import printt
+
+ESTADOS_REINTENTABLES = (500, 502, 503, 504)
+
+
+class LimitadorTasa:
+    """Espacia las solicitudes a un host para no superar `tasa` solicitudes por segundo."""
+
+    def __init__(self, tasa: float):
+        self.intervalo = 1 / tasa
+        self._siguiente = 0.0
+        self._lock = Lock()
+
+    def esperar(self):
+        with self._lock:
+            ahora = time.monotonic()
+            turno = max(ahora, self._siguiente)
+            self._siguiente = turno + self.intervalo
+        if turno > ahora:
+            time.sleep(turno - ahora)
+
+
+class ClienteHTTP:
+    """
+    Cliente HTTP compartido por todo el proceso.
+
+    Mantiene una `requests.Session` por host (conexiones keep-alive reutilizables entre
+    páginas y entre solicitudes), aplica timeouts de conexión y lectura, y reintenta
+    errores de red y 5xx con backoff exponencial con jitter. Los 429 se retornan tal cual
+    para que los maneje quien conoce el límite de tasa (ver `mysite.notion`); para hosts
+    sin un límite propio se puede fijar uno simple con `limitar`.
+    """
+
+    def __init__(self,
+                 timeout: tuple[float, float] = (HTTP_TIMEOUT_CONEXION, HTTP_TIMEOUT_LECTURA),
+                 reintentos: int = HTTP_REINTENTOS,
+                 backoff: float = 0.5,
+                 tamano_pool: int = HTTP_POOL):
+        self.timeout = timeout
+        self.reintentos = reintentos
+        self.backoff = backoff
+        self.tamano_pool = tamano_pool
+        self._sesiones: dict[str, "requests.Session"] = {}
+        self._limitadores: dict[str, LimitadorTasa] = {}
+        self._lock = Lock()
+
+    def limitar(self, url: str, tasa: float):
+        """Limita las solicitudes al host de `url` a `tasa` por segundo."""
+        self._limitadores[urlsplit(url).netloc] = LimitadorTasa(tasa)
+
+    def sesion(self, url: str) -> "requests.Session":
+        host = urlsplit(url).netloc
+        sesion = self._sesiones.get(host)
+        if sesion is None:
+            with self._lock:
+                sesion = self._sesiones.get(host)
+                if sesion is None:
+                    # requests se importa recién con la primera solicitud, para no pagarlo al arrancar
+                    import requests
+                    from requests.adapters import HTTPAdapter
+
+                    sesion = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.tamano_pool)
+                    sesion.mount("https://", adapter)
+                    sesion.mount("http://", adapter)
+                    self._sesiones[host] = sesion
+        return sesion
+
+    def _espera(self, intento: int) -> float:
+        # "Full jitter": aleatorio entre 0 y el backoff exponencial
+        return random.uniform(0, self.backoff * 2 ** intento)
+
+    def request(self, metodo: str, url: str, **kwargs) -> "requests.Response":
+        kwargs.setdefault("timeout", self.timeout)
+        sesion = self.sesion(url)
+        limitador = self._limitadores.get(urlsplit(url).netloc)
+        import requests
+
+        for intento in range(self.reintentos + 1):
+            if limitador:
+                limitador.esperar()
+            try:
+                response = sesion.request(metodo, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if intento == self.reintentos:
+                    raise
+                printt(f"Error de red en {metodo} {url} ({e.__class__.__name__}), reintentando")
+            else:
+                if response.status_code not in ESTADOS_REINTENTABLES or intento == self.reintentos:
+                    return response
+                printt(f"Error ({response.status_code}) en {metodo} {url}, reintentando")
+
+            time.sleep(self._espera(intento))
+
+    def get(self, url: str, **kwargs) -> "requests.Response":
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> "requests.Response":
+        return self.request("POST", url, **kwargs)
+
+    def cerrar(self):
+        with self._lock:
+            for sesion in self._sesiones.values():
+                sesion.close()
+            self._sesiones.clear()
+
+
+CLIENTE = ClienteHTTP()
+
+
+def paginar(solicitar: Callable[[dict], "requests.Response"], payload: dict = None) -> Iterator[list[dict]]:
+    """
+    Recorre una consulta paginada de Notion (`has_more` / `next_cursor`), retornando los
+    resultados de cada página. El cuerpo de cada respuesta se parsea una sola vez.
+
+    :param solicitar: Función que recibe el payload y hace la solicitud de una página.
+    :type solicitar: Callable[[dict], requests.Response]
+
+    :param payload: Body de la consulta. No se modifica.
+    :type payload: dict
+    """
+    payload = dict(payload or {})
+    payload.setdefault("page_size", 100)
+
+    while True:
+        pagina = solicitar(payload).json()
+        yield pagina.get("results", [])
+
+        if not pagina.get("has_more", False) or not pagina.get("next_cursor"):
+            return
+        payload["start_cursor"] = pagina["next_cursor"]
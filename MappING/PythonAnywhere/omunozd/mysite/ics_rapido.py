@@ -0,0 +1,138 @@
+# Serializador iCalendar (RFC 5545) para los eventos de Notion. Reemplaza a
+# ics.Calendar.serialize: escribe cada VEVENT directamente desde el registro ya parseado,
+# sin objetos intermedios, y puede usarse como generador para calendarios grandes.
+from datetime import date, datetime, timedelta, timezone
+from typing import Iterable, Iterator, NamedTuple
+from zoneinfo import ZoneInfo
+
+CRLF = "\r\n"
+PRODID = "-//CAi//Actividades en Ingenieria UC//ES"
+
+
+class EventoCalendario(NamedTuple):
+    """Datos de un evento tal como se escriben en el VEVENT."""
+    uid: str
+    editado: str            # last_edited_time de Notion (ISO 8601)
+    inicio: str             # 'YYYY-MM-DD' (todo el día) o ISO 8601 con hora
+    fin: str | None
+    zona_horaria: str | None
+    nombre: str
+    tipo: str
+    lugar: str
+    categorias: tuple[str, ...]
+    descripcion: str
+
+
+def escapar(texto: str) -> str:
+    """Escapa un valor TEXT según RFC 5545 §3.3.11."""
+    return (texto
+            .replace("\\", "\\\\")
+            .replace(";", "\\;")
+            .replace(",", "\\,")
+            .replace("\r\n", "\\n")
+            .replace("\n", "\\n"))
+
+
+def plegar(linea: str) -> str:
+    """
+    Aplica el 'line folding' de RFC 5545 §3.1: líneas de a lo más 75 octetos, sin cortar
+    caracteres UTF-8, y continuaciones que comienzan con un espacio.
+    """
+    if len(linea) <= 18 or (len(linea) <= 75 and linea.isascii()):
+        return linea + CRLF
+
+    datos = linea.encode("utf-8")
+    if len(datos) <= 75:
+        return linea + CRLF
+
+    partes = []
+    inicio, limite = 0, 75
+    while inicio < len(datos):
+        fin = min(inicio + limite, len(datos))
+        contenido = len(datos.rstrip(b" \t"))
+        if fin < len(datos) and fin >= contenido and contenido - 1 > inicio:
+            # Una continuación con sólo espacios se descarta al desplegar (p. ej. en la
+            # librería ics): se lleva también el último caracter visible
+            fin = contenido - 1
+        # no cortar en medio de un caracter multibyte (bytes de continuación 10xxxxxx)
+        while fin < len(datos) and (datos[fin] & 0xC0) == 0x80:
+            fin -= 1
+        partes.append(datos[inicio:fin].decode("utf-8"))
+        inicio, limite = fin, 74
+
+    return (CRLF + " ").join(partes) + CRLF
+
+
+def _utc(valor: str, zona_horaria: str | None = None) -> str:
+    dt = datetime.fromisoformat(valor.replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=ZoneInfo(zona_horaria) if zona_horaria else timezone.utc)
+    return dt.astimezone(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def _fecha(valor: str, dias: int = 0) -> str:
+    return (date.fromisoformat(valor[:10]) + timedelta(days=dias)).strftime("%Y%m%d")
+
+
+def lineas_vevent(evento: EventoCalendario) -> Iterator[str]:
+    """Propiedades del VEVENT, sin plegar ni fin de línea."""
+    yield "BEGIN:VEVENT"
+    yield f"UID:{evento.uid}"
+    if evento.editado:
+        yield f"DTSTAMP:{_utc(evento.editado)}"
+
+    if "T" not in evento.inicio:
+        yield f"DTSTART;VALUE=DATE:{_fecha(evento.inicio)}"
+        if evento.fin:
+            # DTEND es exclusivo en eventos de día completo
+            yield f"DTEND;VALUE=DATE:{_fecha(evento.fin, dias=1)}"
+    else:
+        yield f"DTSTART:{_utc(evento.inicio, evento.zona_horaria)}"
+        if evento.fin:
+            yield f"DTEND:{_utc(evento.fin, evento.zona_horaria)}"
+        else:
+            yield "DURATION:PT1H10M"
+
+    if evento.nombre:
+        yield f"SUMMARY:{escapar(evento.nombre)}"
+    if evento.tipo:
+        # Sin escapar, igual que la librería ics: los clientes leen CLASS como un token
+        yield f"CLASS:{evento.tipo}"
+    if evento.categorias:
+        yield "CATEGORIES:" + ",".join(escapar(c) for c in evento.categorias)
+    if evento.descripcion:
+        yield f"DESCRIPTION:{escapar(evento.descripcion)}"
+    if evento.lugar:
+        yield f"LOCATION:{escapar(evento.lugar)}"
+    yield "END:VEVENT"
+
+
+def serializar_vevent(evento: EventoCalendario) -> str:
+    """Bloque VEVENT completo, plegado y con CRLF."""
+    return "".join(plegar(linea) for linea in lineas_vevent(evento))
+
+
+def encabezado(nombre_calendario: str, zona_horaria: str = "America/Santiago") -> str:
+    return "".join(plegar(linea) for linea in (
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        f"PRODID:{PRODID}",
+        "CALSCALE:GREGORIAN",
+        f"X-WR-CALNAME:{escapar(nombre_calendario)}",
+        f"X-WR-TIMEZONE:{zona_horaria}",
+    ))
+
+
+PIE = "END:VCALENDAR" + CRLF
+
+
+def generar_ics(eventos: Iterable[EventoCalendario], nombre_calendario: str,
+                zona_horaria: str = "America/Santiago") -> Iterator[str]:
+    """
+    Genera el calendario por partes: el encabezado, un bloque por evento y el cierre.
+    Sirve tanto para `"".join(...)` como para una respuesta en streaming.
+    """
+    yield encabezado(nombre_calendario, zona_horaria)
+    for evento in eventos:
+        yield serializar_vevent(evento)
+    yield PIE
@@ -0,0 +1,182 @@
+import time
+from collections import deque
+from contextlib import contextmanager
+from threading import Condition, local
+from typing import TYPE_CHECKING
+
+from mysite.http_client import CLIENTE, paginar
+from mysite.config import NOTION_RPS, NOTION_MAX_REINTENTOS_429, NOTION_API_URL
+from mysite.utils import printt
+
+if TYPE_CHECKING:
+    import requests
+
+NOTION_API = NOTION_API_URL.rstrip("/")
+
+# Carriles de prioridad: un número menor pasa primero
+PRIORIDAD_INTERACTIVA = 0
+PRIORIDAD_FONDO = 1
+
+
+class NotionError(Exception):
+    """Respuesta no exitosa de la API de Notion."""
+
+    def __init__(self, status_code: int, mensaje: str):
+        super().__init__(f"Error ({status_code}) en Notion: {mensaje}")
+        self.status_code = status_code
+
+
+class GobernadorNotion:
+    """
+    Coordina todo el tráfico hacia Notion (~3 solicitudes por segundo por integración).
+
+    Usa un token bucket compartido y colas FIFO por prioridad: una solicitud de fondo sólo
+    toma un token cuando no hay solicitudes interactivas esperando. Ante un 429 se pausa
+    todo el tráfico el tiempo indicado en `Retry-After` y se reintenta.
+    """
+
+    def __init__(self, tasa: float = 3, capacidad: float = None, max_reintentos: int = 5):
+        self.tasa = tasa
+        self.capacidad = capacidad if capacidad else tasa
+        self.max_reintentos = max_reintentos
+
+        self._tokens = self.capacidad
+        self._ultima_recarga = time.monotonic()
+        self._pausa_hasta = 0.0
+        self._colas = {PRIORIDAD_INTERACTIVA: deque(), PRIORIDAD_FONDO: deque()}
+        self._cond = Condition()
+        self._local = local()
+
+        self._stats = {
+            prioridad: {"solicitudes": 0, "espera_total": 0.0, "espera_max": 0.0}
+            for prioridad in self._colas
+        }
+        self._respuestas_429 = 0
+
+    @contextmanager
+    def prioridad(self, prioridad: int):
+        """Fija la prioridad por defecto de las solicitudes hechas desde este Thread."""
+        anterior = getattr(self._local, "prioridad", None)
+        self._local.prioridad = prioridad
+        try:
+            yield
+        finally:
+            self._local.prioridad = anterior
+
+    def _recargar(self, ahora: float):
+        self._tokens = min(self.capacidad, self._tokens + (ahora - self._ultima_recarga) * self.tasa)
+        self._ultima_recarga = ahora
+
+    def esperar_turno(self, prioridad: int) -> float:
+        """Bloquea hasta que la solicitud pueda salir. Retorna los segundos esperados."""
+        ticket = object()
+        inicio = time.monotonic()
+
+        with self._cond:
+            self._colas[prioridad].append(ticket)
+            while True:
+                ahora = time.monotonic()
+                self._recargar(ahora)
+
+                es_turno = self._colas[prioridad][0] is ticket and not any(
+                    self._colas[p] for p in self._colas if p < prioridad)
+
+                if es_turno and ahora >= self._pausa_hasta and self._tokens >= 1:
+                    self._tokens -= 1
+                    self._colas[prioridad].popleft()
+                    self._cond.notify_all()
+                    break
+
+                if es_turno:
+                    falta = max(self._pausa_hasta - ahora, (1 - self._tokens) / self.tasa)
+                    self._cond.wait(timeout=max(falta, 0.001))
+                else:
+                    self._cond.wait()
+
+            espera = time.monotonic() - inicio
+            stats = self._stats[prioridad]
+            stats["solicitudes"] += 1
+            stats["espera_total"] += espera
+            stats["espera_max"] = max(stats["espera_max"], espera)
+
+        return espera
+
+    def _pausar(self, segundos: float):
+        with self._cond:
+            self._respuestas_429 += 1
+            self._pausa_hasta = max(self._pausa_hasta, time.monotonic() + segundos)
+            self._cond.notify_all()
+
+    def solicitar(self, metodo: str, url: str, prioridad: int = None, **kwargs) -> "requests.Response":
+        """
+        Hace una solicitud a Notion respetando el límite de tasa. Lanza NotionError si la
+        respuesta no es exitosa (incluyendo 429 después de `max_reintentos`).
+        """
+        if prioridad is None:
+            prioridad = getattr(self._local, "prioridad", None)
+        if prioridad is None:
+            prioridad = PRIORIDAD_INTERACTIVA
+
+        for intento in range(self.max_reintentos + 1):
+            self.esperar_turno(prioridad)
+            response = CLIENTE.request(metodo, url, **kwargs)
+
+            if response.status_code != 429:
+                break
+
+            try:
+                retry_after = float(response.headers.get("Retry-After", ""))
+            except ValueError:
+                retry_after = 2 ** intento
+            printt(f"Notion respondió 429, pausando {retry_after}s (intento {intento + 1})")
+            self._pausar(retry_after)
+
+        if response.status_code != 200:
+            raise NotionError(response.status_code, response.text)
+
+        return response
+
+    def estadisticas(self) -> dict:
+        """Profundidad de las colas y tiempos de espera por carril."""
+        with self._cond:
+            return {
+                "tokens": round(self._tokens, 3),
+                "respuestas_429": self._respuestas_429,
+                "pausado_por": round(max(0.0, self._pausa_hasta - time.monotonic()), 3),
+                "carriles": {
+                    nombre: {
+                        "en_cola": len(self._colas[prioridad]),
+                        "solicitudes": self._stats[prioridad]["solicitudes"],
+                        "espera_promedio": round(
+                            self._stats[prioridad]["espera_total"] / self._stats[prioridad]["solicitudes"], 4)
+                        if self._stats[prioridad]["solicitudes"] else 0.0,
+                        "espera_max": round(self._stats[prioridad]["espera_max"], 4),
+                    }
+                    for nombre, prioridad in (("interactiva", PRIORIDAD_INTERACTIVA), ("fondo", PRIORIDAD_FONDO))
+                }
+            }
+
+
+GOBERNADOR = GobernadorNotion(tasa=NOTION_RPS, max_reintentos=NOTION_MAX_REINTENTOS_429)
+
+
+def consultar_database(database_id: str, headers: dict, payload: dict = None, prioridad: int = None,
+                       propiedades: list[str] = None) -> list[dict]:
+    """
+    Consulta completa (todas las páginas) a una base de datos de Notion a través del gobernador.
+
+    :param propiedades: Ids de las propiedades a incluir en la respuesta (`filter_properties`).
+    Por defecto se incluyen todas.
+    :type propiedades: list[str]
+    """
+    url = f"{NOTION_API}/databases/{database_id}/query"
+    params = {"filter_properties": propiedades} if propiedades else None
+    data = []
+
+    for resultados in paginar(
+            lambda _payload: GOBERNADOR.solicitar(
+                "POST", url, prioridad=prioridad, headers=headers, params=params, json=_payload),
+            payload):
+        data.extend(resultados)
+
+    return data
@@ -0,0 +1,215 @@
+import math
+import os
+import random
+import time
+import traceback
+from datetime import datetime, timedelta
+from threading import Thread, Event, Lock
+from typing import Callable, TYPE_CHECKING
+
+from mysite.utils import printt
+
+if TYPE_CHECKING:
+    from mysite.cache_compartido import AlmacenCompartido
+
+
+class Tarea:
+    """
+    Trabajo periódico del Planificador: cada `cada` segundos o todos los días a las horas
+    de `a_las` ("HH:MM"), con un retraso aleatorio de hasta `jitter` segundos para que
+    varios procesos no partan justo a la vez.
+
+    Nunca corre dos veces en paralelo: si la ejecución anterior no terminó, la siguiente
+    se omite. Con `exclusiva`, además corre en un solo proceso de la máquina por horario.
+    """
+
+    def __init__(self, nombre: str, funcion: Callable[[], None], cada: float = None,
+                 a_las: tuple[str, ...] = (), jitter: float = 0, exclusiva: bool = False):
+        if (cada is None) == (not a_las):
+            raise ValueError(f"La tarea '{nombre}' necesita 'cada' o 'a_las' (y sólo uno)")
+
+        self.nombre = nombre
+        self.funcion = funcion
+        self.cada = cada
+        self.a_las = tuple(datetime.strptime(hora, "%H:%M").time() for hora in a_las)
+        self.jitter = jitter
+        self.exclusiva = exclusiva
+
+        self.proxima: float = 0.0  # timestamp
+        self.turno: str = ""       # identifica el horario de `proxima` en todos los procesos
+        self.ejecutando = False
+        self.ultima_ejecucion: float | None = None
+        self.duracion: float | None = None
+        self.ultimo_resultado: str | None = None
+        self.ultimo_error: str | None = None
+        self.ejecuciones = 0
+        self.errores = 0
+        self.omitidas = 0
+
+    def programar(self, ahora: float):
+        """Calcula la próxima ejecución posterior a `ahora`."""
+        if self.cada is not None:
+            # Alineado a múltiplos de `cada`, así todos los procesos comparten el turno
+            indice = math.floor(ahora / self.cada) + 1
+            base = indice * self.cada
+            self.turno = f"{self.nombre}:{indice}"
+        else:
+            momento = datetime.fromtimestamp(ahora)
+            candidatos = [
+                datetime.combine(momento.date() + timedelta(days=dias), hora)
+                for dias in (0, 1) for hora in self.a_las
+            ]
+            siguiente = min(c for c in candidatos if c.timestamp() > ahora)
+            base = siguiente.timestamp()
+            self.turno = f"{self.nombre}:{siguiente.isoformat(timespec='minutes')}"
+        self.proxima = base + random.uniform(0, self.jitter)
+
+    def periodo(self) -> float:
+        """Segundos hasta el siguiente turno (cuánto dura el bloqueo de una tarea exclusiva)."""
+        return self.cada if self.cada is not None else 86400 / len(self.a_las)
+
+    def descripcion(self) -> str:
+        if self.cada is not None:
+            return f"cada {self.cada:g} s"
+        return "a las " + ", ".join(hora.strftime("%H:%M") for hora in self.a_las)
+
+    def estado(self) -> dict:
+        def iso(timestamp: float | None) -> str | None:
+            return datetime.fromtimestamp(timestamp).isoformat(timespec="seconds") if timestamp else None
+
+        return {
+            "nombre": self.nombre,
+            "programa": self.descripcion(),
+            "exclusiva": self.exclusiva,
+            "ejecutando": self.ejecutando,
+            "ultima_ejecucion": iso(self.ultima_ejecucion),
+            "duracion": round(self.duracion, 3) if self.duracion is not None else None,
+            "ultimo_resultado": self.ultimo_resultado,
+            "ultimo_error": self.ultimo_error,
+            "proxima": iso(self.proxima),
+            "ejecuciones": self.ejecuciones,
+            "errores": self.errores,
+            "omitidas": self.omitidas,
+        }
+
+
+class Planificador:
+    """
+    Corre en segundo plano las tareas registradas (refrescos de caché, importaciones
+    nocturnas, etc.) en vez de depender de que llegue una solicitud.
+
+    Un Thread espera hasta la próxima tarea y la lanza en su propio Thread, así una
+    tarea lenta no atrasa a las demás. `bloqueos` retorna el AlmacenCompartido donde los
+    procesos se reparten las tareas exclusivas (se llama recién cuando se necesita).
+    """
+
+    def __init__(self, bloqueos: Callable[[], "AlmacenCompartido"] = None, nombre: str = "Planificador"):
+        self.nombre = nombre
+        self._bloqueos = bloqueos
+        self._tareas: dict[str, Tarea] = {}
+        self._lock = Lock()
+        self._detener = Event()
+        self._despertar = Event()
+        self._thread: Thread | None = None
+        self._pid: int | None = None
+
+    def registrar(self, nombre: str, funcion: Callable[[], None], cada: float = None,
+                  a_las: tuple[str, ...] = (), jitter: float = 0, exclusiva: bool = False) -> Tarea:
+        tarea = Tarea(nombre, funcion, cada, a_las, jitter, exclusiva)
+        tarea.programar(time.time())
+        with self._lock:
+            self._tareas[nombre] = tarea
+        self._despertar.set()
+        return tarea
+
+    def iniciar(self):
+        """
+        Lanza el Thread del planificador si no está corriendo en este proceso (los procesos
+        creados con fork no heredan Threads, así que se puede llamar en cada solicitud).
+        """
+        if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._detener.clear()
+            self._thread = Thread(name=self.nombre, target=self._bucle, daemon=True)
+            self._thread.start()
+
+    def detener(self):
+        self._detener.set()
+        self._despertar.set()
+
+    def estado(self) -> list[dict]:
+        with self._lock:
+            tareas = list(self._tareas.values())
+        return [tarea.estado() for tarea in tareas]
+
+    def _bucle(self):
+        while not self._detener.is_set():
+            self._despertar.clear()
+            ahora = time.time()
+            with self._lock:
+                tareas = list(self._tareas.values())
+
+            for tarea in tareas:
+                if tarea.proxima <= ahora:
+                    turno = tarea.turno
+                    tarea.programar(ahora)
+                    self._lanzar(tarea, turno)
+
+            proxima = min((tarea.proxima for tarea in tareas), default=ahora + 60)
+            # Como máximo un minuto, por si cambia la hora del sistema
+            self._despertar.wait(min(max(proxima - time.time(), 0.05), 60))
+
+    def _lanzar(self, tarea: Tarea, turno: str):
+        with self._lock:
+            if tarea.ejecutando:
+                tarea.omitidas += 1
+                tarea.ultimo_resultado = "omitida: la ejecución anterior no ha terminado"
+                printt(f"Tarea '{tarea.nombre}' omitida: la ejecución anterior no ha terminado")
+                return
+            tarea.ejecutando = True
+
+        Thread(name=f"Tarea {tarea.nombre}", target=self._ejecutar, args=(tarea, turno), daemon=True).start()
+
+    def _ejecutar(self, tarea: Tarea, turno: str):
+        try:
+            if tarea.exclusiva and not self._tomar_turno(tarea, turno):
+                tarea.omitidas += 1
+                tarea.ultimo_resultado = "omitida: corrió en otro proceso"
+                return
+
+            inicio = time.perf_counter()
+            tarea.ultima_ejecucion = time.time()
+            try:
+                tarea.funcion()
+            except Exception as e:
+                traceback.print_exc()
+                printt(f"Error en la tarea '{tarea.nombre}': {e}")
+                tarea.errores += 1
+                tarea.ultimo_resultado = "error"
+                tarea.ultimo_error = f"{type(e).__name__}: {e}"
+            else:
+                tarea.ultimo_resultado = "ok"
+            finally:
+                tarea.duracion = time.perf_counter() - inicio
+                tarea.ejecuciones += 1
+        finally:
+            with self._lock:
+                tarea.ejecutando = False
+
+    def _tomar_turno(self, tarea: Tarea, turno: str) -> bool:
+        """
+        Reserva el turno para este proceso. El bloqueo no se libera al terminar, sino que
+        vence con el período de la tarea, así ningún otro proceso repite el mismo turno.
+        """
+        if self._bloqueos is None:
+            return True
+        try:
+            return self._bloqueos().bloquear(f"tarea:{turno}", f"{os.getpid()}", tarea.periodo())
+        except Exception:
+            traceback.print_exc()
+            printt(f"No se pudo reservar el turno de '{tarea.nombre}', se ejecuta igual")
+            return True
@@ -0,0 +1,313 @@
+import argparse
+import multiprocessing
+import os
+import queue
+import signal
+import socket
+import socketserver
+import sys
+import time
+import traceback
+from threading import Thread, Event
+from typing import Callable
+from wsgiref.simple_server import WSGIServer, WSGIRequestHandler
+
+from mysite.utils import printt
+from mysite.config import (SERVIDOR_HOST, SERVIDOR_PUERTO, SERVIDOR_HILOS, SERVIDOR_PROCESOS, SERVIDOR_COLA,
+                           SERVIDOR_TIEMPO_APAGADO, SERVIDOR_TIMEOUT_SOCKET, TV_MAX_STREAMS)
+
+# Servidor WSGI para correr la app fuera de PythonAnywhere (sólo biblioteca estándar).
+#
+# Uso (desde la carpeta que contiene a mysite/):
+#     python -m mysite.servidor --hilos 40 --procesos 2
+#
+# Cada proceso atiende las conexiones con un pool fijo de Threads y una cola acotada:
+# si la cola está llena se responde 503 de inmediato en vez de acumular conexiones.
+# Cada TV conectada a /TV/QFMC/stream ocupa un Thread mientras está conectada, así que
+# la app acepta a lo más TV_MAX_STREAMS por proceso y `hilos` debe ser mayor que eso.
+#
+# SIGTERM o Ctrl+C dejan de aceptar conexiones, cierran los streams, esperan a que
+# terminen las solicitudes en curso (hasta `tiempo_apagado` segundos) y detienen las
+# tareas en segundo plano de la app.
+
+# Responde 200 sólo cuando todos los procesos terminaron de calentar sus cachés
+RUTA_LISTO = "/estado/listo"
+
+RESPUESTA_OCUPADO = (
+    b"HTTP/1.0 503 Service Unavailable\r\n"
+    b"Content-Type: text/plain; charset=utf-8\r\n"
+    b"Retry-After: 1\r\n"
+    b"Connection: close\r\n\r\n"
+    b"Servidor ocupado\n"
+)
+
+
+class ManejadorSolicitud(WSGIRequestHandler):
+    # Una conexión que no envía nada no retiene un Thread para siempre
+    timeout = SERVIDOR_TIMEOUT_SOCKET
+
+    def log_message(self, format, *args):
+        printt(f"{self.address_string()} {format % args}")
+
+
+class ServidorWSGI(WSGIServer):
+    """
+    WSGIServer con un pool de `hilos` Threads y una cola de a lo más `cola` conexiones
+    esperando.
+    """
+
+    allow_reuse_address = True
+
+    def __init__(self, direccion: tuple[str, int], hilos: int, cola: int, sock: socket.socket = None):
+        self.request_queue_size = cola
+        super().__init__(direccion, ManejadorSolicitud, bind_and_activate=sock is None)
+        if sock is not None:
+            # Socket heredado del proceso principal (varios procesos aceptan del mismo)
+            self.socket.close()
+            self.socket = sock
+            self.server_address = sock.getsockname()
+            self.setup_environ()
+
+        self.rechazadas = 0
+        self._cola: queue.Queue = queue.Queue(maxsize=cola)
+        self._hilos = [Thread(name=f"Worker {i}", target=self._atender, daemon=True) for i in range(hilos)]
+        for hilo in self._hilos:
+            hilo.start()
+
+    def server_bind(self):
+        # Evita el getfqdn() de HTTPServer, que puede tardar segundos sin DNS
+        socketserver.TCPServer.server_bind(self)
+        self.setup_environ()
+
+    def setup_environ(self):
+        self.server_name, self.server_port = self.server_address[:2]
+        super().setup_environ()
+
+    def process_request(self, request, client_address):
+        try:
+            self._cola.put_nowait((request, client_address))
+        except queue.Full:
+            self.rechazadas += 1
+            try:
+                request.sendall(RESPUESTA_OCUPADO)
+            except OSError:
+                pass
+            self.shutdown_request(request)
+
+    def _atender(self):
+        while True:
+            item = self._cola.get()
+            if item is None:
+                return
+            request, client_address = item
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                self.shutdown_request(request)
+
+    def drenar(self, tiempo: float) -> bool:
+        """
+        Espera a que se atiendan las conexiones en cola y en curso (hasta `tiempo`
+        segundos). Retorna False si quedaron solicitudes sin terminar.
+        """
+        for _ in self._hilos:
+            self._cola.put(None)
+        limite = time.monotonic() + tiempo
+        for hilo in self._hilos:
+            hilo.join(max(0.0, limite - time.monotonic()))
+        return not any(hilo.is_alive() for hilo in self._hilos)
+
+
+class AppConEstado:
+    """Middleware que responde RUTA_LISTO según `listos` y pasa todo lo demás a la app."""
+
+    def __init__(self, app: Callable, listos):
+        self.app = app
+        self.listos = listos
+
+    def __call__(self, environ, start_response):
+        if environ.get("PATH_INFO") == RUTA_LISTO:
+            listo = all(self.listos)
+            start_response("200 OK" if listo else "503 Service Unavailable",
+                           [("Content-Type", "text/plain; charset=utf-8"), ("Cache-Control", "no-store")])
+            return [("listo\n" if listo else "calentando cachés\n").encode("utf-8")]
+        return self.app(environ, start_response)
+
+
+def calentar_hasta_listo(calentar: Callable[[], None], listos, indice: int, apagando: Event):
+    """Llama a `calentar()` hasta que funcione, con espera creciente entre intentos."""
+    espera = 1
+    while not apagando.is_set():
+        try:
+            inicio = time.perf_counter()
+            calentar()
+        except Exception:
+            traceback.print_exc()
+            printt(f"No se pudieron calentar los cachés, reintentando en {espera} s")
+            apagando.wait(espera)
+            espera = min(espera * 2, 60)
+        else:
+            listos[indice] = 1
+            printt(f"Cachés listos en {time.perf_counter() - inicio:.1f} s")
+            return
+
+
+def atender(app: Callable, direccion: tuple[str, int], hilos: int, cola: int, tiempo_apagado: float,
+            calentar: Callable[[], None] = None, detener: Callable[[], None] = None,
+            sock: socket.socket = None, listos=None, indice: int = 0):
+    """
+    Corre un proceso servidor hasta recibir SIGTERM/SIGINT y lo apaga de forma ordenada.
+    """
+    listos = listos if listos is not None else [0]
+    servidor = ServidorWSGI(direccion, hilos, cola, sock)
+    servidor.set_app(AppConEstado(app, listos))
+    apagando = Event()
+
+    def pedir_apagado(signum, frame):
+        if not apagando.is_set():
+            apagando.set()
+            # shutdown() espera a que serve_forever termine: no puede llamarse desde su Thread
+            Thread(name="Apagado", target=servidor.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, pedir_apagado)
+    signal.signal(signal.SIGINT, pedir_apagado)
+
+    if calentar is None:
+        listos[indice] = 1
+    else:
+        Thread(name="Calentamiento", target=calentar_hasta_listo,
+               args=(calentar, listos, indice, apagando), daemon=True).start()
+
+    printt(f"Atendiendo en http://{servidor.server_name}:{servidor.server_port} "
+           f"(pid {os.getpid()}, {hilos} hilos, cola {cola})")
+    try:
+        servidor.serve_forever(poll_interval=0.2)
+    finally:
+        listos[indice] = 0
+        servidor.server_close()
+        # Los streams SSE no terminan solos: se cierran antes de esperar a los Threads
+        if detener is not None:
+            try:
+                detener()
+            except Exception:
+                traceback.print_exc()
+        if servidor.drenar(tiempo_apagado):
+            printt("Solicitudes en curso terminadas")
+        else:
+            printt(f"Se cumplió el plazo de {tiempo_apagado:.0f} s con solicitudes en curso")
+        if servidor.rechazadas:
+            printt(f"{servidor.rechazadas} conexiones rechazadas por cola llena")
+
+
+def servir(app: Callable,
+           host: str = SERVIDOR_HOST,
+           puerto: int = SERVIDOR_PUERTO,
+           hilos: int = SERVIDOR_HILOS,
+           procesos: int = SERVIDOR_PROCESOS,
+           cola: int = SERVIDOR_COLA,
+           tiempo_apagado: float = SERVIDOR_TIEMPO_APAGADO,
+           calentar: Callable[[], None] = None,
+           detener: Callable[[], None] = None):
+    """
+    Sirve `app` con `procesos` procesos de `hilos` Threads cada uno.
+
+    Con más de un proceso, el proceso principal abre el socket y crea los procesos con
+    fork (que heredan la app ya importada), los reemplaza si mueren y les reenvía la señal
+    de apagado. `calentar()` se llama en cada proceso al partir y RUTA_LISTO responde 200
+    recién cuando terminó en todos; `detener()` se llama en cada proceso al apagarse.
+    """
+    if hilos <= TV_MAX_STREAMS:
+        printt(f"Ojo: {hilos} hilos no alcanzan para {TV_MAX_STREAMS} streams de TVs (TV_MAX_STREAMS) "
+               f"y las demás solicitudes; con todas las TVs conectadas el resto esperará o recibirá 503")
+    if procesos <= 1 or not hasattr(os, "fork"):
+        atender(app, (host, puerto), hilos, cola, tiempo_apagado, calentar, detener)
+        return
+
+    sock = socket.create_server((host, puerto), backlog=cola, reuse_port=False)
+    sock.set_inheritable(True)
+    # Memoria compartida: un byte por proceso que indica si ya calentó sus cachés
+    listos = multiprocessing.Array("b", procesos, lock=False)
+    hijos: dict[int, int] = {}
+    apagando = Event()
+
+    def lanzar(indice: int):
+        listos[indice] = 0
+        pid = os.fork()
+        if pid == 0:
+            codigo = 0
+            try:
+                atender(app, (host, puerto), hilos, cola, tiempo_apagado, calentar, detener,
+                        sock=sock, listos=listos, indice=indice)
+            except BaseException:
+                traceback.print_exc()
+                codigo = 1
+            finally:
+                sys.stdout.flush()
+                sys.stderr.flush()
+                os._exit(codigo)
+        hijos[pid] = indice
+
+    def pedir_apagado(signum, frame):
+        apagando.set()
+        for pid in list(hijos):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, pedir_apagado)
+    signal.signal(signal.SIGINT, pedir_apagado)
+
+    printt(f"Iniciando {procesos} procesos en http://{host}:{puerto}")
+    for indice in range(procesos):
+        lanzar(indice)
+
+    while hijos:
+        try:
+            pid, estado = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        indice = hijos.pop(pid, None)
+        if indice is None:
+            continue
+        listos[indice] = 0
+        if not apagando.is_set():
+            printt(f"El proceso {pid} terminó inesperadamente ({estado}), se reemplaza")
+            time.sleep(1)
+            lanzar(indice)
+
+    sock.close()
+    printt("Servidor apagado")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor WSGI de la app (biblioteca estándar).")
+    parser.add_argument("--host", default=SERVIDOR_HOST)
+    parser.add_argument("--puerto", type=int, default=SERVIDOR_PUERTO)
+    parser.add_argument("--hilos", type=int, default=SERVIDOR_HILOS, help="Threads por proceso.")
+    parser.add_argument("--procesos", type=int, default=SERVIDOR_PROCESOS)
+    parser.add_argument("--cola", type=int, default=SERVIDOR_COLA, help="Conexiones en espera por proceso.")
+    parser.add_argument("--tiempo-apagado", type=float, default=SERVIDOR_TIEMPO_APAGADO)
+    args = parser.parse_args()
+
+    from mysite import flask_app
+
+    servir(
+        flask_app.app,
+        host=args.host,
+        puerto=args.puerto,
+        hilos=args.hilos,
+        procesos=args.procesos,
+        cola=args.cola,
+        tiempo_apagado=args.tiempo_apagado,
+        calentar=flask_app.calentar,
+        detener=flask_app.detener
+    )
+
+
+if __name__ == "__main__":
+    main()
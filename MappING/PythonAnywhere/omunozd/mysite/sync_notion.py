@@ -0,0 +1,172 @@
+import json
+import os
+import sqlite3
+import time
+from contextlib import closing
+from threading import Lock
+
+from mysite import notion
+from mysite.config import NOTION_STORE_PATH, NOTION_INTERVALO_RECONCILIACION
+from mysite.utils import printt
+
+
+class AlmacenPaginas:
+    """
+    Copia local (SQLite) de las páginas de una o más bases de datos de Notion, por id.
+    """
+
+    def __init__(self, path: str = NOTION_STORE_PATH):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        with closing(self._conectar()) as con, con:
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("""
+                CREATE TABLE IF NOT EXISTS paginas (
+                    database_id TEXT NOT NULL,
+                    id TEXT NOT NULL,
+                    last_edited_time TEXT NOT NULL,
+                    datos TEXT NOT NULL,
+                    PRIMARY KEY (database_id, id)
+                )""")
+            con.execute("""
+                CREATE TABLE IF NOT EXISTS sincronizaciones (
+                    database_id TEXT PRIMARY KEY,
+                    ultima_edicion TEXT,
+                    ultima_reconciliacion REAL
+                )""")
+
+    def _conectar(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    def paginas(self, database_id: str) -> list[dict]:
+        with closing(self._conectar()) as con:
+            filas = con.execute(
+                "SELECT datos FROM paginas WHERE database_id = ? ORDER BY id", (database_id,)).fetchall()
+        return [json.loads(datos) for (datos,) in filas]
+
+    def ids(self, database_id: str) -> set[str]:
+        with closing(self._conectar()) as con:
+            filas = con.execute("SELECT id FROM paginas WHERE database_id = ?", (database_id,)).fetchall()
+        return {id_ for (id_,) in filas}
+
+    def guardar(self, database_id: str, paginas: list[dict], reemplazar: bool = False):
+        with closing(self._conectar()) as con, con:
+            if reemplazar:
+                con.execute("DELETE FROM paginas WHERE database_id = ?", (database_id,))
+            con.executemany(
+                "INSERT OR REPLACE INTO paginas (database_id, id, last_edited_time, datos) VALUES (?, ?, ?, ?)",
+                [(database_id, n["id"], n["last_edited_time"], json.dumps(n, ensure_ascii=False)) for n in paginas]
+            )
+
+    def eliminar(self, database_id: str, ids: set[str]):
+        with closing(self._conectar()) as con, con:
+            con.executemany(
+                "DELETE FROM paginas WHERE database_id = ? AND id = ?",
+                [(database_id, id_) for id_ in ids]
+            )
+
+    def estado(self, database_id: str) -> tuple[str | None, float]:
+        """Retorna (última last_edited_time vista, timestamp de la última reconciliación)."""
+        with closing(self._conectar()) as con:
+            fila = con.execute(
+                "SELECT ultima_edicion, ultima_reconciliacion FROM sincronizaciones WHERE database_id = ?",
+                (database_id,)).fetchone()
+        return (fila[0], fila[1] or 0.0) if fila else (None, 0.0)
+
+    def guardar_estado(self, database_id: str, ultima_edicion: str | None, ultima_reconciliacion: float):
+        with closing(self._conectar()) as con, con:
+            con.execute(
+                "INSERT OR REPLACE INTO sincronizaciones (database_id, ultima_edicion, ultima_reconciliacion) "
+                "VALUES (?, ?, ?)",
+                (database_id, ultima_edicion, ultima_reconciliacion)
+            )
+
+
+class SincronizadorNotion:
+    """
+    Mantiene al día el almacén local para una base de datos de Notion.
+
+    La primera vez descarga la base completa. Después sólo pide las páginas con
+    `last_edited_time` posterior a la última vista, y cada `intervalo_reconciliacion`
+    segundos hace una pasada liviana (sólo el título) para detectar páginas borradas.
+    """
+
+    def __init__(self, almacen: AlmacenPaginas, database_id: str, headers: dict,
+                 intervalo_reconciliacion: float = NOTION_INTERVALO_RECONCILIACION):
+        self.almacen = almacen
+        self.database_id = database_id
+        self.headers = headers
+        self.intervalo_reconciliacion = intervalo_reconciliacion
+        self._lock = Lock()
+
+    def sincronizar(self, prioridad: int = None) -> dict:
+        """
+        Trae los cambios desde Notion. Retorna un resumen con la cantidad de páginas
+        actualizadas y eliminadas.
+        """
+        with self._lock:
+            ultima_edicion, ultima_reconciliacion = self.almacen.estado(self.database_id)
+            actualizadas, eliminadas = 0, 0
+
+            if ultima_edicion is None:
+                paginas = notion.consultar_database(self.database_id, self.headers, prioridad=prioridad)
+                self.almacen.guardar(self.database_id, paginas, reemplazar=True)
+                actualizadas = len(paginas)
+                ultima_reconciliacion = time.time()
+            else:
+                # Notion redondea last_edited_time al minuto, así que con 'on_or_after' se
+                # vuelven a traer algunas páginas del último minuto, pero no se pierde ninguna
+                paginas = notion.consultar_database(self.database_id, self.headers, {
+                    "filter": {
+                        "timestamp": "last_edited_time",
+                        "last_edited_time": {"on_or_after": ultima_edicion}
+                    }
+                }, prioridad=prioridad)
+                vigentes = [n for n in paginas if not (n.get("archived") or n.get("in_trash"))]
+                self.almacen.guardar(self.database_id, vigentes)
+                self.almacen.eliminar(self.database_id, {n["id"] for n in paginas} - {n["id"] for n in vigentes})
+                actualizadas = len(vigentes)
+                eliminadas = len(paginas) - len(vigentes)
+
+                if time.time() - ultima_reconciliacion > self.intervalo_reconciliacion:
+                    eliminadas += self.reconciliar(prioridad)
+                    ultima_reconciliacion = time.time()
+
+            ultima_edicion = max(
+                [ultima_edicion or ""] + [n["last_edited_time"] for n in paginas]) or None
+            self.almacen.guardar_estado(self.database_id, ultima_edicion, ultima_reconciliacion)
+
+        if actualizadas or eliminadas:
+            printt(f"Notion {self.database_id[:8]}: {actualizadas} páginas actualizadas, {eliminadas} eliminadas")
+        return {"actualizadas": actualizadas, "eliminadas": eliminadas}
+
+    def reconciliar(self, prioridad: int = None) -> int:
+        """Elimina del almacén las páginas que ya no existen en Notion. Retorna cuántas."""
+        existentes = {
+            n["id"] for n in notion.consultar_database(
+                self.database_id, self.headers, prioridad=prioridad, propiedades=["title"])
+        }
+        borradas = self.almacen.ids(self.database_id) - existentes
+        self.almacen.eliminar(self.database_id, borradas)
+        return len(borradas)
+
+    def paginas(self) -> list[dict]:
+        return self.almacen.paginas(self.database_id)
+
+
+_ALMACEN = None
+_SINCRONIZADORES: dict[str, SincronizadorNotion] = {}
+_lock_sincronizadores = Lock()
+
+
+def obtener_sincronizador(database_id: str, headers: dict) -> SincronizadorNotion:
+    """Sincronizador compartido por todo el proceso para `database_id`."""
+    global _ALMACEN
+    with _lock_sincronizadores:
+        if database_id not in _SINCRONIZADORES:
+            if _ALMACEN is None:
+                _ALMACEN = AlmacenPaginas()
+            _SINCRONIZADORES[database_id] = SincronizadorNotion(_ALMACEN, database_id, headers)
+        return _SINCRONIZADORES[database_id]
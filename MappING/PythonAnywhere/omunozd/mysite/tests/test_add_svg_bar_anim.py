@@ -0,0 +1,59 @@
+# Salidas "doradas" de la animación de barras de los Spotify Codes.
+#
+# golden/animacion/<caso>.svg es la entrada y <caso>.animado.svg lo que produjo el
+# add_bar_animations original (antes de separar los motores) con los parámetros por
+# defecto. Los casos scannables_* son códigos reales descargados de scannables.scdn.co
+# (los .bak de spotify_codes), ya_animado_* es un código ya animado que se vuelve a
+# animar y sintetico_* salen de mysite/bench/fixtures.py.
+#
+# Uso (desde la carpeta que contiene a mysite/):
+#     python -m pytest mysite/tests
+import os
+import shutil
+
+import pytest
+
+from mysite.TVs.QFMC.Cancion_del_dia.add_svg_bar_anim import add_bar_animations, animar_svg, _animar_plantilla
+
+CARPETA = os.path.join(os.path.dirname(__file__), "golden", "animacion")
+CASOS = sorted(nombre.removesuffix(".animado.svg") for nombre in os.listdir(CARPETA)
+               if nombre.endswith(".animado.svg"))
+
+
+def leer(nombre: str) -> bytes:
+    with open(os.path.join(CARPETA, nombre), "rb") as f:
+        return f.read()
+
+
+@pytest.mark.parametrize("motor", ["auto", "etree"])
+@pytest.mark.parametrize("caso", CASOS)
+def test_igual_a_la_salida_original(caso, motor):
+    assert animar_svg(leer(f"{caso}.svg"), motor=motor) == leer(f"{caso}.animado.svg")
+
+
+@pytest.mark.parametrize("caso", CASOS)
+def test_add_bar_animations_igual_a_la_salida_original(caso, tmp_path):
+    path = str(tmp_path / "codigo.svg")
+    shutil.copy(os.path.join(CARPETA, f"{caso}.svg"), path)
+
+    bak = add_bar_animations(path)
+
+    with open(path, "rb") as f:
+        assert f.read() == leer(f"{caso}.animado.svg")
+    with open(bak, "rb") as f:
+        assert f.read() == leer(f"{caso}.svg")
+
+
+@pytest.mark.parametrize("caso", [c for c in CASOS if c.startswith(("scannables_", "sintetico_"))])
+def test_plantilla_atiende_los_codigos_de_scannables(caso):
+    # Si la plantilla no reconociera estos SVG, "auto" caería siempre en ElementTree y
+    # las pruebas de arriba no la ejercitarían
+    assert _animar_plantilla(leer(f"{caso}.svg"), 2.5, 0.06) is not None
+
+
+@pytest.mark.parametrize("paso", [1.0, 7.0])
+@pytest.mark.parametrize("caso", CASOS)
+def test_modo_compacto_igual_en_ambos_motores(caso, paso):
+    svg = leer(f"{caso}.svg")
+    assert (animar_svg(svg, motor="auto", compacto=True, paso=paso)
+            == animar_svg(svg, motor="etree", compacto=True, paso=paso))
@@ -0,0 +1,101 @@
+# Equivalencia de mysite/ics_rapido.py con la librería ics: ambos calendarios se leen con
+# ics.Calendar y se comparan evento por evento.
+#
+# Uso (desde la carpeta que contiene a mysite/):
+#     python -m pytest mysite/tests
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+
+import pytest
+from ics import Calendar, Event
+
+from mysite.bench.fixtures import paginas_actividades
+from mysite.calendario import CacheFragmentos, NOMBRE_CALENDARIO, es_evento_publico, parsear_evento, serializar_calendario
+from mysite.ics_rapido import EventoCalendario, generar_ics
+
+
+def evento(**campos) -> EventoCalendario:
+    base = dict(uid="evento@cai.ing.puc.cl", editado="2025-03-01T12:00:00.000Z", inicio="2025-03-10",
+                fin=None, zona_horaria=None, nombre="🎉 Bienvenida", tipo="Feria", lugar="Patio de Ing.",
+                categorias=("Deporte",), descripcion="Organizan: CAi")
+    base.update(campos)
+    return EventoCalendario(**base)
+
+
+CASOS = {
+    "todo_el_dia": evento(),
+    "varios_dias": evento(inicio="2025-03-10", fin="2025-03-12"),
+    "con_hora": evento(inicio="2025-03-10T18:00:00.000-03:00", fin="2025-03-10T19:30:00.000-03:00"),
+    "con_hora_sin_fin": evento(inicio="2025-03-10T18:00:00.000-03:00"),
+    "varios_dias_con_hora": evento(inicio="2025-03-10T18:00:00.000-03:00", fin="2025-03-12T09:00:00.000-03:00"),
+    "zona_horaria": evento(inicio="2025-07-10T18:00:00.000", fin="2025-07-10T20:00:00.000",
+                           zona_horaria="America/Santiago"),
+    "sin_campos": evento(editado="", nombre="", tipo="", lugar="", categorias=(), descripcion=""),
+    "texto_largo": evento(
+        nombre="💡 Conversatorio: innovación, energía y ñandúes en la Semana de Ingeniería — edición 2025 🏆",
+        tipo="Charla; abierta",
+        lugar="Auditorio Ruiz-Tagle, Hall Raúl Devés (2º piso)",
+        categorias=("Innovación y Emprendimiento", "Música"),
+        descripcion=("Comentario con acentos: áéíóú ÁÉÍÓÚ ñ ü, signos ; , \\ y emojis 🎬🎤🌱 que "
+                     "obligan a plegar la línea en varios lugares sin cortar caracteres multibyte.   \n"
+                     "Inscripciones: https://forms.gle/abc123\nOrganizan: CAi, Centro de Alumnos")),
+}
+
+
+def evento_ics(e: EventoCalendario) -> Event:
+    """El mismo evento armado con la librería ics."""
+    def instante(valor: str) -> datetime:
+        dt = datetime.fromisoformat(valor.replace("Z", "+00:00"))
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=ZoneInfo(e.zona_horaria) if e.zona_horaria else timezone.utc)
+        return dt
+
+    evento = Event(uid=e.uid, name=e.nombre or None, location=e.lugar or None,
+                   description=e.descripcion or None, classification=e.tipo or None,
+                   categories=set(e.categorias))
+    if "T" not in e.inicio:
+        evento.begin = e.inicio
+        evento.end = e.fin
+        evento.make_all_day()
+    else:
+        evento.begin = instante(e.inicio)
+        if e.fin:
+            evento.end = instante(e.fin)
+        else:
+            evento.duration = {"hours": 1, "minutes": 10}
+    return evento
+
+
+def calendario_ics(eventos: list[EventoCalendario]) -> str:
+    calendario = Calendar()
+    calendario.events = {evento_ics(e) for e in eventos}
+    return calendario.serialize()
+
+
+def campos(ics_serializado: str) -> list[tuple]:
+    return sorted(
+        (e.uid, e.name or "", e.begin, e.end, e.all_day, e.location or "", e.description or "",
+         tuple(sorted(e.categories)), e.classification or "")
+        for e in Calendar(ics_serializado).events
+    )
+
+
+@pytest.mark.parametrize("caso", CASOS)
+def test_evento_equivalente_a_ics(caso):
+    salida = "".join(generar_ics([CASOS[caso]], NOMBRE_CALENDARIO))
+    assert campos(salida) == campos(calendario_ics([CASOS[caso]]))
+
+
+def test_texto_largo_se_pliega_sin_perder_caracteres():
+    salida = "".join(generar_ics([CASOS["texto_largo"]], NOMBRE_CALENDARIO))
+    assert all(len(linea.encode("utf-8")) <= 75 for linea in salida.split("\r\n"))
+    (leido,) = Calendar(salida).events
+    assert leido.name == CASOS["texto_largo"].nombre
+    assert leido.description == CASOS["texto_largo"].descripcion
+
+
+def test_calendario_completo_equivalente_a_ics():
+    paginas = paginas_actividades(500, semilla=7)
+    salida = serializar_calendario(paginas, CacheFragmentos()).decode("utf-8")
+    esperado = calendario_ics([parsear_evento(p) for p in paginas if es_evento_publico(p)])
+    assert campos(salida) == campos(esperado)